@@ -9,7 +9,7 @@ WHAT THIS APP DOES
 • For all other vendors, All invoices are processed locally. No cloud or Azure calls are made.
 • FedEx output:
   - Sets Description="FedEx" for shipment rows and "FedEx Other Charges" for that row
-  - Adds explicit columns: FedEx_Sender, FedEx_CustRef, PrimaryClientCode
+  - Adds explicit columns: FedEx_Sender, FedEx_CustRef, PrimaryClientCode, ClientMatchScore
   - (Tracking/Order# removed from the output as requested)
 • Lightning Messenger output (per Reference):
   - InvoiceDate := first Order "Date" under that Reference (MM/DD/YYYY)
@@ -24,6 +24,11 @@ WHAT THIS APP DOES
   - Graphical progress bar while processing files
   - Client Code Map (CSV): browse & load to map 10-digit CustRef to PrimaryClientCode
   - Mixed-folder processing: drop in a folder with FedEx + Lightning + other PDFs and click Analyze
+  - Incremental re-analysis: a per-folder manifest (.smart_invoice_manifest.json) keeps each
+    file's rows, so a re-run only extracts new or changed PDFs
+  - Large FedEx invoices: PDFs over MAX_FILE_MB are parsed page by page (memory follows
+    page size, not file size) instead of being skipped; other vendors over the limit are
+    reported as errors
 
 UNIFIED OUTPUT COLUMNS (both pipelines)
 ---------------------------------------
@@ -40,27 +45,103 @@ Currency
 FedEx_Sender (UI label: "Caller/Sender")
 FedEx_CustRef (UI label: "Reference")
 PrimaryClientCode
-
-© Gelfand, Rennert & Feldman, LLC
+ClientMatchScore (UI label: "Client Match"; 1.00 exact, lower for fuzzy matches)
+
+HEADLESS / SCHEDULED USE
+------------------------
+python Invoice_Runner_v3.2.py process <files/folders> [-m map.csv] [-o out.csv|.xlsx|.json|.ndjson|.parquet|.arrow] [-w N]
+  Same pipeline as the GUI, no tkinter/customtkinter import. Prints a JSON
+  summary; exit code 0 = all files OK, 1 = some failed, 2 = bad arguments,
+  3 = nothing processed. ("batch" is an alias of "process".)
+  -o - -f ndjson streams one JSON object per row (with a "_file" metadata
+  object: vendor, OCR used, pages, elapsed ms) as each invoice finishes.
+  -o out.parquet / out.arrow writes typed columns (dates, decimal amounts,
+  dictionary-encoded vendor/client code) in row groups; needs pyarrow.
+python Invoice_Runner_v3.2.py watch <folders> -o "invoices-%Y%m%d.csv" [-m map.csv] [-w N]
+  Runs until Ctrl+C / SIGTERM. New or changed PDFs are processed once they
+  stop growing and their rows are appended to the output; strftime codes in
+  -o roll the file (csv or ndjson). On the first run existing PDFs are
+  skipped unless --existing; handled files are remembered in the folder's
+  manifest, so a restart picks up what arrived meanwhile and repeats
+  nothing. --once processes what is there and exits. PDFs that stay empty
+  or unreadable are reported as failed.
+python Invoice_Runner_v3.2.py startup-check [--budget-ms 300] [--gui [--gui-budget-ms 1500]]
+  Times a cold import in fresh interpreters; exits 3 if it is over budget or
+  a heavy module (PyMuPDF, PIL, Tesseract, requests, Tk…) loads eagerly.
+  --gui also times a cold desktop launch until the main window is drawn.
+
+©Gelfand, Rennert & Feldman, LLC
 """
-from io import BytesIO
-import fitz  # PyMuPDF
+from io import BytesIO, StringIO
+import os
 import re
+import sys
 import csv
 import time
-import requests  # pip install request
+import json
+import zlib
+import sqlite3
+import hashlib
+import pickle
+import tempfile
+import bisect
+import shlex
+import atexit
+import queue
+import threading
+import multiprocessing
+import itertools
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
 from pathlib import Path
 from datetime import datetime
-from typing import List, Dict, Optional, Tuple
+from decimal import Decimal, InvalidOperation
+from dataclasses import dataclass, field
+from typing import List, Dict, Iterable, Optional, Tuple
+import importlib
+import importlib.util
+
+
+class _LazyModule:
+    """
+    Stand-in for a heavy module: the real import happens on first attribute
+    access, so launching the GUI (or the CLI) does not pay for it up front.
+    """
+
+    def __init__(self, name: str):
+        self.__dict__["_name"] = name
+        self.__dict__["_mod"] = None
+
+    def __getattr__(self, attr):
+        mod = self.__dict__["_mod"]
+        if mod is None:
+            mod = importlib.import_module(self.__dict__["_name"])
+            self.__dict__["_mod"] = mod
+        return getattr(mod, attr)
+
+
+def _has_module(name: str) -> bool:
+    """Installed? (finds the module without importing it)"""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except Exception:
+        return False
 
 # ---------- UI ----------
-import tkinter as tk
-from tkinter import ttk, filedialog, messagebox
-try:
-    import customtkinter as ctk  # pip install customtkinter
-    USE_CTK = True
-except Exception:
-    USE_CTK = False
+# The GUI stack is only imported when the script is launched as the desktop
+# app. CLI subcommands, pool workers and imports from other code stay headless.
+CLI_COMMANDS = ("process", "batch", "watch", "startup-check")
+GUI_ENABLED = (__name__ == "__main__" and not (
+    len(sys.argv) > 1 and sys.argv[1] in CLI_COMMANDS + ("-h", "--help")))
+USE_CTK = False
+if GUI_ENABLED:
+    import tkinter as tk
+    from tkinter import ttk, filedialog, messagebox
+    try:
+        import customtkinter as ctk  # pip install customtkinter
+        USE_CTK = True
+    except Exception:
+        USE_CTK = False
 
 from datetime import datetime
 
@@ -88,25 +169,78 @@ def normalize_date(date_str):
 
 # ---------- Local PDF text extraction ----------
 # pip install pymupdf
+fitz = _LazyModule("fitz")  # PyMuPDF, imported on first use
 
 # ---------- Splash image helpers ----------
-try:
-    from PIL import Image, ImageTk  # pip install pillow
-    PIL_OK = True
-except Exception:
-    PIL_OK = False
+# pip install pillow
+PIL_OK = _has_module("PIL")
+Image = _LazyModule("PIL.Image")
+ImageTk = _LazyModule("PIL.ImageTk") if GUI_ENABLED and PIL_OK else None
 
 # --- OCR imports (optional; only used if a page is image-only) ---
-try:
-    from pdf2image import convert_from_path
-    import pytesseract
-    OCR_AVAILABLE = True
-except Exception:
-    OCR_AVAILABLE = False
+# Pages are rasterized in-process by PyMuPDF; Tesseract only recognizes.
+# Both are looked up without importing; the first OCR'd page loads them.
+PYTESSERACT_OK = _has_module("pytesseract")
+pytesseract = _LazyModule("pytesseract")
+PYARROW_OK = _has_module("pyarrow")  # optional: Parquet / Arrow export (pip install pyarrow)
+TESSEROCR_OK = _has_module("tesserocr")  # pip install tesserocr (keeps the model loaded between pages)
+tesserocr = _LazyModule("tesserocr")
+OCR_AVAILABLE = PIL_OK and (PYTESSERACT_OK or TESSEROCR_OK)
 
 
 APP_VERSION = "SmartInvoiceRunner v3.2"
 MAX_FILE_MB = 50
+# Above MAX_FILE_MB, FedEx invoices are parsed page by page instead of skipped
+STREAM_LARGE_FEDEX = True
+STREAM_DETECT_PAGES = 3      # pages read to decide whether a large file is FedEx
+STREAM_PAGE_WINDOW = 16      # pages extracted (and OCR'd) per step while streaming
+# Worker processes used by Analyze; 1 keeps the original serial loop
+ANALYZE_WORKERS = max(1, min(8, (os.cpu_count() or 1) - 1))
+# GUI streaming: rows reach the table in batches on a timer, not per file
+UI_POLL_MS = 50
+UI_BATCH_ROWS = 5000
+UI_PROGRESS_INTERVAL = 0.2   # seconds between progress bar updates
+# Excel export: also write FedEx / Lightning / Generic sheets (Totals is always added)
+XLSX_VENDOR_SHEETS = False
+WATCH_POLL_S = 1.0     # watch mode: seconds between folder scans
+WATCH_SETTLE_S = 2.0   # a PDF must be unchanged this long before it is processed
+WATCH_GIVE_UP_S = 60.0  # a settled PDF that stays empty or unopenable this long is reported as failed
+# Adaptive OCR resolution: try the lowest DPI first and escalate only when
+# recognition confidence or the amount of text is too low
+OCR_DPI_LADDER = (150, 225, 300)
+OCR_MIN_CONFIDENCE = 70.0
+# Pages with less native text than this (and an image on them) are OCR'd
+PAGE_TEXT_MIN_CHARS = 40
+# Streaming OCR: pages are rendered + recognized one at a time per thread;
+# rendered page images in flight never exceed the memory budget
+OCR_THREADS = 2
+# Recognizer backend: "auto" (tesserocr if installed, else pytesseract) or a
+# name registered with register_ocr_backend
+OCR_BACKEND = "auto"
+OCR_MEMORY_BUDGET_MB = 256
+# Bump when extraction / normalize_text output changes (invalidates cached text)
+EXTRACT_VERSION = 3
+NORMALIZE_VERSION = 2
+# Bump when parser output for the same text changes (invalidates folder manifests)
+PARSER_VERSION = 1
+# Per-folder manifest of analyzed files: re-runs only touch new/changed PDFs
+MANIFEST_ENABLED = True
+MANIFEST_NAME = ".smart_invoice_manifest.json"
+# Persistent extraction cache (normalized text keyed by file content)
+TEXT_CACHE_ENABLED = True
+TEXT_CACHE_MAX_MB = 512
+# Per-page OCR results keyed by the rendered page image (re-sent/duplicate pages)
+PAGE_OCR_CACHE_ENABLED = True
+PAGE_OCR_CACHE_MAX_MB = 128
+# Optional fuzzy client-map stage for OCR-noisy references (off by default)
+FUZZY_CLIENT_MATCH = False
+FUZZY_MAX_EDITS = 1
+FUZZY_MIN_LEN = 6
+CACHE_DIR = Path(os.environ.get("LOCALAPPDATA")
+                 or Path.home() / ".cache") / "SmartInvoiceRunner"
+# Rows of the previous GUI "Export Changes" (delta export baseline)
+DELTA_BASELINE_PATH = CACHE_DIR / "delta_baseline.json"
+SPLASH_HOLD_MS = 0   # extra splash time after the main window is drawn
 SPLASH_IMAGE_URL = r"C:\Users\rscottdeperto\Desktop\Invoice Testing\Coding\assets\splash.png"
 
 # ======================================
@@ -114,52 +248,346 @@ SPLASH_IMAGE_URL = r"C:\Users\rscottdeperto\Desktop\Invoice Testing\Coding\asset
 # ======================================
 
 
-def normalize_text(text: str) -> str:
-    if not text:
-        return ""
-    text = text.replace("\xa0", " ").replace(
-        "\u200b", " ").replace("\ufb01", "fi")
-    text = re.sub(r"[\t ]+", " ", text)
+# Character fix-ups done before the regex pass (C-speed str.translate)
+_NORMALIZE_TRANSLATION = str.maketrans({"\xa0": " ", "\u200b": " ", "\ufb01": "fi"})
+
+# (group, first chars, pattern, replacement, scope) -- listed in the order
+# the original sequential normalizer applied them. The rules of a scope are
+# combined into one alternation and applied in a single re.sub pass; the
+# first-char lookahead lets the scanner skip positions no rule can start at.
+_NORMALIZE_RULES = (
+    # runs of tabs/spaces -> one space (lone spaces are already canonical)
+    ("ws", "\t ", r"\t[\t ]*| [\t ]+", " ", "common"),
     # Normalize both old and new FedEx total charge labels to a single string
-    text = re.sub(r"Total\s*Transportation\s*Charges",
-                  "Total Charge", text, flags=re.I)
-    text = re.sub(r"Total\s*Charge", "Total Charge", text, flags=re.I)
+    ("fx_total_trans", "t", r"Total\s*Transportation\s*Charges", "Total Charge", "fedex"),
+    ("fx_total", "t", r"Total\s*Charge", "Total Charge", "fedex"),
     # Lightning: normalize hyphens/dashes around "Totals: Billing Reference"
-    text = re.sub(
-        r"Totals:\s*Billing\s*Reference\s*1\s*[\u2013\-]\s*",
-        "Totals: Billing Reference 1 - ",
-        text,
-        flags=re.I
-    )
+    ("lm_totals_dash", "t", r"Totals:\s*Billing\s*Reference\s*1\s*[\u2013\-]\s*",
+     "Totals: Billing Reference 1 - ", "lightning"),
     # Lightning: aggressively normalize OCR variations for all key anchors
-    text = re.sub(r"summary\s*[-–—]?\s*billing\s*reference\s*1",
-                  "Summary - Billing Reference 1", text, flags=re.I)
-    text = re.sub(r"totals?:\s*billing\s*reference\s*1",
-                  "Totals: Billing Reference 1", text, flags=re.I)
-    text = re.sub(r"order\s*total\s*:", "Order Total:", text, flags=re.I)
-    text = re.sub(r"billing\s*reference\s*1",
-                  "Billing Reference 1", text, flags=re.I)
-    text = re.sub(r"customer\s*number", "Customer Number", text, flags=re.I)
-    text = re.sub(r"invoice\s*number", "Invoice Number", text, flags=re.I)
-    text = re.sub(r"invoice\s*period", "Invoice Period", text, flags=re.I)
-    return text
+    ("lm_summary", "s", r"summary\s*[-–—]?\s*billing\s*reference\s*1",
+     "Summary - Billing Reference 1", "lightning"),
+    ("lm_totals", "t", r"totals?:\s*billing\s*reference\s*1",
+     "Totals: Billing Reference 1", "lightning"),
+    # the lookahead leaves "total: billing reference 1" to lm_totals, which
+    # ran first in the sequential normalizer
+    ("lm_order_total", "o", r"order\s*total(?!:\s*billing\s*reference\s*1)\s*:",
+     "Order Total:", "lightning"),
+    ("lm_billing_ref", "b", r"billing\s*reference\s*1", "Billing Reference 1", "lightning"),
+    ("customer_number", "c", r"customer\s*number", "Customer Number", "common"),
+    ("invoice_number", "i", r"invoice\s*number", "Invoice Number", "common"),
+    ("invoice_period", "i", r"invoice\s*period", "Invoice Period", "common"),
+)
+_NORMALIZE_REPL = {name: repl for name, _, _, repl, _ in _NORMALIZE_RULES}
+_NORMALIZE_SCOPES = {
+    "fedex": ("common", "fedex"),
+    "lightning": ("common", "lightning"),
+    "all": ("common", "fedex", "lightning"),
+}
+_NORMALIZERS: Dict[str, "re.Pattern"] = {}
+_FEDEX_BRAND_RX = re.compile(r"fedex", re.I)
+
+
+def _normalizer(scope: str) -> "re.Pattern":
+    rx = _NORMALIZERS.get(scope)
+    if rx is None:
+        wanted = _NORMALIZE_SCOPES[scope]
+        rules = [r for r in _NORMALIZE_RULES if r[4] in wanted]
+        lead = "".join(sorted({c for r in rules for c in r[1]}))
+        rx = re.compile(f"(?=[{re.escape(lead)}])(?:"
+                        + "|".join(f"(?P<{name}>{pat})" for name, _, pat, _, _ in rules)
+                        + ")", re.I)
+        _NORMALIZERS[scope] = rx
+    return rx
+
+
+def _normalize_repl(m) -> str:
+    return _NORMALIZE_REPL[m.lastgroup]
 
 
-def _ocr_pdf_to_text(pdf_path: Path, dpi: int = 300) -> str:
+def normalize_text(text: str, vendor: Optional[str] = None) -> str:
     """
-    Fallback OCR using pdf2image + Tesseract. Returns concatenated text for all pages.
+    Single-pass normalizer. vendor="fedex"/"lightning" applies the common
+    rules plus that vendor's anchors; "all" applies every rule (same output
+    as the old chain of re.sub calls). With vendor=None the scope is picked
+    from the text: FedEx-branded text gets the FedEx rules first and only
+    runs the Lightning anchors if it does not look like a FedEx invoice.
     """
-    if not OCR_AVAILABLE:
+    if not text:
         return ""
+    text = text.translate(_NORMALIZE_TRANSLATION)
+    if vendor is None:
+        if _FEDEX_BRAND_RX.search(text):
+            out = _normalizer("fedex").sub(_normalize_repl, text)
+            if looks_like_fedex(out):
+                return out
+            return _normalizer("lightning").sub(_normalize_repl, out)
+        vendor = "all"
+    return _normalizer(vendor).sub(_normalize_repl, text)
+
+
+def _render_page(doc, pno: int, dpi: int, lock: threading.Lock):
+    """Rasterizes one page to a grayscale PIL image (PyMuPDF, no temp files)."""
+    with lock:  # a fitz document must not be used from two threads at once
+        pix = doc.load_page(pno).get_pixmap(
+            dpi=dpi, colorspace=fitz.csGRAY, alpha=False)
+        return Image.frombytes("L", (pix.width, pix.height), pix.samples)
+
+
+class OcrEngine:
+    """
+    Recognizer interface. The pool creates one engine per worker thread and
+    reuses it for every page that worker handles.
+    """
+    name = ""
+
+    def recognize(self, img) -> Tuple[str, float]:
+        """Returns (text, mean word confidence 0-100) for a PIL image."""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class TesserocrEngine(OcrEngine):
+    """Tesseract C API via tesserocr; the language model is loaded once."""
+    name = "tesserocr"
+
+    def __init__(self):
+        if not TESSEROCR_OK:
+            raise RuntimeError("tesserocr not installed")
+        self.api = tesserocr.PyTessBaseAPI(lang='eng')
+
+    def recognize(self, img) -> Tuple[str, float]:
+        self.api.SetImage(img)
+        return self.api.GetUTF8Text(), float(self.api.MeanTextConf())
+
+    def close(self):
+        self.api.End()
+
+
+class PytesseractEngine(OcrEngine):
+    """Fallback: one tesseract process per page through pytesseract."""
+    name = "pytesseract"
+
+    def __init__(self):
+        if not PYTESSERACT_OK:
+            raise RuntimeError("pytesseract not installed")
+
+    def recognize(self, img) -> Tuple[str, float]:
+        data = pytesseract.image_to_data(
+            img, lang='eng', output_type=pytesseract.Output.DICT)
+        lines: Dict[Tuple[int, int, int], List[str]] = {}
+        confs: List[float] = []
+        for i, word in enumerate(data.get("text", [])):
+            word = (word or "").strip()
+            if not word:
+                continue
+            key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+            lines.setdefault(key, []).append(word)
+            try:
+                c = float(data["conf"][i])
+            except Exception:
+                continue
+            if c >= 0:
+                confs.append(c)
+        text = "\n".join(" ".join(words) for words in lines.values())
+        return text, (sum(confs) / len(confs) if confs else 0.0)
+
+
+OCR_BACKENDS: Dict[str, type] = {
+    "tesserocr": TesserocrEngine,
+    "pytesseract": PytesseractEngine,
+}
+
+
+def register_ocr_backend(name: str, factory):
+    """Plugs in another recognizer; factory() must return an OcrEngine."""
+    OCR_BACKENDS[name] = factory
+
+
+def make_ocr_engine(backend: str = "auto") -> OcrEngine:
+    order = ["tesserocr", "pytesseract"] if backend == "auto" else [
+        backend, "pytesseract"]
+    for name in order:
+        factory = OCR_BACKENDS.get(name)
+        if factory is None:
+            continue
+        try:
+            return factory()
+        except Exception:
+            continue
+    raise RuntimeError(f"No OCR backend available ({backend})")
+
+
+class OcrPool:
+    """
+    Long-lived recognizer workers. Pages are queued to a fixed set of threads;
+    each thread lazily builds its own engine (model loaded once) and keeps
+    it until the pool shuts down.
+    """
+
+    def __init__(self, workers: int = OCR_THREADS, backend: str = OCR_BACKEND):
+        self.workers = max(1, workers)
+        self.backend = backend
+        self._local = threading.local()
+        self._engines: List[OcrEngine] = []
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                            thread_name_prefix="ocr")
+
+    def engine(self) -> OcrEngine:
+        eng = getattr(self._local, "engine", None)
+        if eng is None:
+            eng = make_ocr_engine(self.backend)
+            self._local.engine = eng
+            with self._lock:
+                self._engines.append(eng)
+        return eng
+
+    def submit(self, fn, *args):
+        """Queues fn(pool, *args) on a worker thread."""
+        return self._executor.submit(fn, self, *args)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            for eng in self._engines:
+                try:
+                    eng.close()
+                except Exception:
+                    pass
+            self._engines = []
+
+
+_OCR_POOL: Optional[OcrPool] = None
+_OCR_POOL_PID = None
+
+
+def get_ocr_pool() -> OcrPool:
+    """Per-process OCR pool (threads do not survive a fork)."""
+    global _OCR_POOL, _OCR_POOL_PID
+    if _OCR_POOL is None or _OCR_POOL_PID != os.getpid():
+        _OCR_POOL = OcrPool(OCR_THREADS, OCR_BACKEND)
+        _OCR_POOL_PID = os.getpid()
+        atexit.register(_OCR_POOL.shutdown)
+    return _OCR_POOL
+
+
+def _page_ocr_key(img, engine: OcrEngine) -> str:
+    h = hashlib.blake2b(img.tobytes(), digest_size=20)
+    h.update(f"|{img.mode}|{img.size}|{engine.name}|eng".encode())
+    return h.hexdigest()
+
+
+def _ocr_one_page(pool: OcrPool, doc, pno: int, ladder: Tuple[int, ...],
+                  lock: threading.Lock, stats: Dict[str, int]) -> str:
+    """
+    Walks the DPI ladder for one page: stops at the first resolution whose
+    result is confident and meaningful, otherwise keeps the best attempt.
+    Each rendered image is looked up in the page OCR cache before the
+    recognizer runs, so identical pages are only recognized once.
+    """
+    cache = get_page_ocr_cache()
+    best_text, best_conf = "", -1.0
+    for dpi in ladder:
+        img = _render_page(doc, pno, dpi, lock)
+        try:
+            engine = pool.engine()
+            key = _page_ocr_key(img, engine) if cache else ""
+            hit = None
+            if cache:
+                try:
+                    hit = cache.get_entry(key)
+                except Exception:
+                    hit = None
+            if hit is not None:
+                text, conf = hit[1], hit[0].get("conf", 0.0)
+            else:
+                text, conf = engine.recognize(img)
+                if cache:
+                    try:
+                        cache.put_entry(key, {"conf": conf}, text)
+                    except Exception:
+                        pass
+        finally:
+            img.close()
+        with lock:
+            stats["hits" if hit is not None else "misses"] += 1
+        if conf > best_conf:
+            best_text, best_conf = text, conf
+        if conf >= OCR_MIN_CONFIDENCE and _has_meaningful_text(text, min_len=PAGE_TEXT_MIN_CHARS):
+            break
+    return best_text
+
+
+def _raster_bytes(size_pt: Tuple[float, float], dpi: int) -> int:
+    """Approximate grayscale raster size of a page (PDF points) at dpi."""
+    w, h = size_pt
+    return int((w / 72.0 * dpi) * (h / 72.0 * dpi))
+
+
+def iter_ocr_pages(pdf_path: Path, page_sizes: Dict[int, Tuple[float, float]],
+                   ladder: Tuple[int, ...] = OCR_DPI_LADDER,
+                   budget_mb: int = OCR_MEMORY_BUDGET_MB,
+                   pool: Optional[OcrPool] = None,
+                   stats: Optional[Dict[str, int]] = None):
+    """
+    Streaming OCR for selected pages ({0-based page: (width_pt, height_pt)}).
+    Pages are queued to the OCR pool, each rendered and recognized inside its
+    own job, and at most `window` jobs are in flight, so peak memory is
+    bounded by the budget instead of the page count. Rungs of the DPI ladder
+    that would not fit a slot are capped. Page OCR cache hits/misses are
+    counted into `stats`, pages whose OCR raised into stats["errors"] (they
+    come back as ""). Yields (page_number, text) in page order.
+    """
+    if not OCR_AVAILABLE or not page_sizes:
+        return
+    pool = pool or get_ocr_pool()
+    if stats is None:
+        stats = {}
+    stats.setdefault("hits", 0)
+    stats.setdefault("misses", 0)
+    stats.setdefault("errors", 0)
+    top = max(ladder)
+    budget = max(1, budget_mb) * 1024 * 1024
+    largest = max(_raster_bytes(sz, top) for sz in page_sizes.values())
+    window = max(1, min(pool.workers, budget // max(1, largest)))
+    slot = budget // window
+
+    def page_ladder(sz):
+        need = _raster_bytes(sz, top)
+        cap = top if need <= slot else max(72, int(top * (slot / need) ** 0.5))
+        return tuple(sorted({min(d, cap) for d in ladder}))
+
+    lock = threading.Lock()
+    pending = deque()
+    with fitz.open(str(pdf_path)) as doc:
+        try:
+            for pno in sorted(page_sizes):
+                if len(pending) >= window:
+                    yield _ocr_result(*pending.popleft(), stats)
+                pending.append((pno, pool.submit(
+                    _ocr_one_page, doc, pno, page_ladder(page_sizes[pno]), lock, stats)))
+            while pending:
+                yield _ocr_result(*pending.popleft(), stats)
+        finally:
+            # never close the document under a running job
+            for _, fut in pending:
+                fut.cancel()
+            for _, fut in pending:
+                try:
+                    fut.result()
+                except Exception:
+                    pass
+
+
+def _ocr_result(pno: int, fut, stats: Dict[str, int]) -> Tuple[int, str]:
     try:
-        images = convert_from_path(str(pdf_path), dpi=dpi)
-        out_parts = []
-        for img in images:
-            # Tesseract English; adjust if needed
-            out_parts.append(pytesseract.image_to_string(img, lang='eng'))
-        return "\n".join(out_parts)
-    except Exception:
-        return ""
+        return pno, fut.result()
+    except Exception:   # e.g. tesseract binary missing
+        stats["errors"] += 1
+        return pno, ""
 
 
 def _has_meaningful_text(text: str, min_len: int = 60) -> bool:
@@ -170,32 +598,269 @@ def _has_meaningful_text(text: str, min_len: int = 60) -> bool:
     return len((text or "").strip()) >= min_len
 
 
-def read_pdf_text(file_path: Path) -> str:
+@dataclass
+class PdfText:
+    """Normalized text of one PDF plus how it was obtained."""
+    text: str = ""
+    pages: int = 0
+    ocr_used: bool = False
+    # per page: "text" (native layer), "ocr" (image-only, OCR'd) or "none"
+    page_modes: List[str] = field(default_factory=list)
+    seconds: float = 0.0
+    file_hash: str = ""     # sha256 of the file bytes
+    cached: bool = False    # served from the extraction cache
+    ocr_cache_hits: int = 0     # page images answered by the page OCR cache
+    ocr_cache_misses: int = 0   # page images sent to the recognizer
+    ocr_failed: int = 0         # image-only pages whose OCR raised (result not cached)
+
+
+def file_sha256(file_path: Path, chunk: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for blk in iter(lambda: f.read(chunk), b""):
+            h.update(blk)
+    return h.hexdigest()
+
+
+def _extractor_settings() -> str:
+    """Everything besides file content that changes extract_pdf_text output."""
+    return (f"v={EXTRACT_VERSION};dpi={OCR_DPI_LADDER};conf={OCR_MIN_CONFIDENCE};"
+            f"min={PAGE_TEXT_MIN_CHARS};norm={NORMALIZE_VERSION};ocr={int(OCR_AVAILABLE)};"
+            f"engine={OCR_BACKEND}/{int(TESSEROCR_OK)}")
+
+
+class TextCache:
     """
-    Extracts text with PyMuPDF first. If little/no text is found (likely scanned),
-    falls back to OCR (pdf2image + Tesseract). Output is normalized for parsers.
+    Content-addressed store for extracted text (SQLite + zlib).
+    The pdf_text table holds extract_pdf_text output keyed by file hash plus
+    extractor settings; the page_ocr table holds per-page OCR results keyed
+    by rendered-image hash. Least recently used entries are evicted once a
+    table grows past max_bytes. Safe to share between OCR threads.
     """
-    # First pass: native text extraction
-    parts = []
+
+    def __init__(self, db_path: Path, max_bytes: int, table: str = "pdf_text"):
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.table = table
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(
+            str(db_path), timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            " key TEXT PRIMARY KEY, size INTEGER, used REAL,"
+            " meta TEXT, data BLOB)")
+        self.conn.execute(
+            f"CREATE INDEX IF NOT EXISTS {table}_used ON {table}(used)")
+        self.conn.commit()
+
+    @staticmethod
+    def make_key(file_hash: str) -> str:
+        return hashlib.sha256(
+            f"{file_hash}|{_extractor_settings()}".encode()).hexdigest()
+
+    def get_entry(self, key: str) -> Optional[Tuple[Dict, str]]:
+        with self._lock:
+            row = self.conn.execute(
+                f"SELECT meta, data FROM {self.table} WHERE key=?", (key,)).fetchone()
+            if not row:
+                return None
+            with self.conn:
+                self.conn.execute(
+                    f"UPDATE {self.table} SET used=? WHERE key=?", (time.time(), key))
+        return json.loads(row[0]), zlib.decompress(row[1]).decode("utf-8")
+
+    def put_entry(self, key: str, meta: Dict, text: str):
+        data = zlib.compress(text.encode("utf-8"), 6)
+        with self._lock:
+            with self.conn:
+                self.conn.execute(
+                    f"INSERT OR REPLACE INTO {self.table} VALUES (?, ?, ?, ?, ?)",
+                    (key, len(data), time.time(), json.dumps(meta), data))
+            self._evict()
+
+    def get(self, key: str) -> Optional[PdfText]:
+        hit = self.get_entry(key)
+        if hit is None:
+            return None
+        meta, text = hit
+        return PdfText(text=text, pages=meta.get("pages", 0),
+                       ocr_used=meta.get("ocr", False),
+                       page_modes=meta.get("modes", []), cached=True)
+
+    def put(self, key: str, ext: PdfText):
+        self.put_entry(key, {"pages": ext.pages, "ocr": ext.ocr_used,
+                             "modes": ext.page_modes}, ext.text)
+
+    def _evict(self):
+        total = self.conn.execute(
+            f"SELECT COALESCE(SUM(size), 0) FROM {self.table}").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Drop oldest entries until we are back under 90% of the budget
+        target = int(self.max_bytes * 0.9)
+        drop = []
+        for key, size in self.conn.execute(
+                f"SELECT key, size FROM {self.table} ORDER BY used"):
+            if total <= target:
+                break
+            drop.append((key,))
+            total -= size
+        with self.conn:
+            self.conn.executemany(
+                f"DELETE FROM {self.table} WHERE key=?", drop)
+
+
+_CACHES: Dict[str, Optional[TextCache]] = {}
+_CACHES_PID = None
+
+
+def _open_cache(table: str, max_mb: int) -> Optional[TextCache]:
+    """Per-process cache handles (SQLite connections must not cross a fork)."""
+    global _CACHES_PID
+    if _CACHES_PID != os.getpid():
+        _CACHES_PID = os.getpid()
+        _CACHES.clear()
+    if table not in _CACHES:
+        try:
+            _CACHES[table] = TextCache(CACHE_DIR / "text_cache.sqlite3",
+                                       max_mb * 1024 * 1024, table=table)
+        except Exception:
+            _CACHES[table] = None
+    return _CACHES[table]
+
+
+def get_text_cache() -> Optional[TextCache]:
+    if not TEXT_CACHE_ENABLED:
+        return None
+    return _open_cache("pdf_text", TEXT_CACHE_MAX_MB)
+
+
+def get_page_ocr_cache() -> Optional[TextCache]:
+    if not PAGE_OCR_CACHE_ENABLED:
+        return None
+    return _open_cache("page_ocr", PAGE_OCR_CACHE_MAX_MB)
+
+
+def _page_needs_ocr(pg, native: str) -> bool:
+    """A page is OCR'd only if it lacks a usable text layer but carries an image."""
+    if _has_meaningful_text(native, min_len=PAGE_TEXT_MIN_CHARS):
+        return False
+    try:
+        # block type 1 = image (covers inline images too)
+        return any(b[6] == 1 for b in pg.get_text(
+            "blocks", flags=fitz.TEXT_PRESERVE_IMAGES))
+    except Exception:
+        return True
+
+
+def _extract_pdf_text_uncached(file_path: Path) -> PdfText:
+    # First pass: native text layer per page, noting image-only pages
+    parts: List[str] = []
+    ocr_pages: Dict[int, Tuple[float, float]] = {}
     try:
         with fitz.open(str(file_path)) as doc:
-            for pg in doc:
+            for pno, pg in enumerate(doc):
                 # 'text' for layout-friendly content; switch to 'plain' if needed
-                parts.append(pg.get_text("text"))
+                native = pg.get_text("text")
+                parts.append(native)
+                if _page_needs_ocr(pg, native):
+                    ocr_pages[pno] = (pg.rect.width, pg.rect.height)
+    except Exception:
+        parts, ocr_pages = [], {}
+
+    out = PdfText(pages=len(parts))
+    out.page_modes = ["text" if p.strip() else "none" for p in parts]
+
+    # Second pass: OCR only the image-only pages (if libraries are present)
+    if ocr_pages:
+        stats = {"hits": 0, "misses": 0, "errors": 0}
+        for pno, ocr_text in iter_ocr_pages(file_path, ocr_pages, stats=stats):
+            if len(ocr_text.strip()) > len(parts[pno].strip()):
+                parts[pno] = ocr_text
+                out.page_modes[pno] = "ocr"
+        out.ocr_cache_hits, out.ocr_cache_misses = stats["hits"], stats["misses"]
+        out.ocr_failed = stats["errors"]
+    out.ocr_used = "ocr" in out.page_modes
+    out.text = normalize_text("\n".join(parts))
+    return out
+
+
+def extract_pdf_text(file_path: Path) -> PdfText:
+    """
+    Extracts text with PyMuPDF page by page. Pages with little/no text layer
+    that carry an image (likely scanned) fall back to OCR (PyMuPDF render + Tesseract);
+    all other pages keep their native text. Output is normalized for parsers.
+    Unchanged files are served from the extraction cache. Results with a
+    failed OCR page are not cached, so they are retried on the next run.
+    """
+    t0 = time.perf_counter()
+    try:
+        file_hash = file_sha256(file_path)
     except Exception:
-        parts = []
+        file_hash = ""
+    cache = get_text_cache() if file_hash else None
+    key = TextCache.make_key(file_hash) if cache else ""
+
+    out = None
+    if cache:
+        try:
+            out = cache.get(key)
+        except Exception:
+            out = None
+    if out is None:
+        out = _extract_pdf_text_uncached(file_path)
+        if cache and not out.ocr_failed:
+            try:
+                cache.put(key, out)
+            except Exception:
+                pass
+    out.file_hash = file_hash
+    out.seconds = time.perf_counter() - t0
+    return out
+
 
-    raw = "\n".join(parts)
-    if _has_meaningful_text(raw):
-        return normalize_text(raw)
+def iter_pdf_pages(file_path: Path, modes: Optional[List[str]] = None,
+                   stats: Optional[Dict[str, int]] = None,
+                   vendor: Optional[str] = "fedex"):
+    """
+    Page-streaming counterpart of extract_pdf_text for files too large to
+    hold as one string. Pages are read STREAM_PAGE_WINDOW at a time, image-only
+    pages are OCR'd per window, and each page is normalized on its own before
+    it is yielded. Page modes are appended to `modes` and OCR cache hits/misses
+    counted into `stats`. Bypasses the extraction cache.
+    """
+    if modes is None:
+        modes = []
+    if stats is None:
+        stats = {}
+    stats.setdefault("hits", 0)
+    stats.setdefault("misses", 0)
+    stats.setdefault("errors", 0)
+    with fitz.open(str(file_path)) as doc:
+        for first in range(0, doc.page_count, STREAM_PAGE_WINDOW):
+            window = range(first, min(first + STREAM_PAGE_WINDOW, doc.page_count))
+            parts: Dict[int, str] = {}
+            ocr_pages: Dict[int, Tuple[float, float]] = {}
+            for pno in window:
+                pg = doc.load_page(pno)
+                parts[pno] = pg.get_text("text")
+                if _page_needs_ocr(pg, parts[pno]):
+                    ocr_pages[pno] = (pg.rect.width, pg.rect.height)
+            page_modes = {pno: "text" if parts[pno].strip() else "none"
+                          for pno in window}
+            for pno, ocr_text in iter_ocr_pages(file_path, ocr_pages, stats=stats):
+                if len(ocr_text.strip()) > len(parts[pno].strip()):
+                    parts[pno] = ocr_text
+                    page_modes[pno] = "ocr"
+            for pno in window:
+                modes.append(page_modes[pno])
+                yield normalize_text(parts.pop(pno), vendor)
 
-    # Fallback: OCR (only if libraries are present)
-    ocr_text = _ocr_pdf_to_text(file_path, dpi=300)
-    if _has_meaningful_text(ocr_text):
-        return normalize_text(ocr_text)
 
-    # If OCR not available or failed, return normalized (possibly empty) native text
-    return normalize_text(raw)
+def read_pdf_text(file_path: Path) -> str:
+    """Text-only wrapper around extract_pdf_text."""
+    return extract_pdf_text(file_path).text
 
 
 def soft_clean(s: Optional[str]) -> str:
@@ -220,28 +885,220 @@ def amount_to_float(s: str) -> Optional[float]:
         return None
 
 
-def map_primary_from_custref(cust: str, client_map: Optional[Dict[str, str]]) -> str:
+_FUZZY_TOKEN_RX = re.compile(r"[0-9a-z]+")
+
+
+def _fuzzy_reduce(s: str) -> str:
+    """Lowercase alphanumerics only; OCR noise in spacing/punctuation is ignored."""
+    return "".join(_FUZZY_TOKEN_RX.findall(s.lower()))
+
+
+def bounded_edit_distance(a: str, b: str, limit: int) -> int:
+    """Levenshtein distance, or limit + 1 as soon as it must exceed limit."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i]
+        lo = i
+        for j, cb in enumerate(b, 1):
+            d = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb))
+            cur.append(d)
+            if d < lo:
+                lo = d
+        if lo > limit:
+            return limit + 1
+        prev = cur
+    return prev[-1]
+
+
+class FuzzyClientIndex:
+    """
+    Edit-distance candidate index over client-map keys (pigeonhole split):
+    each reduced key is cut into max_edits + 1 pieces, and any string within
+    max_edits edits of the key must contain one of those pieces unchanged,
+    shifted by at most max_edits. A query probes only those (length, piece,
+    shift) slots, then verifies the few candidates with a bounded
+    Levenshtein check, so lookup cost does not grow with the map size.
+    """
+
+    def __init__(self, client_map: Dict[str, str], max_edits: int = FUZZY_MAX_EDITS,
+                 min_len: int = FUZZY_MIN_LEN):
+        self.max_edits = max(0, int(max_edits))
+        self.min_len = max(self.max_edits + 2, int(min_len))
+        self.keys: List[str] = []
+        self.values: List[str] = []
+        # (key length, piece number, piece) -> key ids
+        self.pieces: Dict[Tuple[int, int, str], List[int]] = {}
+        self.lengths = set()
+        seen = set()
+        for k, v in client_map.items():
+            rk = _fuzzy_reduce(k)
+            if len(rk) < self.min_len or rk in seen:
+                continue
+            seen.add(rk)
+            kid = len(self.keys)
+            self.keys.append(rk)
+            self.values.append(v)
+            self.lengths.add(len(rk))
+            for pno, (start, piece) in enumerate(self._split(rk)):
+                self.pieces.setdefault((len(rk), pno, piece), []).append(kid)
+
+    def _split(self, key: str) -> List[Tuple[int, str]]:
+        n, parts = len(key), self.max_edits + 1
+        bounds = [n * i // parts for i in range(parts + 1)]
+        return [(bounds[i], key[bounds[i]:bounds[i + 1]]) for i in range(parts)]
+
+    def _queries(self, ref: str) -> List[str]:
+        """Whole reference plus runs of 1-3 adjacent tokens (split tokens rejoin)."""
+        toks = _FUZZY_TOKEN_RX.findall(ref.lower())
+        out = {"".join(toks)}
+        for i in range(len(toks)):
+            for w in (1, 2, 3):
+                if i + w <= len(toks):
+                    out.add("".join(toks[i:i + w]))
+        floor = self.min_len - self.max_edits
+        return [q for q in out if len(q) >= floor]
+
+    def lookup(self, ref: str) -> Tuple[str, Optional[float]]:
+        """Returns (value, score) for the closest key, or ("", None)."""
+        if not self.keys:
+            return "", None
+        d = self.max_edits
+        best = None  # (distance, key id, query length)
+        for q in self._queries(ref):
+            nq = len(q)
+            cands = set()
+            for ln in range(nq - d, nq + d + 1):
+                if ln not in self.lengths:
+                    continue
+                n, parts = ln, d + 1
+                for pno in range(parts):
+                    start = n * pno // parts
+                    plen = n * (pno + 1) // parts - start
+                    for pos in range(max(0, start - d), min(nq - plen, start + d) + 1):
+                        ids = self.pieces.get((ln, pno, q[pos:pos + plen]))
+                        if ids:
+                            cands.update(ids)
+            for kid in cands:
+                dist = bounded_edit_distance(q, self.keys[kid], d)
+                if dist <= d and (best is None or (dist, kid) < best[:2]):
+                    best = (dist, kid, nq)
+        if best is None:
+            return "", None
+        dist, kid, nq = best
+        return self.values[kid], round(1.0 - dist / max(len(self.keys[kid]), nq), 3)
+
+
+class ClientMapIndex:
+    """
+    Prebuilt lookup for map_primary_from_custref. Same precedence as the
+    original linear scans over client_map:
+      1. exact key
+      2. case-insensitive equality (first key in map order wins)
+      3. case-insensitive substring: first key in map order found inside the
+         reference. Lowered keys are bucketed by length, so a reference is
+         probed with one hash lookup per (start, key length) pair instead of
+         a scan over every key.
+      4. (fuzzy=True only) closest key within FUZZY_MAX_EDITS edits, via
+         FuzzyClientIndex. Built eagerly so worker processes receive it
+         ready-made.
+    """
+
+    def __init__(self, client_map: Dict[str, str], fuzzy: bool = False):
+        self.exact: Dict[str, str] = dict(client_map)
+        self.folded: Dict[str, str] = {}
+        # lowered key -> map order of its first occurrence
+        self.order: Dict[str, int] = {}
+        self.values: List[str] = []
+        for i, (k, v) in enumerate(client_map.items()):
+            self.values.append(v)
+            lk = k.lower()
+            self.folded.setdefault(lk, v)
+            if lk:
+                self.order.setdefault(lk, i)
+        self.lengths = sorted({len(k) for k in self.order})
+        self.fuzzy = FuzzyClientIndex(client_map) if fuzzy else None
+
+    def __len__(self):
+        return len(self.exact)
+
+    def lookup(self, ref: str) -> str:
+        # 1. Exact match
+        v = self.exact.get(ref)
+        if v is not None:
+            return v
+        # 2. Case-insensitive match
+        lref = ref.lower()
+        v = self.folded.get(lref)
+        if v is not None:
+            return v
+        # 3. Substring match (case-insensitive), earliest key wins
+        best = None
+        order = self.order
+        n = len(lref)
+        for ln in self.lengths:
+            if ln > n:
+                break
+            for i in range(n - ln + 1):
+                j = order.get(lref[i:i + ln])
+                if j is not None and (best is None or j < best):
+                    best = j
+        return self.values[best] if best is not None else ""
+
+    def lookup_scored(self, ref: str) -> Tuple[str, Optional[float]]:
+        """
+        lookup() plus a match score: 1.0 for exact/substring hits, the
+        fuzzy similarity (0-1) for fuzzy hits, None when nothing matched.
+        """
+        v = self.lookup(ref)
+        if v:
+            return v, 1.0
+        if self.fuzzy is not None:
+            return self.fuzzy.lookup(ref)
+        return "", None
+
+
+_CLIENT_INDEX: Optional[Tuple[Dict[str, str], int, ClientMapIndex]] = None
+
+
+def client_index_for(client_map) -> ClientMapIndex:
+    """
+    Returns the index for a client map, building it once per map object.
+    Replace the dict (rather than mutating it in place) to force a rebuild.
+    """
+    global _CLIENT_INDEX
+    if isinstance(client_map, ClientMapIndex):
+        return client_map
+    cached = _CLIENT_INDEX
+    if cached is None or cached[0] is not client_map or cached[1] != len(client_map):
+        cached = (client_map, len(client_map), ClientMapIndex(client_map))
+        _CLIENT_INDEX = cached
+    return cached[2]
+
+
+def map_primary_from_custref(cust: str, client_map) -> str:
     """
     Looks up the PrimaryClientCode for any reference string (any length, any format).
     - Tries exact match (case-sensitive and insensitive)
     - Tries substring match (case-insensitive)
+    client_map may be a plain dict or a prebuilt ClientMapIndex.
     Returns "" if no match or map.
     """
     if not cust or not client_map:
         return ""
-    ref = soft_clean(str(cust))
-    # 1. Exact match
-    if ref in client_map:
-        return client_map[ref]
-    # 2. Case-insensitive match
-    for k, v in client_map.items():
-        if ref.lower() == k.lower():
-            return v
-    # 3. Substring match (case-insensitive)
-    for k, v in client_map.items():
-        if k and k.lower() in ref.lower():
-            return v
-    return ""
+    return client_index_for(client_map).lookup(soft_clean(str(cust)))
+
+
+def map_primary_with_score(cust: str, client_map) -> Tuple[str, str]:
+    """
+    Like map_primary_from_custref, but also returns the ClientMatchScore
+    column value ("1.00" exact, lower for fuzzy hits, "" when unmatched).
+    """
+    if not cust or not client_map:
+        return "", ""
+    code, score = client_index_for(client_map).lookup_scored(soft_clean(str(cust)))
+    return code, (f"{score:.2f}" if code and score is not None else "")
 
 # ======================================
 # FedEx Local Parser (page-break aware)
@@ -265,7 +1122,22 @@ class FedExParser:
         r"(continued\s+on\s+next\s+page\nTracking\s*ID[:\s]+\d+\s+continued)", re.I
     )
     CUST_REF_RX = re.compile(r"Cust\.\s*Ref\.?\s*:\s*(.+)", re.I)
-    SENDER_RX = re.compile(r"^\s*Sender\s+(.+)$", re.I | re.M)
+    # tried only at a "Sender" keyword that starts its line (after whitespace)
+    SENDER_RX = re.compile(r"Sender\s+(.+)$", re.I | re.M)
+    SENDER_PREFIX_RX = re.compile(r"^\s*Sender\s+", re.I)
+    SENDER_FIRM_RX = re.compile(r"\bGelfand\b", re.I)
+    SENDER_FIRM_TAIL_RX = re.compile(r"\s+Gelfand.*$", re.I)
+
+    # Shipment scanner tokens: block start ("Ship Date:", case sensitive) and
+    # the keywords the field patterns above start with (case-insensitive).
+    _SCAN_SHIP, _SCAN_REF, _SCAN_SENDER, _SCAN_TOTAL, _SCAN_TRACK, _SCAN_CONT = range(1, 7)
+    SCAN_KEYWORDS = ((_SCAN_REF, "cust."), (_SCAN_SENDER, "sender"), (_SCAN_TOTAL, "total"),
+                     (_SCAN_TRACK, "tracking"), (_SCAN_CONT, "continued"))
+    # Fallback tokenizer (group number = kind) for text where str.lower() and
+    # re.IGNORECASE disagree: non-ASCII letters that fold onto ASCII ones.
+    SHIP_SCAN_RX = re.compile(
+        r"(Ship Date:)|(?i:(Cust\.)|(Sender)|(Total)|(Tracking)|(continued))")
+    _FOLD_SPECIAL = ("\u0130", "\u0131", "\u017f", "\u212a")
 
     OTHER_CHARGES_RX = re.compile(
         r"Other Charges\s*USD\s*\$?\s*([\d,.]+)", re.I
@@ -278,26 +1150,117 @@ class FedExParser:
 
     def __init__(self, client_map: Optional[Dict[str, str]] = None):
         self.client_map = client_map or {}
+        self.client_index = client_index_for(self.client_map)
 
-    @staticmethod
-    def iter_ship_blocks(text: str, start_label="Ship Date:"):
-        starts = [m.start() for m in re.finditer(re.escape(start_label), text)]
-        if not starts:
-            return
-        starts.append(len(text))
-        for i in range(len(starts) - 1):
-            yield text[starts[i]:starts[i + 1]]
-
-    @staticmethod
-    def extract_sender_name(sender_line: str) -> str:
-        s = re.sub(r"^\s*Sender\s+", "", sender_line, flags=re.I).strip()
-        cut = re.split(r"\bGelfand\b", s, flags=re.I)[0].strip()
+    @classmethod
+    def extract_sender_name(cls, sender_line: str) -> str:
+        s = cls.SENDER_PREFIX_RX.sub("", sender_line, count=1).strip()
+        m = cls.SENDER_FIRM_RX.search(s)
+        cut = (s[:m.start()] if m else s).strip()
         if cut:
-            cut = re.sub(r"\s+Gelfand.*$", "", cut, flags=re.I).strip()
+            cut = cls.SENDER_FIRM_TAIL_RX.sub("", cut, count=1).strip()
             return cut[:80]
         tokens = s.split()
         return (" ".join(tokens[:3]))[:80] if tokens else s[:80]
 
+    @staticmethod
+    def _offsets(hay: str, word: str) -> List[int]:
+        out: List[int] = []
+        find, step = hay.find, len(word)
+        i = find(word)
+        while i >= 0:
+            out.append(i)
+            i = find(word, i + step)
+        return out
+
+    def scan_tokens(self, text: str) -> List[Tuple[int, int]]:
+        """
+        (offset, kind) of every block start and field keyword, in text order.
+        Not a single pass: each keyword is located with its own C-speed
+        str.find loop over one lowercased copy of the text, and the offsets
+        are then sorted. This is a superset of the offsets the re.I field
+        patterns can match at (they are verified there afterwards).
+        """
+        low = text.lower()
+        if len(low) != len(text) or any(c in text for c in self._FOLD_SPECIAL):
+            return [(m.start(), m.lastindex) for m in self.SHIP_SCAN_RX.finditer(text)]
+        tokens = [(i, self._SCAN_SHIP) for i in self._offsets(text, "Ship Date:")]
+        if not tokens:
+            return tokens
+        for kind, word in self.SCAN_KEYWORDS:
+            tokens.extend([(i, kind) for i in self._offsets(low, word)])
+        tokens.sort()
+        return tokens
+
+    def iter_shipments(self, text: str, starts: Optional[List[int]] = None):
+        """
+        Yields (cust_line, sender, total_amt, tracking, continued) for each
+        "Ship Date:" block, as a state machine over scan_tokens(): each field
+        pattern is only tried at its keyword (match with pos/endpos, no
+        per-block substrings). Per block: first Cust. Ref. / Sender /
+        Tracking ID, last Total, any "continued on next page" marker.
+        Text before the first block is ignored. starts, if given, receives
+        each yielded block's offset.
+        """
+        start = -1
+        refs: List[int] = []
+        senders: List[int] = []
+        total = tracking = None
+        continued = False
+        for pos, kind in self.scan_tokens(text):
+            if kind == self._SCAN_SHIP:
+                if start >= 0:
+                    if starts is not None:
+                        starts.append(start)
+                    yield self._ship_fields(text, start, pos, refs, senders, total, tracking, continued)
+                start = pos
+                refs, senders = [], []
+                total = tracking = None
+                continued = False
+            elif start < 0:
+                continue
+            elif kind == self._SCAN_REF:
+                refs.append(pos)
+            elif kind == self._SCAN_SENDER:
+                senders.append(pos)
+            elif kind == self._SCAN_TOTAL:
+                # these patterns cannot run into the next "Ship Date:", so no endpos
+                mt = self.TOTAL_RX.match(text, pos)
+                if mt:
+                    total = mt.group(1)
+            elif kind == self._SCAN_TRACK:
+                if tracking is None:
+                    mt = self.TRACK_RX.match(text, pos)
+                    if mt:
+                        tracking = mt.group(1).strip()
+            elif not continued:
+                continued = self.CONT_RX.match(text, pos) is not None
+        if start >= 0:
+            if starts is not None:
+                starts.append(start)
+            yield self._ship_fields(text, start, len(text), refs, senders, total, tracking, continued)
+
+    def _ship_fields(self, text: str, start: int, end: int, refs: List[int], senders: List[int],
+                     total: Optional[str], tracking: Optional[str], continued: bool):
+        # "(.+)" fields stop at the block end, as they would in a block slice
+        cust_line = None
+        for pos in refs:
+            mr = self.CUST_REF_RX.match(text, pos, end)
+            if mr:
+                cust_line = mr.group(1).strip()
+                break
+        sender = None
+        for pos in senders:
+            nl = text.rfind("\n", start, pos)
+            if nl < 0 or (nl + 1 < pos and not text[nl + 1:pos].isspace()):
+                continue   # not at the start of a line
+            ms = self.SENDER_RX.match(text, pos, end)
+            if ms:
+                sender = self.extract_sender_name(ms.group(0))
+                break
+        total_amt = amount_to_float(total) if total is not None else None
+        return cust_line, sender, total_amt, tracking, continued
+
     def parse_invoice_header(self, text: str) -> Tuple[Optional[str], Optional[str]]:
         m = self.INVOICE_HEADER_RX.search(
             text[:4000] if len(text) > 4000 else text)
@@ -320,55 +1283,24 @@ class FedExParser:
     def is_usd(self, text: str) -> bool:
         return bool(self.USD_RX.search(text))
 
-    def parse(self, pdf_text: str, file_name: str) -> List[Dict]:
-        """Returns a list of unified output rows for FedEx."""
-        inv_no, inv_date = self.parse_invoice_header(pdf_text)
-        currency = "USD" if self.is_usd(pdf_text) else ""
-        rows: List[Dict] = []
+    @staticmethod
+    def merge_shipments(shipments):
+        """
+        Merges page-break splits: a block without a total is held as pending
+        and completed by the next block of the same shipment. Yields
+        (sender, cust, total_amt) per shipment. Works on any
+        iterable of iter_shipments() tuples, so a streamed document carries
+        the pending state across pages.
+        """
         pending = None  # {"tracking","cust","sender"}
-
-        def emit_row(sender, cust, tracking, total_amt):
-            primary = map_primary_from_custref(
-                soft_clean(cust or ""), self.client_map)
-            rows.append({
-                "InvoiceFileName": file_name,
-                "Vendor": "FedEx",
-                "InvoiceID": inv_no or "",
-                "InvoiceDate": inv_date or "",
-                "DueDate": "",
-                "Description": "FedEx",
-                "Quantity": "",
-                "UnitPrice": "",
-                "Amount": total_amt if total_amt is not None else "",
-                "Currency": currency,
-                "FedEx_Sender": sender or "",
-                "FedEx_CustRef": soft_clean(cust or ""),
-                "PrimaryClientCode": primary or "",
-            })
-
-        # Walk all "Ship Date:" blocks and merge page-break splits
-        for blk in self.iter_ship_blocks(pdf_text, "Ship Date:"):
-            # Fields
-            mref = self.CUST_REF_RX.search(blk)
-            cust_line = mref.group(1).strip() if mref else None
-            msend = self.SENDER_RX.search(blk)
-            sender = self.extract_sender_name(
-                msend.group(0)) if msend else None
-            totals = list(self.TOTAL_RX.finditer(blk))
-            total_amt = amount_to_float(
-                totals[-1].group(1)) if totals else None
-            mtrk = self.TRACK_RX.search(blk)
-            tracking = mtrk.group(1).strip() if mtrk else None
-            continued = bool(self.CONT_RX.search(blk))
-
+        for cust_line, sender, total_amt, tracking, continued in shipments:
             if pending:
                 same = tracking and pending.get(
                     "tracking") and tracking == pending["tracking"]
                 if total_amt is not None and (same or continued or not tracking):
-                    emit_row(pending.get("sender") or sender,
-                             pending.get("cust") or cust_line,
-                             pending.get("tracking") or tracking,
-                             total_amt)
+                    yield (pending.get("sender") or sender,
+                           pending.get("cust") or cust_line,
+                           total_amt)
                     pending = None
                     continue
                 if same:
@@ -380,34 +1312,138 @@ class FedExParser:
                 pending = None  # different shipment began; drop incomplete pending
 
             if total_amt is not None:
-                emit_row(sender, cust_line, tracking, total_amt)
+                yield sender, cust_line, total_amt
             else:
                 if sender or cust_line or continued or tracking:
                     pending = {"tracking": tracking,
                                "cust": cust_line, "sender": sender}
 
+    def shipment_row(self, file_name: str, inv_no, inv_date, currency: str,
+                     sender, cust, total_amt) -> Dict:
+        primary, score = map_primary_with_score(
+            soft_clean(cust or ""), self.client_index)
+        return {
+            "InvoiceFileName": file_name,
+            "Vendor": "FedEx",
+            "InvoiceID": inv_no or "",
+            "InvoiceDate": inv_date or "",
+            "DueDate": "",
+            "Description": "FedEx",
+            "Quantity": "",
+            "UnitPrice": "",
+            "Amount": total_amt if total_amt is not None else "",
+            "Currency": currency,
+            "FedEx_Sender": sender or "",
+            "FedEx_CustRef": soft_clean(cust or ""),
+            "PrimaryClientCode": primary or "",
+            "ClientMatchScore": score,
+        }
+
+    @staticmethod
+    def other_charges_row(file_name: str, inv_no, inv_date, usd: bool, oc: float) -> Dict:
+        return {
+            "InvoiceFileName": file_name,
+            "Vendor": "FedEx",
+            "InvoiceID": inv_no or "",
+            "InvoiceDate": inv_date or "",
+            "DueDate": "",
+            "Description": "FedEx Other Charges",
+            "Quantity": "",
+            "UnitPrice": "",
+            "Amount": oc,
+            "Currency": "USD" if usd else "",
+            "FedEx_Sender": "",
+            "FedEx_CustRef": "",
+            "PrimaryClientCode": "",
+            "ClientMatchScore": "",
+        }
+
+    def parse(self, pdf_text: str, file_name: str) -> List[Dict]:
+        """Returns a list of unified output rows for FedEx."""
+        inv_no, inv_date = self.parse_invoice_header(pdf_text)
+        currency = "USD" if self.is_usd(pdf_text) else ""
+
+        # Walk all "Ship Date:" blocks and merge page-break splits
+        rows: List[Dict] = [
+            self.shipment_row(file_name, inv_no, inv_date, currency, *shp)
+            for shp in self.merge_shipments(self.iter_shipments(pdf_text))]
+
         # Add Other Charges as its own line
         oc = self.parse_other_charges(pdf_text)
         if oc is not None:
-            rows.append({
-                "InvoiceFileName": file_name,
-                "Vendor": "FedEx",
-                "InvoiceID": inv_no or "",
-                "InvoiceDate": inv_date or "",
-                "DueDate": "",
-                "Description": "FedEx Other Charges",
-                "Quantity": "",
-                "UnitPrice": "",
-                "Amount": oc,
-                "Currency": "USD" if currency == "USD" or "USD" in pdf_text else "",
-                "FedEx_Sender": "",
-                "FedEx_CustRef": "",
-                "PrimaryClientCode": "",
-            })
+            rows.append(self.other_charges_row(
+                file_name, inv_no, inv_date, currency == "USD" or "USD" in pdf_text, oc))
 
         # No deduplication: allow all rows, including duplicates
         return rows
 
+    def parse_pages(self, pages: Iterable[str], file_name: str):
+        """
+        Streaming parse() for documents too large to hold as one string.
+        pages: normalized page texts in order; rows are yielded as shipments
+        complete. Between pages only the current, unfinished "Ship Date:"
+        block is kept (it may continue on the next page), so memory follows
+        page size and the pending page-break merge sees the same blocks as
+        parse() on the joined text. Rows wait until the header (first 4000
+        characters) has been read.
+        """
+        doc = {"head": None, "usd": False, "usd_text": False,
+               "other": None, "late_fee": None, "tail": ""}
+
+        def shipments():
+            carry = None     # text of the unfinished block
+            last = None
+            for page in pages:
+                head = doc["head"]
+                if head is None:
+                    doc["head"] = page[:4000]
+                elif len(head) < 4000:
+                    doc["head"] = (head + "\n" + page)[:4000]
+                doc["usd"] = doc["usd"] or bool(self.USD_RX.search(page))
+                doc["usd_text"] = doc["usd_text"] or "USD" in page
+                if doc["other"] is None:
+                    # the label may start at the end of the previous page
+                    m = self.OTHER_CHARGES_RX.search(doc["tail"] + "\n" + page)
+                    if m:
+                        doc["other"] = m.group(1)
+                    elif doc["late_fee"] is None:
+                        m = self.LATE_FEE_RX.search(page)
+                        if m:
+                            doc["late_fee"] = m.group(2)
+                doc["tail"] = page[-256:]
+
+                buf = page if carry is None else carry + "\n" + page
+                starts: List[int] = []
+                blocks = list(self.iter_shipments(buf, starts))
+                if not blocks:
+                    continue
+                yield from blocks[:-1]
+                carry, last = buf[starts[-1]:], blocks[-1]
+            if last is not None:
+                yield last
+
+        header = None
+        waiting: List[Tuple] = []
+        for shp in self.merge_shipments(shipments()):
+            if header is None:
+                if doc["head"] is not None and len(doc["head"]) < 4000:
+                    waiting.append(shp)
+                    continue
+                header = self.parse_invoice_header(doc["head"] or "")
+            for w in waiting:
+                yield self.shipment_row(file_name, *header, "USD" if doc["usd"] else "", *w)
+            waiting = []
+            yield self.shipment_row(file_name, *header, "USD" if doc["usd"] else "", *shp)
+        if header is None:
+            header = self.parse_invoice_header(doc["head"] or "")
+        for w in waiting:
+            yield self.shipment_row(file_name, *header, "USD" if doc["usd"] else "", *w)
+
+        oc_text = doc["other"] if doc["other"] is not None else doc["late_fee"]
+        oc = amount_to_float(oc_text) if oc_text is not None else None
+        if oc is not None:
+            yield self.other_charges_row(file_name, *header, doc["usd"] or doc["usd_text"], oc)
+
 # ======================================
 # Lightning Messenger (local) Parser
 # ======================================
@@ -443,6 +1479,7 @@ class LightningParser:
 
     def __init__(self, client_map: Optional[Dict[str, str]] = None):
         self.client_map = client_map or {}
+        self.client_index = client_index_for(self.client_map)
 
     @staticmethod
     def _extract_header(text: str) -> Tuple[str, str]:
@@ -575,8 +1612,8 @@ class LightningParser:
             amt = totals_map.get(ref, None)
 
             # Map PrimaryClientCode from CustRef (ref)
-            primary = map_primary_from_custref(
-                soft_clean(ref or ""), self.client_map)
+            primary, score = map_primary_with_score(
+                soft_clean(ref or ""), self.client_index)
 
             rows.append({
                 "InvoiceFileName": file_name,
@@ -592,6 +1629,7 @@ class LightningParser:
                 "FedEx_Sender": caller,   # label: Caller/Sender
                 "FedEx_CustRef": ref,     # label: Reference
                 "PrimaryClientCode": primary or "",
+                "ClientMatchScore": score,
             })
 
         return rows
@@ -640,17 +1678,18 @@ def generic_invoice_parser(pdf_text: str, file_name: str) -> list:
         "Currency": "",
         "FedEx_Sender": "",
         "FedEx_CustRef": "",
-        "PrimaryClientCode": ""
+        "PrimaryClientCode": "",
+        "ClientMatchScore": ""
     }
 
-    for field, regexes in patterns.items():
+    for fname, regexes in patterns.items():
         for rx in regexes:
             m = re.search(rx, pdf_text, re.IGNORECASE)
             if m:
                 val = m.group(1).strip()
-                if field in ("InvoiceDate", "DueDate"):
+                if fname in ("InvoiceDate", "DueDate"):
                     val = normalize_date(val)
-                result[field] = val
+                result[fname] = val
                 break
 
     # ...and for DueDate extraction...
@@ -756,86 +1795,495 @@ def looks_like_lightning(pdf_text: str) -> bool:
     return brand_hits or structure_hits >= 2
 
 # ======================================
-# (Optional) helper if you want a single call
+# Single-call pipeline
 # ======================================
 
 
-def process_file_auto(file_path: Path,
-                      client_map: Optional[Dict[str, str]] = None) -> List[Dict]:
-    # Skip files that are too large
-    if file_path.stat().st_size / (1024 * 1024) > MAX_FILE_MB:
-        return []
-
-    txt = read_pdf_text(file_path)
-    lt = (txt or "").lower()
-
-    # Try FedEx parser first
-    if looks_like_fedex(txt):
-        fedex = FedExParser(client_map=client_map)
-        return fedex.parse(txt, file_path.name)
-
-    # Then try Lightning parser
-    if looks_like_lightning(txt):
-        lightning = LightningParser(client_map=client_map)
-        return lightning.parse(txt, file_path.name)
+@dataclass
+class FileResult:
+    """
+    Everything one pass over a file produces: vendor classification,
+    unified rows and extraction metadata.
+    """
+    file_name: str
+    vendor: str = ""          # "fedex" | "lightning" | "generic" ("" when skipped)
+    rows: List[Dict] = field(default_factory=list)
+    pages: int = 0
+    ocr_used: bool = False
+    page_modes: List[str] = field(default_factory=list)
+    file_hash: str = ""
+    text_cached: bool = False
+    ocr_cache_hits: int = 0
+    ocr_cache_misses: int = 0
+    ocr_failed: int = 0       # image-only pages whose OCR raised
+    skipped: bool = False     # larger than MAX_FILE_MB with STREAM_LARGE_FEDEX off
+    reused: bool = False      # rows taken from the folder manifest (file unchanged)
+    streamed: bool = False    # over MAX_FILE_MB, parsed page by page
+    timings: Dict[str, float] = field(default_factory=dict)
+
+
+def classify_vendor(pdf_text: str) -> str:
+    if looks_like_fedex(pdf_text):
+        return "fedex"
+    if looks_like_lightning(pdf_text):
+        return "lightning"
+    # Will still try both local parsers
+    return "generic"
+
+
+def parse_by_vendor(txt: str, vendor: str, file_name: str,
+                    client_map: Optional[Dict[str, str]] = None) -> List[Dict]:
+    # FedEx and Lightning go straight to their parsers
+    if vendor == "fedex":
+        return FedExParser(client_map=client_map).parse(txt, file_name)
+    if vendor == "lightning":
+        return LightningParser(client_map=client_map).parse(txt, file_name)
 
     # If not recognized, try both parsers and return whichever yields more rows
-    fedex_rows = FedExParser(client_map=client_map).parse(txt, file_path.name)
+    fedex_rows = FedExParser(client_map=client_map).parse(txt, file_name)
     lightning_rows = LightningParser(
-        client_map=client_map).parse(txt, file_path.name)
-    if len(lightning_rows) >= len(fedex_rows) and len(lightning_rows) > 0:
-        return lightning_rows
-    if len(fedex_rows) > 0:
-        return fedex_rows
-
-    # If still nothing, return an empty list (or optionally log for review)
+        client_map=client_map).parse(txt, file_name)
     if len(lightning_rows) >= len(fedex_rows) and len(lightning_rows) > 0:
         return lightning_rows
     if len(fedex_rows) > 0:
         return fedex_rows
 
     # If still nothing, return a generic row
-    return generic_invoice_parser(txt, file_path.name)
-
-    # ===== SECONDARY HEURISTICS: weak but indicative anchors =====
-    fedex_weak = any(a in lt for a in [
-        "tracking id", "transportation charge", "earned discount", "fuel surcharge"
-    ])
-    lightning_weak = any(a in lt for a in [
-        "billing reference 1", "order total:", "totals: billing reference 1"
-    ])
+    return generic_invoice_parser(txt, file_name)
 
-    # Bias toward local if weak signals present
-    if fedex_weak and not lightning_weak:
-        fedex = FedExParser(client_map=client_map)
-        return fedex.parse(txt, file_path.name)
 
-    if lightning_weak and not fedex_weak:
-        lightning = LightningParser()
-        return lightning.parse(txt, file_path.name)
+def process_file_auto(file_path: Path,
+                      client_map: Optional[Dict[str, str]] = None) -> FileResult:
+    """
+    Extracts the file once (OCR fallback included), classifies it and parses it.
+    Files over MAX_FILE_MB are streamed page by page when they are FedEx
+    invoices (see process_large_file).
+    """
+    res = FileResult(file_name=file_path.name)
+    size_mb = file_path.stat().st_size / (1024 * 1024)
+    if size_mb > MAX_FILE_MB:
+        if not STREAM_LARGE_FEDEX:
+            res.skipped = True
+            return res
+        return process_large_file(file_path, size_mb, client_map=client_map)
+
+    ext = extract_pdf_text(file_path)
+    res.pages, res.ocr_used = ext.pages, ext.ocr_used
+    res.page_modes = ext.page_modes
+    res.file_hash, res.text_cached = ext.file_hash, ext.cached
+    res.ocr_cache_hits, res.ocr_cache_misses = ext.ocr_cache_hits, ext.ocr_cache_misses
+    res.ocr_failed = ext.ocr_failed
+    res.timings["extract"] = ext.seconds
+
+    t0 = time.perf_counter()
+    res.vendor = classify_vendor(ext.text)
+    res.rows = parse_by_vendor(
+        ext.text, res.vendor, file_path.name, client_map=client_map)
+    res.timings["parse"] = time.perf_counter() - t0
+    return res
+
+
+def process_large_file(file_path: Path, size_mb: float,
+                       client_map: Optional[Dict[str, str]] = None) -> FileResult:
+    """
+    Over-limit path: the first STREAM_DETECT_PAGES pages decide the vendor,
+    then FedEx invoices are parsed while their pages are read, so memory
+    follows page size instead of file size. Other vendors are not streamed
+    and raise instead of being dropped silently.
+    """
+    res = FileResult(file_name=file_path.name, streamed=True)
+    t0 = time.perf_counter()
+    modes: List[str] = []
+    stats = {"hits": 0, "misses": 0, "errors": 0}
+    pages = iter_pdf_pages(file_path, modes, stats)
+    head = list(itertools.islice(pages, STREAM_DETECT_PAGES))
+    if not looks_like_fedex("\n".join(head)):
+        pages.close()
+        raise ValueError(f"{size_mb:.1f} MB is over MAX_FILE_MB ({MAX_FILE_MB}); "
+                         "only FedEx invoices are parsed page by page above the limit")
+    res.vendor = "fedex"
+    res.rows = list(FedExParser(client_map=client_map).parse_pages(
+        itertools.chain(head, pages), file_path.name))
+    res.pages, res.page_modes = len(modes), modes
+    res.ocr_used = "ocr" in modes
+    res.ocr_cache_hits, res.ocr_cache_misses = stats["hits"], stats["misses"]
+    res.ocr_failed = stats["errors"]
+    res.file_hash = file_sha256(file_path)
+    # extraction and parsing are interleaved; one timing covers both
+    res.timings["parse"] = time.perf_counter() - t0
+    return res
 
 
 # ======================================
-# Unified UI
+# Parallel analysis (process pool)
 # ======================================
-COLUMNS_UNIFIED = (
-    "InvoiceFileName", "Vendor", "InvoiceID", "InvoiceDate", "DueDate",
-    "Description", "Quantity", "UnitPrice", "Amount", "Currency",
-    "FedEx_Sender", "FedEx_CustRef", "PrimaryClientCode"
-)
+_WORKER_CLIENT_MAP: Optional[Dict[str, str]] = None
 
-# Display labels for selected columns (UI headers + export header row)
-COLUMN_LABELS = {
-    "FedEx_Sender": "Caller/Sender",
-    "FedEx_CustRef": "Reference",
-    # Leave others as-is
-}
 
+def _init_analyze_worker(client_map: Optional[Dict[str, str]]):
+    """
+    Pool initializer: ships the client map to each worker once
+    instead of pickling it with every file.
+    """
+    global _WORKER_CLIENT_MAP
+    _WORKER_CLIENT_MAP = client_map
 
-def display_label(col_key: str) -> str:
+
+def _analyze_worker(file_path: Path) -> Tuple[Optional[FileResult], Optional[str]]:
+    try:
+        return process_file_auto(file_path, client_map=_WORKER_CLIENT_MAP), None
+    except Exception as ex:
+        return None, f"{file_path.name}: {ex}"
+
+
+def iter_analyze(files: List[Path],
+                 client_map: Optional[Dict[str, str]] = None,
+                 workers: int = 1):
+    """
+    Yields (file_path, FileResult, error) for each file, in input order.
+    workers > 1 fans the files out to a process pool; results are still
+    yielded in the same order as the serial path.
+    """
+    if workers <= 1 or len(files) <= 1:
+        for f in files:
+            try:
+                yield f, process_file_auto(f, client_map=client_map), None
+            except Exception as ex:
+                yield f, None, f"{f.name}: {ex}"
+        return
+
+    ex = ProcessPoolExecutor(max_workers=min(workers, len(files)),
+                             initializer=_init_analyze_worker,
+                             initargs=(client_map,))
+    try:
+        futures = [ex.submit(_analyze_worker, f) for f in files]
+        for f, fut in zip(files, futures):
+            try:
+                res, err = fut.result()
+            except Exception as e:  # e.g. BrokenProcessPool
+                res, err = None, f"{f.name}: {e}"
+            yield f, res, err
+    finally:
+        ex.shutdown(wait=True, cancel_futures=True)
+
+
+# ======================================
+# Incremental re-analysis (per-folder manifest)
+# ======================================
+def parser_signature() -> str:
+    """Everything besides file content and client map that changes a file's rows."""
+    return f"parser={PARSER_VERSION};{_extractor_settings()}"
+
+
+_MAP_FINGERPRINT: Optional[Tuple[object, int, str]] = None
+
+
+def client_map_fingerprint(client_map) -> str:
+    """Short hash of a client map (plain dict or ClientMapIndex), computed once per map object."""
+    global _MAP_FINGERPRINT
+    if not client_map:
+        return ""
+    cached = _MAP_FINGERPRINT
+    if cached is None or cached[0] is not client_map or cached[1] != len(client_map):
+        if isinstance(client_map, ClientMapIndex):
+            items, fuzzy = client_map.exact, client_map.fuzzy is not None
+        else:
+            items, fuzzy = client_map, False
+        h = hashlib.sha256(f"fuzzy={int(fuzzy)},{FUZZY_MAX_EDITS},{FUZZY_MIN_LEN}\n".encode())
+        for k, v in items.items():
+            h.update(f"{k}\x1f{v}\x1e".encode())
+        cached = (client_map, len(client_map), h.hexdigest()[:16])
+        _MAP_FINGERPRINT = cached
+    return cached[2]
+
+
+def remap_rows(rows: List[Dict], client_map):
+    """Re-derives PrimaryClientCode / ClientMatchScore from each row's reference."""
+    for r in rows:
+        r["PrimaryClientCode"], r["ClientMatchScore"] = map_primary_with_score(
+            r.get("FedEx_CustRef") or "", client_map)
+
+
+class FolderManifest:
+    """
+    What each PDF in one folder produced last time: size, mtime, content
+    hash, parser signature, client-map fingerprint and the emitted rows.
+    A file whose size and mtime (or, failing that, content hash) and parser
+    signature match is not extracted again; its stored rows are reused and
+    only re-mapped when the client map changed.
+
+    Lives in the folder as MANIFEST_NAME, or under CACHE_DIR/manifests when
+    the folder is read-only. Saved atomically (temp file + replace).
+    """
+    VERSION = 1
+
+    def __init__(self, folder: Path):
+        self.folder = folder
+        self.columns = list(COLUMNS_UNIFIED)
+        self.entries: Dict[str, Dict] = {}
+        self.watched_folder = False   # watch mode has run here (see FolderWatcher.restore)
+        self.dirty = False
+        key = hashlib.sha256(str(folder.resolve()).lower().encode()).hexdigest()[:24]
+        self._fallback = CACHE_DIR / "manifests" / f"{key}.json"
+        self.path = folder / MANIFEST_NAME
+        for cand in (self.path, self._fallback):
+            try:
+                data = json.loads(cand.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                continue
+            self.path = cand
+            if data.get("version") == self.VERSION and data.get("columns") == self.columns:
+                self.entries = data.get("files", {})
+                self.watched_folder = bool(data.get("watch"))
+            break
+
+    def lookup(self, f: Path, st: os.stat_result, signature: str, map_fp: str,
+               client_map) -> Optional[FileResult]:
+        e = self.entries.get(f.name)
+        if e is None or e.get("parser") != signature or e.get("size") != st.st_size:
+            return None
+        if e.get("mtime_ns") != st.st_mtime_ns:
+            # touched or copied: same bytes still count as unchanged
+            try:
+                if not e.get("hash") or file_sha256(f) != e["hash"]:
+                    return None
+            except OSError:
+                return None
+            e["mtime_ns"] = st.st_mtime_ns
+            self.dirty = True
+        cols = self.columns
+        res = FileResult(file_name=f.name, vendor=e.get("vendor", ""), pages=e.get("pages", 0),
+                         ocr_used=e.get("ocr_used", False), file_hash=e.get("hash", ""),
+                         skipped=e.get("skipped", False), reused=True)
+        res.rows = [dict(zip(cols, vals)) for vals in e.get("rows", [])]
+        if e.get("map") != map_fp:
+            remap_rows(res.rows, client_map)
+            e["rows"] = [[r.get(c, "") for c in cols] for r in res.rows]
+            e["map"] = map_fp
+            self.dirty = True
+        return res
+
+    def record(self, f: Path, sig: Tuple[int, int], res: FileResult, signature: str, map_fp: str):
+        """
+        sig is (size, mtime_ns) taken before the file was read, so a later
+        write is seen as a change.
+        """
+        cols = self.columns
+        prev = self.entries.get(f.name) or {}
+        self.entries[f.name] = {
+            "size": sig[0], "mtime_ns": sig[1], "hash": res.file_hash,
+            "parser": signature, "map": map_fp, "vendor": res.vendor,
+            "pages": res.pages, "ocr_used": res.ocr_used, "skipped": res.skipped,
+            "rows": [[r.get(c, "") for c in cols] for r in res.rows],
+        }
+        if "watch" in prev:
+            self.entries[f.name]["watch"] = prev["watch"]
+        self.dirty = True
+
+    def watched(self, name: str) -> Optional[Tuple[int, int]]:
+        """(size, mtime_ns) of the file that watch mode last handled, if any."""
+        e = self.entries.get(name)
+        return tuple(e["watch"]) if e and e.get("watch") else None
+
+    def mark_watched(self, name: str, sig: Tuple[int, int]):
+        """Watch mode is done with this version of the file (rows written, failure reported or skipped)."""
+        self.entries.setdefault(name, {})["watch"] = list(sig)
+        self.dirty = True
+
+    def save(self):
+        try:
+            present = {e.name for e in os.scandir(self.folder)}
+        except OSError:
+            present = None
+        if present is not None and any(k not in present for k in self.entries):
+            self.entries = {k: v for k, v in self.entries.items() if k in present}
+            self.dirty = True   # files deleted since the last run
+        if not self.dirty:
+            return
+        doc = {"version": self.VERSION, "app": APP_VERSION, "columns": self.columns,
+               "files": self.entries}
+        if self.watched_folder:
+            doc["watch"] = True
+        data = json.dumps(doc, ensure_ascii=False, separators=(",", ":"))
+        for target in (self.path, self._fallback):
+            try:
+                target.parent.mkdir(parents=True, exist_ok=True)
+                tmp = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+                tmp.write_text(data, encoding="utf-8")
+                os.replace(tmp, target)
+            except OSError:
+                continue
+            self.path, self.dirty = target, False
+            return
+
+
+def iter_analyze_incremental(files: List[Path],
+                             client_map: Optional[Dict[str, str]] = None,
+                             workers: int = 1):
+    """
+    iter_analyze backed by per-folder manifests: unchanged files yield their
+    stored rows (FileResult.reused) and only new or changed files, or files
+    analyzed under another parser signature, are extracted and parsed.
+    Same (file_path, FileResult, error) tuples, same order. Manifests are
+    saved when the generator finishes or is closed (e.g. on cancel).
+    Results with a failed OCR page are not recorded.
+    """
+    signature = parser_signature()
+    map_fp = client_map_fingerprint(client_map)
+    manifests: Dict[Path, FolderManifest] = {}
+    plan: List[Tuple[Path, Optional[os.stat_result], Optional[FileResult]]] = []
+    todo: List[Path] = []
+    for f in files:
+        m = manifests.get(f.parent)
+        if m is None:
+            m = manifests[f.parent] = FolderManifest(f.parent)
+        try:
+            st = f.stat()
+        except OSError:
+            st = None
+        res = m.lookup(f, st, signature, map_fp, client_map) if st else None
+        plan.append((f, st, res))
+        if res is None:
+            todo.append(f)
+
+    gen = iter_analyze(todo, client_map=client_map, workers=workers)
+    try:
+        for f, st, res in plan:
+            if res is not None:
+                yield f, res, None
+                continue
+            f, res, err = next(gen)
+            # a failed OCR page is retried next run instead of being remembered
+            if not err and st is not None and not res.ocr_failed:
+                manifests[f.parent].record(f, (st.st_size, st.st_mtime_ns), res, signature, map_fp)
+            yield f, res, err
+    finally:
+        gen.close()
+        for m in manifests.values():
+            m.save()
+
+
+@dataclass
+class AnalyzeRun:
+    """
+    State shared between a background analysis thread and the UI poller.
+    The thread touches queue/cancel, and also sink/sink_error: it writes
+    each file's rows to the sink, closes it and records any failure. The
+    UI reads those two only after the None sentinel, once the thread is
+    done with them; everything else is UI-thread only.
+    """
+    total_files: int = 0
+    queue: "queue.Queue" = field(default_factory=queue.Queue)
+    cancel: threading.Event = field(default_factory=threading.Event)
+    thread: Optional[threading.Thread] = None
+    pending: deque = field(default_factory=deque)   # rows not yet in the table
+    finished: bool = False
+    view_stale: bool = False    # rows arrived while a filter/sort view is active
+    last_progress: float = 0.0
+    done: int = 0
+    total_rows: int = 0
+    fedex_count: int = 0
+    lightning_count: int = 0
+    generic_count: int = 0      # not detected as FedEx or Lightning
+    skipped_count: int = 0      # over MAX_FILE_MB
+    streamed_count: int = 0     # over MAX_FILE_MB, FedEx parsed page by page
+    cached_count: int = 0       # served from the extraction cache
+    reused_count: int = 0       # unchanged since the last run (folder manifest)
+    ocr_hits: int = 0           # page OCR cache
+    ocr_misses: int = 0
+    errors: List[str] = field(default_factory=list)
+    failed_files: List[str] = field(default_factory=list)
+    file_hashes: Dict[str, str] = field(default_factory=dict)   # file name -> sha256 (delta keys)
+    keep_rows: bool = True      # False: rows go to a sink only (flat memory)
+    sink: Optional["RowSink"] = None
+    sink_error: str = ""
+
+    def add(self, f: Path, res: Optional[FileResult], err: Optional[str]):
+        self.done += 1
+        if err:
+            self.errors.append(err)
+            self.failed_files.append(f.name)
+        elif res.skipped:
+            self.skipped_count += 1
+        else:
+            if res.vendor == "fedex":
+                self.fedex_count += 1
+            elif res.vendor == "lightning":
+                self.lightning_count += 1
+            else:
+                self.generic_count += 1
+            if res.text_cached:
+                self.cached_count += 1
+            if res.reused:
+                self.reused_count += 1
+            if res.streamed:
+                self.streamed_count += 1
+            self.ocr_hits += res.ocr_cache_hits
+            self.ocr_misses += res.ocr_cache_misses
+            if self.keep_rows:
+                self.pending.extend(res.rows)
+                self.file_hashes[res.file_name] = res.file_hash
+            self.total_rows += len(res.rows)
+
+
+def _analyze_in_background(files: List[Path], client_map, workers: int, run: AnalyzeRun,
+                           incremental: bool = MANIFEST_ENABLED):
+    """Thread target: feeds (file, result, error) tuples to run.queue, then None."""
+    analyze = iter_analyze_incremental if incremental else iter_analyze
+    gen = analyze(files, client_map=client_map, workers=workers)
+    try:
+        for item in gen:
+            res, err = item[1], item[2]
+            if run.sink is not None and not run.sink_error and not err and res.rows:
+                try:
+                    run.sink.write_result(res)
+                except Exception as ex:
+                    run.sink_error = str(ex)
+            run.queue.put(item)
+            if run.cancel.is_set():
+                break
+    except Exception as ex:
+        run.queue.put((Path("?"), None, f"analysis stopped: {ex}"))
+    finally:
+        gen.close()
+        if run.sink is not None:
+            try:
+                run.sink.close()
+            except Exception as ex:
+                run.sink_error = str(ex)
+        run.queue.put(None)
+
+
+# ======================================
+# Unified UI
+# ======================================
+COLUMNS_UNIFIED = (
+    "InvoiceFileName", "Vendor", "InvoiceID", "InvoiceDate", "DueDate",
+    "Description", "Quantity", "UnitPrice", "Amount", "Currency",
+    "FedEx_Sender", "FedEx_CustRef", "PrimaryClientCode", "ClientMatchScore"
+)
+
+# Display labels for selected columns (UI headers + export header row)
+COLUMN_LABELS = {
+    "FedEx_Sender": "Caller/Sender",
+    "FedEx_CustRef": "Reference",
+    "ClientMatchScore": "Client Match",
+    # Leave others as-is
+}
+
+
+def display_label(col_key: str) -> str:
     return COLUMN_LABELS.get(col_key, col_key)
 
 
+def default_column_width(col_key: str) -> int:
+    if col_key in ("Description", "InvoiceFileName"):
+        return 200
+    if col_key in ("FedEx_Sender", "FedEx_CustRef", "PrimaryClientCode"):
+        return 180
+    return 140
+
+
 def instructions_text() -> str:
     return (
         "How to use this tool\n"
@@ -843,21 +2291,460 @@ def instructions_text() -> str:
         " • FedEx & Lightning Messenger Express invoices are parsed locally.\n"
         " • All other vendors use generic python scripts.\n"
         "2) (Optional) Load a Client Code Map (CSV) to populate PrimaryClientCode for FedEx.\n"
+        "   Tick Fuzzy match to also map OCR-noisy references (one wrong character); "
+        "Client Match shows the score.\n"
         "3) Click Analyze again. The table will populate with rows.\n"
-        "4) Export to Excel or CSV using the buttons above the table.\n\n"
+        "4) Export to Excel or CSV using the buttons above the table. Export Changes writes only\n"
+        "   the rows added, modified or removed since the previous Export Changes (for ERP import).\n"
+        "5) Filter / Search narrows the table: type words to search every column, or\n"
+        "   Column=value, Amount>100, InvoiceDate<=2025-01-31 (terms combine). "
+        "Click a column header to sort.\n\n"
         "Notes\n"
         "• FedEx rows set Description=\"FedEx\" and include Caller/Sender, Reference, PrimaryClientCode.\n"
         "• Lightning rows set Description=\"Lightning Messenger\" and include Caller/Sender and Reference; "
         "Date is stored in InvoiceDate and Amount is the Reference Total.\n"
-        "• Mixed folders are supported; the app routes each invoice automatically."
+        "• Mixed folders are supported; the app routes each invoice automatically.\n"
+        "• Re-analyzing a folder only reads new or changed PDFs; the rest come from the folder's\n"
+        f"  {MANIFEST_NAME} (delete it to force a full re-run).\n"
+        f"• FedEx PDFs over {MAX_FILE_MB} MB are read page by page; other PDFs over that size\n"
+        "  are reported as errors."
     )
 
 
+# ---- Results query layer (filter / sort / search over AppBase.rows)
+NUMERIC_COLUMNS = ("Quantity", "UnitPrice", "Amount", "ClientMatchScore")
+DATE_COLUMNS = ("InvoiceDate", "DueDate")
+_QUERY_TOKEN_RX = re.compile(r"[0-9a-z]+")
+_QUERY_TERM_RX = re.compile(r"^([A-Za-z_/]+)\s*(>=|<=|=|>|<)\s*(.*)$")
+
+
+_BLANK_NUM = float("inf")
+_BLANK_TEXT = "\U0010ffff"
+
+
+def column_sort_key(col_key: str, value):
+    """Scalar sort key for one cell; blanks sort after every real value."""
+    if col_key in NUMERIC_COLUMNS:
+        f = value if isinstance(value, (int, float)) else amount_to_float(value)
+        return float(f) if f is not None else _BLANK_NUM
+    s = str(value or "").strip()
+    if not s:
+        return _BLANK_TEXT
+    if col_key in DATE_COLUMNS:
+        s = try_parse_date(s)
+    return s.lower()
+
+
+class ResultIndex:
+    """
+    Per-column indexes over a list of row dicts, updated incrementally:
+      - hash:   column -> lowered cell value -> row ids (equality filters)
+      - sorted: column -> row ids ordered by column_sort_key, built on first
+                use; rows added later are folded in with one sort of two
+                presorted runs (ordering and > / < ranges via bisect)
+      - tokens: token -> row ids over the text columns, plus a sorted
+                vocabulary for prefix (search-as-you-type) lookups
+
+    Query terms are space separated (quotes allowed):
+      PrimaryClientCode=ABC12   Amount>=100   Reference="x y"   smith
+    Columns match by key or display label, case-insensitively. Anything
+    that is not Column<op>value is a free-text prefix search. Terms AND.
+    """
+
+    def __init__(self, rows: List[Dict], columns=COLUMNS_UNIFIED):
+        self.rows = rows
+        self.columns = tuple(columns)
+        self.text_columns = tuple(c for c in self.columns if c not in NUMERIC_COLUMNS)
+        self.n = 0   # rows indexed so far
+        self.hash: Dict[str, Dict[str, List[int]]] = {c: {} for c in self.columns}
+        self.tokens: Dict[str, List[int]] = {}
+        self._vocab: List[str] = []
+        self._vocab_tail: List[str] = []
+        # column -> per-row keys, ids in key order, keys in that order
+        self._keys: Dict[str, List] = {}
+        self._order: Dict[str, List[int]] = {}
+        self._order_keys: Dict[str, List] = {}
+        self._names: Dict[str, str] = {}
+        for c in self.columns:
+            self._names[c.lower()] = c
+            self._names[display_label(c).lower().replace(" ", "")] = c
+
+    def update(self) -> int:
+        """Indexes rows appended since the last call; returns how many."""
+        rows, start = self.rows, self.n
+        new = rows[start:]
+        text_columns = set(self.text_columns)
+        fresh: Dict[str, List[int]] = {}   # text value -> new row ids holding it
+        for c in self.columns:
+            h = self.hash[c]
+            for i, r in enumerate(new, start):
+                v = r.get(c, "")
+                lv = str(v).strip().lower() if v not in ("", None) else ""
+                post = h.get(lv)
+                if post is None:
+                    h[lv] = [i]
+                else:
+                    post.append(i)
+                if lv and c in text_columns:
+                    ids = fresh.get(lv)
+                    if ids is None:
+                        fresh[lv] = [i]
+                    else:
+                        ids.append(i)
+            keys = self._keys.get(c)
+            if keys is not None:
+                keys.extend(column_sort_key(c, r.get(c, "")) for r in new)
+        tokens, findall = self.tokens, _QUERY_TOKEN_RX.findall
+        # one distinct new cell value -> one token pass, however many rows share it
+        for lv, ids in fresh.items():
+            for t in set(findall(lv)):
+                post = tokens.get(t)
+                if post is None:
+                    tokens[t] = list(ids)
+                    self._vocab_tail.append(t)
+                else:
+                    post.extend(ids)
+        self.n = len(rows)
+        return self.n - start
+
+    def sorted_for(self, col: str) -> Tuple[List[int], List]:
+        """(row ids in key order, their keys) for col, folding in new rows."""
+        keys = self._keys.get(col)
+        if keys is None:
+            keys = [column_sort_key(col, r.get(col, "")) for r in self.rows[:self.n]]
+            self._keys[col] = keys
+            self._order[col] = []
+        order = self._order[col]
+        if len(order) < len(keys):
+            tail = sorted(range(len(order), len(keys)), key=keys.__getitem__)
+            order.extend(tail)
+            order.sort(key=keys.__getitem__)   # two presorted runs: a linear merge
+            self._order_keys[col] = [keys[i] for i in order]
+        return order, self._order_keys.get(col, [])
+
+    def vocab(self) -> List[str]:
+        if self._vocab_tail:
+            self._vocab.extend(self._vocab_tail)
+            self._vocab.sort()
+            self._vocab_tail.clear()
+        return self._vocab
+
+    def resolve_column(self, name: str) -> Optional[str]:
+        return self._names.get(name.strip().lower().replace(" ", ""))
+
+    # ---- term evaluation (each returns a set of row ids)
+    def _match_text(self, text: str) -> set:
+        out = None
+        vocab = self.vocab()
+        for tok in _QUERY_TOKEN_RX.findall(text.lower()):
+            hits = set()
+            j = bisect.bisect_left(vocab, tok)
+            while j < len(vocab) and vocab[j].startswith(tok):
+                hits.update(self.tokens[vocab[j]])
+                j += 1
+            out = hits if out is None else out & hits
+            if not out:
+                return set()
+        return out if out is not None else set(range(self.n))
+
+    def _match_column(self, col: str, op: str, value: str) -> set:
+        value = value.strip()
+        if op == "=" and col not in NUMERIC_COLUMNS and col not in DATE_COLUMNS:
+            return set(self.hash[col].get(value.lower(), ()))
+        key = column_sort_key(col, value)
+        if key in (_BLANK_NUM, _BLANK_TEXT):   # "Col=" matches blanks; ranges match nothing
+            return set(self.hash[col].get("", ())) if op == "=" else set()
+        order, okeys = self.sorted_for(col)
+        blank = _BLANK_NUM if col in NUMERIC_COLUMNS else _BLANK_TEXT
+        end = bisect.bisect_left(okeys, blank)
+        if op == "=":
+            lo, hi = bisect.bisect_left(okeys, key), bisect.bisect_right(okeys, key)
+        elif op == ">":
+            lo, hi = bisect.bisect_right(okeys, key), end
+        elif op == ">=":
+            lo, hi = bisect.bisect_left(okeys, key), end
+        elif op == "<":
+            lo, hi = 0, bisect.bisect_left(okeys, key)
+        else:   # "<="
+            lo, hi = 0, bisect.bisect_right(okeys, key)
+        return set(order[lo:hi])
+
+    def query(self, text: str = "", sort_col: Optional[str] = None,
+              descending: bool = False, start: int = 0) -> List[int]:
+        """
+        Row ids matching text, ordered by sort_col (else row order).
+        start > 0 restricts matches to rows >= start (incremental views).
+        """
+        self.update()
+        try:
+            terms = shlex.split(text or "")
+        except ValueError:
+            terms = (text or "").split()
+        ids = None
+        for term in terms:
+            m = _QUERY_TERM_RX.match(term)
+            col = self.resolve_column(m.group(1)) if m else None
+            hits = (self._match_column(col, m.group(2), m.group(3)) if col
+                    else self._match_text(term))
+            ids = hits if ids is None else ids & hits
+            if not ids:
+                return []
+        if sort_col:
+            order, okeys = self.sorted_for(sort_col)
+            if descending:
+                # blanks stay last in both directions
+                blank = _BLANK_NUM if sort_col in NUMERIC_COLUMNS else _BLANK_TEXT
+                end = bisect.bisect_left(okeys, blank)
+                order = order[:end][::-1] + order[end:]
+            if ids is None and not start:
+                out = list(order)
+            elif ids is None:
+                out = [i for i in order if i >= start]
+            else:
+                out = [i for i in order if i in ids and i >= start]
+            return out
+        if ids is None:
+            return list(range(start, self.n))
+        return sorted(i for i in ids if i >= start)
+
+
+def load_splash_image(url: str, max_size=(560, 300)):
+    """PIL image for the splash (local file or URL), or None. Blocking."""
+    if not PIL_OK:
+        return None
+    try:
+        # If the path is a local file, open directly
+        if url.lower().endswith('.png') or url.lower().endswith('.jpg') or url.lower().endswith('.jpeg'):
+            img = Image.open(url).convert("RGBA")
+            img.thumbnail(max_size, Image.LANCZOS)
+            return img
+        # Otherwise, treat as URL
+        import requests  # pip install requests
+        r = requests.get(url, timeout=8)
+        r.raise_for_status()
+        img = Image.open(BytesIO(r.content)).convert("RGBA")
+        img.thumbnail(max_size, Image.LANCZOS)
+        return img
+    except Exception:
+        return None
+
+
+# ---- Client map + export helpers (shared by the GUI and the CLI)
+def load_client_map_csv(csv_path: Path) -> Tuple[Dict[str, str], int, int]:
+    """
+    Reads CSV and builds a mapping dict. Prefers columns named
+    'CustRef' and 'PrimaryClientCode'; otherwise uses the first two columns.
+    Returns (client_map, rows_read, pairs_mapped).
+    """
+    client_map: Dict[str, str] = {}
+    read = mapped = 0
+    with Path(csv_path).open("r", newline="", encoding="utf-8") as f:
+        rdr = csv.DictReader(f)
+        if not rdr.fieldnames or len(rdr.fieldnames) < 2:
+            raise ValueError("CSV must have at least two columns.")
+        cols = {k.lower(): k for k in (rdr.fieldnames or [])}
+        key_col = cols.get("custref") or list(cols.values())[0]
+        val_col = cols.get("primaryclientcode") or list(cols.values())[1]
+        for row in rdr:
+            read += 1
+            k = soft_clean(row.get(key_col, ""))
+            v = soft_clean(row.get(val_col, ""))
+            if k and v:
+                client_map[k] = v
+                mapped += 1
+    return client_map, read, mapped
+
+
+def write_rows_csv(path: Path, rows: List[Dict], columns=COLUMNS_UNIFIED):
+    with Path(path).open("w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        # write display labels
+        w.writerow([display_label(c) for c in columns])
+        for r in rows:
+            w.writerow([r.get(c, "") for c in columns])
+
+
+def write_rows_xlsx(path: Path, rows: List[Dict], columns=COLUMNS_UNIFIED,
+                    vendor_sheets: bool = XLSX_VENDOR_SHEETS):
+    """One-pass write-only export (see XlsxSink). Raises ImportError without openpyxl."""
+    with XlsxSink(path, columns, vendor_sheets=vendor_sheets) as sink:
+        sink.write_rows(rows)
+
+
+class VirtualTable:
+    """
+    Results table that only materializes the visible window of rows.
+
+    A ttk.Treeview holds a fixed pool of items (one per visible line) that
+    are re-filled from the in-memory rows whenever the view moves, and a
+    separate scrollbar pages through the data by offset. Opening, scrolling
+    and clearing cost the same for 100 rows or 100k rows; the Tk item count
+    only depends on the window height.
+
+    source() must return the current list of row dicts. It is re-read on
+    every refresh, so swapping the list clears the table in O(1).
+    """
+
+    def __init__(self, master, columns, source, col_width=None, on_heading=None):
+        self.columns = tuple(columns)
+        self.source = source
+        self.offset = 0
+        self.items: List[str] = []
+        self.shown = 0          # pool items currently attached
+        self._pending = False   # refresh scheduled via after_idle
+        self.tree = ttk.Treeview(master, columns=self.columns, show="headings",
+                                 selectmode="browse")
+        for c in self.columns:
+            self.tree.heading(c, text=display_label(c),
+                              command=(lambda c=c: on_heading(c)) if on_heading else "")
+            self.tree.column(c, width=(col_width(c) if col_width else 140), anchor="w")
+        self.yscroll = ttk.Scrollbar(master, orient="vertical", command=self.yview)
+        self.tree.grid(row=0, column=0, sticky="nsew")
+        self.yscroll.grid(row=0, column=1, sticky="ns")
+        self.tree.bind("<Configure>", lambda e: self.relayout())
+        self.tree.bind("<MouseWheel>", self._on_wheel)
+        self.tree.bind("<Button-4>", lambda e: self.scroll(-3))
+        self.tree.bind("<Button-5>", lambda e: self.scroll(3))
+        self.tree.bind("<Up>", lambda e: self.scroll(-1))
+        self.tree.bind("<Down>", lambda e: self.scroll(1))
+        self.tree.bind("<Prior>", lambda e: self.scroll(-self.page()))
+        self.tree.bind("<Next>", lambda e: self.scroll(self.page()))
+        self.tree.bind("<Home>", lambda e: self.moveto(0.0))
+        self.tree.bind("<End>", lambda e: self.moveto(1.0))
+        self._resize_pool(1)
+
+    def destroy(self):
+        for w in (self.tree, self.yscroll):
+            try:
+                w.destroy()
+            except Exception:
+                pass
+
+    def set_sort_indicator(self, col: Optional[str], descending: bool = False):
+        for c in self.columns:
+            mark = (" ▼" if descending else " ▲") if c == col else ""
+            self.tree.heading(c, text=display_label(c) + mark)
+
+    # ---- sizing
+    def _first_bbox(self):
+        try:
+            return self.tree.bbox(self.items[0]) if self.shown else None
+        except Exception:
+            return None
+
+    def _row_height(self) -> int:
+        bb = self._first_bbox()
+        if bb:
+            return max(1, int(bb[3]))
+        try:
+            return max(1, int(ttk.Style(self.tree).lookup("Treeview", "rowheight") or 20))
+        except Exception:
+            return 20
+
+    def _header_height(self) -> int:
+        bb = self._first_bbox()
+        return int(bb[1]) if bb else 24
+
+    def page(self) -> int:
+        return max(1, len(self.items))
+
+    def _resize_pool(self, n: int):
+        n = max(1, n)
+        while len(self.items) < n:
+            iid = self.tree.insert("", "end", values=())
+            self.tree.detach(iid)
+            self.items.append(iid)
+        while len(self.items) > n:
+            self.tree.delete(self.items.pop())
+        self.shown = min(self.shown, len(self.items))
+
+    def relayout(self):
+        h = self.tree.winfo_height()
+        if h > 1:
+            self._resize_pool((h - self._header_height()) // self._row_height())
+        self.refresh()
+
+    # ---- data
+    def count(self) -> int:
+        return len(self.source())
+
+    def notify(self):
+        """Rows were appended; coalesce into one refresh."""
+        if not self._pending:
+            self._pending = True
+            try:
+                self.tree.after_idle(self.refresh)
+            except Exception:
+                self._pending = False
+
+    def clear(self):
+        self.offset = 0
+        self.refresh()
+
+    def refresh(self):
+        self._pending = False
+        rows = self.source()
+        n, vis = len(rows), len(self.items)
+        self.offset = max(0, min(self.offset, n - vis))
+        want = max(0, min(vis, n - self.offset))
+        tree = self.tree
+        for k in range(want):
+            r = rows[self.offset + k]
+            tree.item(self.items[k], values=[r.get(c, "") for c in self.columns])
+        # attach/detach the tail of the pool instead of leaving blank lines
+        for k in range(self.shown, want):
+            tree.move(self.items[k], "", k)
+        if want < self.shown:
+            tree.detach(*self.items[want:self.shown])
+        self.shown = want
+        if n <= 0:
+            self.yscroll.set(0.0, 1.0)
+        else:
+            self.yscroll.set(self.offset / n, min(1.0, (self.offset + vis) / n))
+
+    # ---- scrolling
+    def scroll(self, rows: int):
+        self.offset += int(rows)
+        self.refresh()
+        return "break"
+
+    def moveto(self, frac: float):
+        self.offset = int(float(frac) * self.count())
+        self.refresh()
+        return "break"
+
+    def yview(self, *args):
+        """Scrollbar command: ('moveto', f) or ('scroll', n, 'units'|'pages')."""
+        if not args:
+            return
+        if args[0] == "moveto":
+            self.moveto(args[1])
+        elif args[0] == "scroll":
+            step = int(args[1])
+            self.scroll(step * self.page() if args[2] == "pages" else step)
+
+    def _on_wheel(self, event):
+        return self.scroll(-3 if event.delta > 0 else 3)
+
+
 class AppBase:
     def __init__(self):
         self.rows: List[Dict] = []
         self.columns = COLUMNS_UNIFIED
         self.client_map: Dict[str, str] = {}
+        self.workers = ANALYZE_WORKERS
+        self.fuzzy_match = FUZZY_CLIENT_MATCH
+        self._fuzzy_index: Optional[Tuple[Dict[str, str], ClientMapIndex]] = None
+        self._run: Optional[AnalyzeRun] = None
+        self._last_run: Optional[AnalyzeRun] = None   # file hashes / failures for delta export
+        # filter / sort / search over self.rows
+        self.query_text = ""
+        self.sort_col: Optional[str] = None
+        self.sort_desc = False
+        self._index: Optional[ResultIndex] = None
+        self._view: Optional[List[Dict]] = None   # None = show all rows
+        self._view_n = 0                          # rows the view has seen
+        self._query_gen = 0
         # overlays
         self._status_bubble = None
         self._splash = None
@@ -871,47 +2758,111 @@ class AppBase:
     def set_tree_rowheight(self, px): raise NotImplementedError
     def after_call(self, ms, func): raise NotImplementedError
     def set_progress(self, done: int, total: int): pass  # optional override
+    def rows_appended(self, rows: List[Dict]):
+        """rows were just added to self.rows; tables may override to batch."""
+        for r in rows:
+            self.add_row([r.get(c, "") for c in self.columns])
+    def refresh_table(self, reset: bool = False): pass  # view changed
     # overlays (to be implemented)
     def show_status_bubble(self, msg: str): pass
     def hide_status_bubble(self): pass
     def show_launch_splash(self): pass
     def hide_launch_splash(self): pass
 
-    # ---- Client Code Map (CSV)
-    def load_client_map_csv(self, csv_path: Path) -> Tuple[int, int]:
+    def load_splash_image_async(self, on_ready, max_size=(560, 300)):
         """
-        Reads CSV and builds a mapping dict. Prefers columns named
-        'CustRef' and 'PrimaryClientCode'; otherwise uses the first two columns.
-        Returns (rows_read, pairs_mapped).
+        Loads SPLASH_IMAGE_URL on a worker thread (file or network) and
+        calls on_ready(img) on the UI thread if the splash is still open.
         """
-        self.client_map.clear()
-        read = mapped = 0
-        with csv_path.open("r", newline="", encoding="utf-8") as f:
-            rdr = csv.DictReader(f)
-            if not rdr.fieldnames or len(rdr.fieldnames) < 2:
-                raise ValueError("CSV must have at least two columns.")
-            cols = {k.lower(): k for k in (rdr.fieldnames or [])}
-            key_col = cols.get("custref") or list(cols.values())[0]
-            val_col = cols.get("primaryclientcode") or list(cols.values())[1]
-            for row in rdr:
-                read += 1
-                k = soft_clean(row.get(key_col, ""))
-                v = soft_clean(row.get(val_col, ""))
-                if k and v:
-                    self.client_map[k] = v
-                    mapped += 1
+        box: List = []
+        threading.Thread(target=lambda: box.append(load_splash_image(SPLASH_IMAGE_URL, max_size)),
+                         daemon=True).start()
+
+        def poll():
+            if self._splash is None:
+                return
+            if not box:
+                self.after_call(30, poll)
+            elif box[0] is not None:
+                try:
+                    on_ready(box[0])
+                except Exception:
+                    pass
+        self.after_call(30, poll)
+
+    # ---- Client Code Map (CSV)
+    def load_client_map_csv(self, csv_path: Path) -> Tuple[int, int]:
+        """Loads the Client Code Map. Returns (rows_read, pairs_mapped)."""
+        # new dict (not clear()) so cached lookup indexes are rebuilt
+        self.client_map, read, mapped = load_client_map_csv(csv_path)
         return read, mapped
 
+    def analysis_client_map(self):
+        """Plain map, or a fuzzy-enabled index (built once per loaded map)."""
+        if not self.fuzzy_match or not self.client_map:
+            return self.client_map
+        cached = self._fuzzy_index
+        if cached is None or cached[0] is not self.client_map:
+            cached = (self.client_map, ClientMapIndex(self.client_map, fuzzy=True))
+            self._fuzzy_index = cached
+        return cached[1]
+
+    # ---- Filter / sort / search
+    def visible_rows(self) -> List[Dict]:
+        return self._view if self._view is not None else self.rows
+
+    def result_index(self) -> ResultIndex:
+        if self._index is None or self._index.rows is not self.rows:
+            self._index = ResultIndex(self.rows, self.columns)
+        return self._index
+
+    def apply_query(self, text: Optional[str] = None):
+        if text is not None:
+            self.query_text = text.strip()
+        self._refresh_view()
+        if self._view is not None:
+            self.set_status(f"Showing {len(self._view)} of {len(self.rows)} rows")
+
+    def schedule_query(self, text: str, delay_ms: int = 150):
+        """Debounced apply_query for search-as-you-type."""
+        self._query_gen += 1
+        gen = self._query_gen
+
+        def run():
+            if gen == self._query_gen:
+                self.apply_query(text)
+        self.after_call(delay_ms, run)
+
+    def sort_by(self, col: str):
+        """Header click: ascending, then descending, then back to row order."""
+        if self.sort_col != col:
+            self.sort_col, self.sort_desc = col, False
+        elif not self.sort_desc:
+            self.sort_desc = True
+        else:
+            self.sort_col, self.sort_desc = None, False
+        self._refresh_view()
+
+    def _refresh_view(self, incremental: bool = False):
+        if not self.query_text and not self.sort_col:
+            self._view = None
+        else:
+            idx = self.result_index()
+            rows = self.rows
+            if incremental and self._view is not None and not self.sort_col:
+                ids = idx.query(self.query_text, start=self._view_n)
+                self._view.extend(rows[i] for i in ids)
+            else:
+                ids = idx.query(self.query_text, self.sort_col, self.sort_desc)
+                self._view = [rows[i] for i in ids]
+        self._view_n = len(self.rows)
+        self.refresh_table(reset=not incremental)
+
     def export_csv(self, path: Path):
         if not self.rows:
             messagebox.showerror("Export", "No data to export.")
             return
-        with path.open("w", newline="", encoding="utf-8") as f:
-            w = csv.writer(f)
-            # write display labels
-            w.writerow([display_label(c) for c in self.columns])
-            for r in self.rows:
-                w.writerow([r.get(c, "") for c in self.columns])
+        write_rows_csv(path, self.rows, self.columns)
         messagebox.showinfo("Export", f"Saved CSV to:\n{path}")
 
     def export_xlsx(self, path: Path):
@@ -919,39 +2870,59 @@ class AppBase:
             messagebox.showerror("Export", "No data to export.")
             return
         try:
-            from openpyxl import Workbook
-            from openpyxl.utils import get_column_letter
-        except Exception:
+            write_rows_xlsx(path, self.rows, self.columns)
+        except ImportError:
             messagebox.showwarning(
                 "Export", "openpyxl not installed; exporting CSV instead.")
             return self.export_csv(path.with_suffix(".csv"))
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Invoice Rows"
-        # header with display labels
-        header_labels = [display_label(c) for c in self.columns]
-        ws.append(list(header_labels))
-        for r in self.rows:
-            ws.append([r.get(c, "") for c in self.columns])
-        for i, col in enumerate(self.columns, 1):
-            maxlen = max([len(str(display_label(col)))] +
-                         [len(str(r.get(col, ""))) for r in self.rows])
-            ws.column_dimensions[get_column_letter(
-                i)].width = min(max(12, maxlen + 2), 60)
-        wb.save(path)
         messagebox.showinfo("Export", f"Saved Excel to:\n{path}")
 
-    def run_analyze(self, path_entry: str):
-        self.clear_table()
-        self.rows = []
-        if not path_entry:
-            messagebox.showerror("Input", "Choose a file or folder.")
+    def export_delta(self, path: Path, baseline: Path = DELTA_BASELINE_PATH):
+        """
+        CSV of the rows added / modified / removed since the previous
+        "Export Changes" (ChangeType column); this run becomes the baseline.
+        """
+        run = self._last_run
+        if not self.rows or run is None:
+            messagebox.showerror("Export", "No data to export.")
             return
-        self.clear_table()
-        self.rows = []
+        if run.cancel.is_set():
+            messagebox.showerror("Export", "The last analysis was cancelled; run it to the end "
+                                           "before exporting changes.")
+            return
+        try:
+            tracker = DeltaTracker(baseline)
+            for name in run.failed_files:
+                tracker.keep_file(name)
+            delta: List[Dict] = []
+            hashes = run.file_hashes
+            for r in self.rows:
+                delta.extend(tracker.add([r], hashes.get(r.get("InvoiceFileName", ""), "")))
+            delta.extend(tracker.removed())
+            write_rows_csv(path, delta, DELTA_COLUMNS)
+            tracker.save()
+        except Exception as ex:
+            messagebox.showerror("Export", f"Delta export failed: {ex}")
+            return
+        c = tracker.counts
+        messagebox.showinfo("Export", f"Saved changes to:\n{path}\n\nAdded: {c['added']}  "
+                                      f"Modified: {c['modified']}  Removed: {c['removed']}  "
+                                      f"Unchanged: {c['unchanged']}")
+
+    def run_analyze(self, path_entry: str, stream_csv: Optional[Path] = None) -> bool:
+        """
+        Starts a background analysis of a file or folder. Rows stream into
+        the table as files finish; the summary is shown when the run ends.
+        stream_csv: also append each file's rows to this CSV from the worker
+        thread as soon as the file is done (durable partial output).
+        Returns False if nothing was started.
+        """
+        if self._run is not None:
+            self.set_status("Analysis already running…")
+            return False
         if not path_entry:
             messagebox.showerror("Input", "Choose a file or folder.")
-            return
+            return False
 
         p = Path(path_entry)
         files: List[Path] = []
@@ -962,47 +2933,100 @@ class AppBase:
                      and f.suffix.lower() == ".pdf"]
         else:
             messagebox.showerror("Input", "Path not found.")
-            return
+            return False
 
-        # Local-only: no Azure client
-        total_rows = 0
-        fedex_count = 0
-        lightning_count = 0
-        # (for files that weren’t detected as FedEx or Lightning)
-        generic_count = 0
-        errors: List[str] = []
-
-        total_files = len(files)
-        self.set_progress(0, max(1, total_files))
-        done = 0
-
-        for f in files:
+        sink = None
+        if stream_csv:
             try:
-                # Always local
-                txt = read_pdf_text(f)   # OCR fallback
-                if looks_like_fedex(txt):
-                    fedex_count += 1
-                elif looks_like_lightning(txt):
-                    lightning_count += 1
-                else:
-                    # Will still try both local parsers
-                    generic_count += 1
-
-                rows = process_file_auto(f, client_map=self.client_map)
-                self.rows.extend(rows)
-                total_rows += len(rows)
-
+                sink = CsvRowSink(stream_csv, self.columns)
             except Exception as ex:
-                errors.append(f"{f.name}: {ex}")
+                messagebox.showerror("Stream CSV", f"Cannot open {stream_csv}: {ex}")
+                return False
+
+        # reset the data first: the table repaints from self.rows / the view
+        self.rows = []
+        self._last_run = None
+        if self._view is not None:
+            self._refresh_view()
+        self.clear_table()
+        run = AnalyzeRun(total_files=len(files), sink=sink)
+        self._run = run
+        self.set_progress(0, max(1, run.total_files))
+        run.thread = threading.Thread(
+            target=_analyze_in_background,
+            args=(files, self.analysis_client_map(), self.workers, run),
+            daemon=True)
+        run.thread.start()
+        self.after_call(UI_POLL_MS, self._drain_analysis)
+        return True
+
+    def cancel_analyze(self):
+        if self._run is not None:
+            self._run.cancel.set()
+
+    def _drain_analysis(self):
+        """
+        UI-thread poller: folds finished files into the counters and inserts
+        at most UI_BATCH_ROWS rows per tick, so the window stays responsive.
+        If a tick fails, the run is cancelled and closed out with the error
+        instead of leaving the poller dead and the run stuck as "running".
+        """
+        run = self._run
+        if run is None:
+            return
+        try:
+            while True:
+                try:
+                    item = run.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    run.finished = True
+                    break
+                run.add(*item)
 
-            # progress update per file
-            done += 1
-            self.set_progress(done, max(1, total_files))
-            self.after_call(1, lambda: None)
+            pending = run.pending
+            if pending:
+                batch = [pending.popleft() for _ in range(min(len(pending), UI_BATCH_ROWS))]
+                self.rows.extend(batch)
+                if self._view is None:
+                    self.rows_appended(batch)
+                else:
+                    run.view_stale = True
+
+            now = time.perf_counter()
+            if run.finished or now - run.last_progress >= UI_PROGRESS_INTERVAL:
+                run.last_progress = now
+                if run.view_stale:
+                    # filtered/sorted view: fold new rows in at the throttled rate
+                    run.view_stale = False
+                    self._refresh_view(incremental=True)
+                self.set_progress(run.done, max(1, run.total_files))
+                if not run.finished:
+                    self.set_status(
+                        f"Analyzing… {run.done}/{run.total_files} files, {len(self.rows)} rows")
+
+            if run.finished and not pending:
+                self._run = None
+                self._last_run = run
+                self._finish_analyze(run)
+        except Exception as ex:
+            run.cancel.set()
+            if self._run is run:
+                self._run = None
+                run.errors.append(f"analysis display stopped: {ex}")
+                try:
+                    self._finish_analyze(run)
+                    return
+                except Exception:
+                    pass
+            messagebox.showerror("Analyze", f"Analysis stopped: {ex}")
+        finally:
+            if self._run is run:
+                self.after_call(UI_POLL_MS, self._drain_analysis)
 
-        # Show rows
-        for r in self.rows:
-            self.add_row([r.get(c, "") for c in self.columns])
+    def _finish_analyze(self, run: "AnalyzeRun"):
+        self.hide_status_bubble()
 
         # Status summary
         inv_totals: Dict[str, float] = {}
@@ -1017,8 +3041,24 @@ class AppBase:
                     a = 0.0
                 inv_totals[inv] = inv_totals.get(inv, 0.0) + a
 
-        msg = (f"Done. Files: {len(files)} FedEx: {fedex_count} "
-               f"Lightning: {lightning_count} Other(local): {generic_count} Rows: {total_rows}")
+        msg = (f"Done. Files: {run.total_files} FedEx: {run.fedex_count} "
+               f"Lightning: {run.lightning_count} Other(local): {run.generic_count} "
+               f"Rows: {run.total_rows}")
+        if run.cancel.is_set():
+            msg = msg.replace("Done.", f"Cancelled after {run.done} files.", 1)
+        if run.skipped_count:
+            msg += f" Skipped(>{MAX_FILE_MB}MB): {run.skipped_count}"
+        if run.streamed_count:
+            msg += f" Streamed(>{MAX_FILE_MB}MB): {run.streamed_count}"
+        if run.reused_count:
+            msg += f" Unchanged (reused): {run.reused_count}"
+        if run.cached_count:
+            msg += f" Cached: {run.cached_count}"
+        if run.ocr_hits or run.ocr_misses:
+            msg += f" OCR page cache: {run.ocr_hits} hit / {run.ocr_misses} miss"
+        if run.sink is not None:
+            msg += (f" Stream failed: {run.sink_error}" if run.sink_error else
+                    f" Streamed {run.sink.rows_written} rows to {run.sink.path}")
 
         if inv_totals:
             joined = "; ".join(f"{k}=${v:,.2f}" for k,
@@ -1026,8 +3066,11 @@ class AppBase:
             if joined:
                 msg += " Totals (per InvoiceID): " + joined
 
+        errors = run.errors
         if errors:
             msg += f" Errors: {len(errors)} (see details)"
+        self.set_status(msg)
+        if errors:
             # quick dialog with first few errors
             messagebox.showwarning("Some files failed",
                                    "\n".join(errors[:3]) + ("\n..." if len(errors) > 3 else ""))
@@ -1042,6 +3085,7 @@ if USE_CTK:
                 self._destroyed = True
             except Exception:
                 pass
+            self.cancel_analyze()
             try:
                 super().destroy()
             except Exception:
@@ -1085,8 +3129,8 @@ if USE_CTK:
             self._build_left()
             self._build_right()
             # (Removed duplicate icon from main window)
-            # close splash shortly after UI is ready
-            self.after(1600, self.hide_launch_splash)
+            # close splash as soon as the built window has been drawn
+            self.after_idle(lambda: self.after(SPLASH_HOLD_MS, self.hide_launch_splash))
 
             # Add protocol handler for safe destroy
             self._destroyed = False
@@ -1176,6 +3220,10 @@ if USE_CTK:
                 row=0, column=2, padx=(0, 6), pady=6, sticky="e")
             ctk.CTkButton(map_row, text="Load Map", width=110, command=self._load_map).grid(
                 row=0, column=3, padx=(0, 6), pady=6, sticky="e")
+            self.var_fuzzy = tk.BooleanVar(value=self.fuzzy_match)
+            ctk.CTkCheckBox(map_row, text="Fuzzy match", variable=self.var_fuzzy,
+                            command=self._toggle_fuzzy).grid(
+                row=0, column=4, padx=(0, 6), pady=6, sticky="e")
 
             # Status + export
             status = ctk.CTkFrame(right)
@@ -1194,7 +3242,28 @@ if USE_CTK:
             ctk.CTkButton(status, text="Export Excel", width=130, command=self._export_xlsx).grid(
                 row=0, column=1, padx=6, pady=6, sticky="e")
             ctk.CTkButton(status, text="Export CSV", width=120, command=self._export_csv).grid(
-                row=0, column=2, padx=(0, 10), pady=6, sticky="e")
+                row=0, column=2, padx=(0, 6), pady=6, sticky="e")
+            ctk.CTkButton(status, text="Export Changes", width=130, command=self._export_delta).grid(
+                row=0, column=3, padx=(0, 10), pady=6, sticky="e")
+            self.var_stream = tk.BooleanVar(value=False)
+            ctk.CTkCheckBox(status, text="Stream to CSV while analyzing",
+                            variable=self.var_stream).grid(
+                row=1, column=2, columnspan=2, padx=(0, 10), pady=(0, 8), sticky="e")
+
+            # Filter / search
+            query_row = ctk.CTkFrame(right)
+            query_row.grid(row=3, column=0, columnspan=12,
+                           sticky="we", padx=10, pady=(0, 4))
+            query_row.grid_columnconfigure(1, weight=1)
+            ctk.CTkLabel(query_row, text="Filter / Search:").grid(
+                row=0, column=0, padx=(6, 4), pady=6, sticky="e")
+            self.var_query = tk.StringVar()
+            ent_query = ctk.CTkEntry(query_row, textvariable=self.var_query, width=740)
+            ent_query.grid(row=0, column=1, padx=(0, 8), pady=6, sticky="we")
+            ent_query.bind("<KeyRelease>",
+                           lambda e: self.schedule_query(self.var_query.get()))
+            ctk.CTkButton(query_row, text="Clear", width=110, command=self._clear_query).grid(
+                row=0, column=2, padx=(0, 6), pady=6, sticky="e")
 
             # Table
             self.tbl_frame = ctk.CTkFrame(right)
@@ -1205,6 +3274,7 @@ if USE_CTK:
             style = ttk.Style(self.tbl_frame)
             style.theme_use('default')
             self.tree = None
+            self.table = None
             self.rebuild_tree()
 
         # Bridges
@@ -1219,31 +3289,28 @@ if USE_CTK:
                 pass
 
         def rebuild_tree(self):
-            if getattr(self, "tree", None) is not None:
-                try:
-                    self.tree.destroy()
-                except Exception:
-                    pass
-            self.tree = ttk.Treeview(
-                self.tbl_frame, columns=COLUMNS_UNIFIED, show="headings")
-            for c in COLUMNS_UNIFIED:
-                width = 200 if c in ("Description", "InvoiceFileName") else 140
-                if c in ("FedEx_Sender", "FedEx_CustRef", "PrimaryClientCode"):
-                    width = 180
-                self.tree.heading(c, text=display_label(c))
-                self.tree.column(c, width=width, anchor="w")
-            yscroll = ttk.Scrollbar(
-                self.tbl_frame, orient="vertical", command=self.tree.yview)
-            self.tree.configure(yscrollcommand=yscroll.set)
-            self.tree.grid(row=0, column=0, sticky="nsew")
-            yscroll.grid(row=0, column=1, sticky="ns")
+            if getattr(self, "table", None) is not None:
+                self.table.destroy()
+            self.table = VirtualTable(self.tbl_frame, COLUMNS_UNIFIED,
+                                      self.visible_rows, col_width=default_column_width,
+                                      on_heading=self.sort_by)
+            self.tree = self.table.tree
 
         def clear_table(self):
-            for iid in self.tree.get_children():
-                self.tree.delete(iid)
+            self.table.clear()
 
         def add_row(self, values: List):
-            self.tree.insert("", "end", values=values)
+            # the table reads from self.rows; just schedule a repaint
+            self.table.notify()
+
+        def rows_appended(self, rows: List[Dict]):
+            self.table.notify()
+
+        def refresh_table(self, reset: bool = False):
+            self.table.set_sort_indicator(self.sort_col, self.sort_desc)
+            if reset:
+                self.table.offset = 0
+            self.table.refresh()
 
         def get_tree_column_width(self, name):
             return self.tree.column(name, option="width")
@@ -1291,24 +3358,6 @@ if USE_CTK:
                     pass
                 self._status_bubble = None
 
-        def _load_image_from_url(self, url: str, max_size=(560, 300)):
-            if not PIL_OK:
-                return None
-            try:
-                # If the path is a local file, open directly
-                if url.lower().endswith('.png') or url.lower().endswith('.jpg') or url.lower().endswith('.jpeg'):
-                    img = Image.open(url).convert("RGBA")
-                    img.thumbnail(max_size, Image.LANCZOS)
-                    return img
-                # Otherwise, treat as URL
-                r = requests.get(url, timeout=8)
-                r.raise_for_status()
-                img = Image.open(BytesIO(r.content)).convert("RGBA")
-                img.thumbnail(max_size, Image.LANCZOS)
-                return img
-            except Exception:
-                return None
-
         def show_launch_splash(self):
             if self._splash is not None:
                 return
@@ -1322,16 +3371,17 @@ if USE_CTK:
             self._splash.attributes("-topmost", True)
             frm = ctk.CTkFrame(self._splash, corner_radius=12)
             frm.pack(fill="both", expand=True, padx=10, pady=10)
-            img = self._load_image_from_url(SPLASH_IMAGE_URL)
-            if img is not None:
+            lbl = ctk.CTkLabel(frm, text="Loading…", font=ctk.CTkFont(
+                size=18, weight="bold"))
+            lbl.pack(padx=20, pady=20)
+
+            def show_image(img):
                 cimg = ctk.CTkImage(
                     light_image=img, dark_image=img, size=img.size)
-                ctk.CTkLabel(frm, image=cimg, text="").pack(padx=14, pady=14)
+                lbl.configure(image=cimg, text="")
                 # hold reference
                 self._splash._img_ref = cimg
-            else:
-                ctk.CTkLabel(frm, text="Loading…", font=ctk.CTkFont(
-                    size=18, weight="bold")).pack(padx=20, pady=20)
+            self.load_splash_image_async(show_image)
             self.update_idletasks()
             # center on screen
             sw, sh = self.winfo_screenwidth(), self.winfo_screenheight()
@@ -1380,6 +3430,13 @@ if USE_CTK:
             except Exception as ex:
                 messagebox.showerror("CSV", f"Failed to load: {ex}")
 
+        def _toggle_fuzzy(self):
+            self.fuzzy_match = bool(self.var_fuzzy.get())
+
+        def _clear_query(self):
+            self.var_query.set("")
+            self.apply_query("")
+
         def _export_xlsx(self):
             path = filedialog.asksaveasfilename(defaultextension=".xlsx",
                                                 filetypes=[
@@ -1397,367 +3454,1669 @@ if USE_CTK:
                 return
             self.export_csv(Path(path))
 
+        def _export_delta(self):
+            path = filedialog.asksaveasfilename(defaultextension=".csv",
+                                                filetypes=[("CSV", "*.csv")],
+                                                initialfile=f"invoice_changes_{datetime.now():%Y%m%d}.csv")
+            if not path:
+                return
+            self.export_delta(Path(path))
+
         def _analyze(self):
+            stream = None
+            if self.var_stream.get():
+                stream = filedialog.asksaveasfilename(defaultextension=".csv",
+                                                      filetypes=[("CSV", "*.csv")],
+                                                      initialfile="invoice_rows.csv")
+                if not stream:
+                    return
             self.set_status("Analyzing…")
-            self.show_status_bubble("Analyzing… Please wait")
-            self.update_idletasks()
-            try:
-                self.run_analyze(self.var_path.get().strip())
-            finally:
-                self.hide_status_bubble()
+            if self.run_analyze(self.var_path.get().strip(),
+                                stream_csv=Path(stream) if stream else None):
+                self.show_status_bubble("Analyzing… Please wait")
 
 
 # --------- Tk fallback ----------
 
 
-class AppTk(tk.Tk, AppBase):
-    def __init__(self):
-        tk.Tk.__init__(self)
-        AppBase.__init__(self)
-        super().__init__()
-        self.title(f"Smart Invoice Runner [{APP_VERSION}]")
-        self.geometry("1220x880")
-        self.minsize(1120, 800)
-        # Set window icon
-        try:
-            self.iconbitmap(
-                r"C:\Users\rscottdeperto\Desktop\Invoice Testing\Coding\assets\icon64 (1).ico")
-        except Exception:
-            pass
-        # Splash first
-        self.show_launch_splash()
-        self._build_left()
-        self._build_right()
-        # Add icon to top left of main app (Tk)
-        try:
-            icon_img = None
-            if PIL_OK:
-                from PIL import Image, ImageTk
-                icon_img = Image.open(
-                    r"C:\Users\rscottdeperto\Desktop\Invoice Testing\Coding\assets\icon64 (1).ico")
-                icon_img = icon_img.resize((40, 40), Image.LANCZOS)
-                icon_img = ImageTk.PhotoImage(icon_img)
-            if icon_img:
-                self.icon_label = tk.Label(self, image=icon_img, bg="#f0f0f0")
-                self.icon_label.image = icon_img
-                self.icon_label.place(x=8, y=8)
-        except Exception:
-            pass
-        self.after(1600, self.hide_launch_splash)
-
-    def _build_left(self):
-        left = tk.Frame(self, bg="#f0f0f0", width=320)
-        left.grid(row=0, column=0, sticky="ns")
-        left.grid_propagate(False)
-        # Add icon at top left, with transparent background
-        try:
-            icon_img = None
-            if PIL_OK:
-                from PIL import Image, ImageTk
-                icon_img = Image.open(
-                    r"C:\Users\rscottdeperto\Desktop\Invoice Testing\Coding\assets\icon64 (1).ico")
-                icon_img = icon_img.resize((40, 40), Image.LANCZOS)
-                icon_img = icon_img.convert("RGBA")
-                datas = icon_img.getdata()
-                newData = []
-                for item in datas:
-                    if item[0] > 240 and item[1] > 240 and item[2] > 240:
-                        newData.append((255, 255, 255, 0))
-                    else:
-                        newData.append(item)
-                icon_img.putdata(newData)
-                icon_img = ImageTk.PhotoImage(icon_img)
-            if icon_img:
-                self.left_icon_label = tk.Label(
-                    left, image=icon_img, bg="#f0f0f0")
-                self.left_icon_label.image = icon_img
-                self.left_icon_label.pack(anchor="nw", padx=12, pady=(12, 2))
-        except Exception:
-            pass
-        tk.Label(left, text="Smart Invoice Runner", font=(
-            "Segoe UI", 12, "bold"), bg="#f0f0f0").pack(anchor="w", padx=12, pady=(4, 6))
-        # Add bold/underlined header
-        header_font = ("Segoe UI", 12, "bold")
-        tk.Label(left, text="How to use this tool", font=header_font,
-                 bg="#f0f0f0", underline=1).pack(anchor="w", padx=12, pady=(18, 2))
-        # Instructions body
-        instructions_body = instructions_text().split(
-            '\n', 1)[1] if '\n' in instructions_text() else instructions_text()
-        tk.Label(left, text=instructions_body, justify="left", wraplength=280,
-                 bg="#f0f0f0").pack(anchor="w", padx=12, pady=(2, 10))
-        tk.Label(left, text=f"App: {APP_VERSION}", bg="#f0f0f0").pack(
-            side="bottom", anchor="w", padx=12, pady=(8, 10))
-
-    def _build_right(self):
-        self.grid_rowconfigure(0, weight=1)
-        self.grid_columnconfigure(1, weight=1)
-        right = tk.Frame(self)
-        right.grid(row=0, column=1, sticky="nsew")
-        for c in range(12):
-            right.grid_columnconfigure(c, weight=1)
-        right.grid_rowconfigure(6, weight=1)
-
-        strip = tk.Frame(right)
-        strip.grid(row=0, column=0, columnspan=12,
-                   sticky="we", padx=10, pady=(10, 6))
-        tk.Label(strip, text="API Key (for non‑FedEx/Lightning):").grid(
-            row=0, column=2, padx=(6, 4), pady=6, sticky="e")
-        self.var_apikey = tk.StringVar()
-        tk.Entry(strip, textvariable=self.var_apikey, show="•", width=40).grid(
-            row=0, column=3, padx=(0, 8), pady=6, sticky="w")
-        tk.Label(strip, text="API Ver:").grid(
-            row=0, column=4, padx=(6, 4), pady=6, sticky="e")
-        tk.Label(strip, text="File/Folder:").grid(row=1,
-                                                  column=0, padx=(6, 4), pady=6, sticky="e")
-        self.var_path = tk.StringVar()
-        tk.Entry(strip, textvariable=self.var_path, width=80).grid(
-            row=1, column=1, columnspan=3, padx=(0, 8), pady=6, sticky="we")
-        tk.Button(strip, text="Browse File", width=12, command=self._browse_file).grid(
-            row=1, column=4, padx=(0, 6), pady=6, sticky="e")
-        tk.Button(strip, text="Browse Folder", width=12, command=self._browse_folder).grid(
-            row=1, column=5, padx=(0, 6), pady=6, sticky="e")
-        tk.Button(strip, text="Analyze", width=12, command=self._analyze).grid(
-            row=1, column=6, padx=(0, 8), pady=6, sticky="e")
-
-        # Client Code Map (CSV)
-        map_row = tk.Frame(right)
-        map_row.grid(row=1, column=0, columnspan=12,
-                     sticky="we", padx=10, pady=(0, 4))
-        map_row.grid_columnconfigure(1, weight=1)
-        tk.Label(map_row, text="Client Code Map (CSV):").grid(
-            row=0, column=0, padx=(6, 4), pady=6, sticky="e")
-        self.var_csv = tk.StringVar()
-        tk.Entry(map_row, textvariable=self.var_csv, width=80).grid(
-            row=0, column=1, padx=(0, 8), pady=6, sticky="we")
-        tk.Button(map_row, text="Browse CSV", width=12, command=self._browse_csv).grid(
-            row=0, column=2, padx=(0, 6), pady=6, sticky="e")
-        tk.Button(map_row, text="Load Map", width=12, command=self._load_map).grid(
-            row=0, column=3, padx=(0, 6), pady=6, sticky="e")
-
-        status = tk.Frame(right)
-        status.grid(row=2, column=0, columnspan=12,
-                    sticky="we", padx=10, pady=(4, 8))
-        status.grid_columnconfigure(0, weight=1)
-        self.lbl_status = tk.Label(status, text="Ready.")
-        self.lbl_status.grid(row=0, column=0, padx=10, pady=6, sticky="w")
-
-        # Graphical progress bar (ttk)
-        self.pbar = ttk.Progressbar(
-            status, mode="determinate", length=360, maximum=100)
-        self.pbar["value"] = 0
-        self.pbar.grid(row=1, column=0, columnspan=2,
-                       padx=10, pady=(0, 8), sticky="w")
-
-        tk.Button(status, text="Export Excel", width=14, command=self._export_xlsx).grid(
-            row=0, column=1, padx=6, pady=6, sticky="e")
-        tk.Button(status, text="Export CSV", width=12, command=self._export_csv).grid(
-            row=0, column=2, padx=(0, 10), pady=6, sticky="e")
-
-        self.tbl_frame = tk.Frame(right)
-        self.tbl_frame.grid(row=6, column=0, columnspan=12,
-                            sticky="nsew", padx=10, pady=(0, 10))
-        self.tbl_frame.grid_rowconfigure(0, weight=1)
-        self.tbl_frame.grid_columnconfigure(0, weight=1)
-        self.tree = None
-        self.rebuild_tree()
-
-    # ---- Bridges (inside class) ----
-    def set_status(self, msg: str):
-        self.lbl_status.config(text=msg)
-
-    def set_progress(self, done: int, total: int):
-        try:
-            pct = 0 if total <= 0 else int(
-                max(0, min(100, round(100 * done / total))))
-            self.pbar["value"] = pct
-            self.update_idletasks()
-        except Exception:
-            pass
-
-    def rebuild_tree(self):
-        if getattr(self, "tree", None) is not None:
+if GUI_ENABLED:
+    class AppTk(tk.Tk, AppBase):
+        def safe_destroy(self):
+            """Cancel a running analysis (pending pool work) before closing."""
+            self.cancel_analyze()
             try:
-                self.tree.destroy()
+                super().destroy()
             except Exception:
                 pass
-        self.tree = ttk.Treeview(
-            self.tbl_frame, columns=COLUMNS_UNIFIED, show="headings")
-        for c in COLUMNS_UNIFIED:
-            width = 200 if c in ("Description", "InvoiceFileName") else 140
-            if c in ("FedEx_Sender", "FedEx_CustRef", "PrimaryClientCode"):
-                width = 180
-            self.tree.heading(c, text=display_label(c))
-            self.tree.column(c, width=width, anchor="w")
-        yscroll = ttk.Scrollbar(
-            self.tbl_frame, orient="vertical", command=self.tree.yview)
-        self.tree.configure(yscrollcommand=yscroll.set)
-        self.tree.grid(row=0, column=0, sticky="nsew")
-        yscroll.grid(row=0, column=1, sticky="ns")
-
-    def clear_table(self):
-        for iid in self.tree.get_children():
-            self.tree.delete(iid)
-
-    def add_row(self, values: List):
-        self.tree.insert("", "end", values=values)
 
-    def get_tree_column_width(self, name):
-        return self.tree.column(name, option="width")
-
-    def set_tree_rowheight(self, px):
-        ttk.Style(self.tree).configure("Treeview", rowheight=int(px))
-
-    def after_call(self, ms, func):
-        self.after(ms, func)
-
-    # ----- overlays -----
-    def show_status_bubble(self, msg: str):
-        if self._status_bubble is not None:
-            try:
-                self._status_bubble.destroy()
-            except Exception:
-                pass
-        self._status_bubble = tk.Toplevel(self)
-        try:
-            self._status_bubble.iconbitmap(
-                r"C:\Users\rscottdeperto\Desktop\Invoice Testing\Coding\assets\icon64 (1).ico")
-        except Exception:
-            pass
-        self._status_bubble.overrideredirect(True)
-        self._status_bubble.attributes("-topmost", True)
-        frm = tk.Frame(self._status_bubble, bd=1, relief="ridge")
-        frm.pack(fill="both", expand=True)
-        tk.Label(frm, text=msg, font=(
-            "Segoe UI", 11, "bold"), padx=14, pady=8).pack()
-        pb = ttk.Progressbar(frm, mode="indeterminate",
-                             length=220, maximum=100)
-        pb.pack(padx=10, pady=(0, 10))
-        pb.start(12)
-        self.update_idletasks()
-        x = self.winfo_x() + (self.winfo_width() // 2) - 140
-        y = self.winfo_y() + 120
-        self._status_bubble.geometry(f"+{x}+{y}")
-
-    def hide_status_bubble(self):
-        if self._status_bubble is not None:
+        def __init__(self):
+            tk.Tk.__init__(self)
+            AppBase.__init__(self)
+            super().__init__()
+            self.title(f"Smart Invoice Runner [{APP_VERSION}]")
+            self.geometry("1220x880")
+            self.minsize(1120, 800)
+            # Set window icon
             try:
-                self._status_bubble.destroy()
+                self.iconbitmap(
+                    r"C:\Users\rscottdeperto\Desktop\Invoice Testing\Coding\assets\icon64 (1).ico")
             except Exception:
                 pass
-            self._status_bubble = None
+            # Splash first
+            self.show_launch_splash()
+            self._build_left()
+            self._build_right()
+            # Add icon to top left of main app (Tk)
+            try:
+                icon_img = None
+                if PIL_OK:
+                    from PIL import Image, ImageTk
+                    icon_img = Image.open(
+                        r"C:\Users\rscottdeperto\Desktop\Invoice Testing\Coding\assets\icon64 (1).ico")
+                    icon_img = icon_img.resize((40, 40), Image.LANCZOS)
+                    icon_img = ImageTk.PhotoImage(icon_img)
+                if icon_img:
+                    self.icon_label = tk.Label(self, image=icon_img, bg="#f0f0f0")
+                    self.icon_label.image = icon_img
+                    self.icon_label.place(x=8, y=8)
+            except Exception:
+                pass
+            self.after_idle(lambda: self.after(SPLASH_HOLD_MS, self.hide_launch_splash))
+            self.protocol("WM_DELETE_WINDOW", self.safe_destroy)
 
-    def _load_image_from_url(self, url: str, max_size=(560, 300)):
-        if not PIL_OK:
-            return None
+        def _build_left(self):
+            left = tk.Frame(self, bg="#f0f0f0", width=320)
+            left.grid(row=0, column=0, sticky="ns")
+            left.grid_propagate(False)
+            # Add icon at top left, with transparent background
+            try:
+                icon_img = None
+                if PIL_OK:
+                    from PIL import Image, ImageTk
+                    icon_img = Image.open(
+                        r"C:\Users\rscottdeperto\Desktop\Invoice Testing\Coding\assets\icon64 (1).ico")
+                    icon_img = icon_img.resize((40, 40), Image.LANCZOS)
+                    icon_img = icon_img.convert("RGBA")
+                    datas = icon_img.getdata()
+                    newData = []
+                    for item in datas:
+                        if item[0] > 240 and item[1] > 240 and item[2] > 240:
+                            newData.append((255, 255, 255, 0))
+                        else:
+                            newData.append(item)
+                    icon_img.putdata(newData)
+                    icon_img = ImageTk.PhotoImage(icon_img)
+                if icon_img:
+                    self.left_icon_label = tk.Label(
+                        left, image=icon_img, bg="#f0f0f0")
+                    self.left_icon_label.image = icon_img
+                    self.left_icon_label.pack(anchor="nw", padx=12, pady=(12, 2))
+            except Exception:
+                pass
+            tk.Label(left, text="Smart Invoice Runner", font=(
+                "Segoe UI", 12, "bold"), bg="#f0f0f0").pack(anchor="w", padx=12, pady=(4, 6))
+            # Add bold/underlined header
+            header_font = ("Segoe UI", 12, "bold")
+            tk.Label(left, text="How to use this tool", font=header_font,
+                     bg="#f0f0f0", underline=1).pack(anchor="w", padx=12, pady=(18, 2))
+            # Instructions body
+            instructions_body = instructions_text().split(
+                '\n', 1)[1] if '\n' in instructions_text() else instructions_text()
+            tk.Label(left, text=instructions_body, justify="left", wraplength=280,
+                     bg="#f0f0f0").pack(anchor="w", padx=12, pady=(2, 10))
+            tk.Label(left, text=f"App: {APP_VERSION}", bg="#f0f0f0").pack(
+                side="bottom", anchor="w", padx=12, pady=(8, 10))
+
+        def _build_right(self):
+            self.grid_rowconfigure(0, weight=1)
+            self.grid_columnconfigure(1, weight=1)
+            right = tk.Frame(self)
+            right.grid(row=0, column=1, sticky="nsew")
+            for c in range(12):
+                right.grid_columnconfigure(c, weight=1)
+            right.grid_rowconfigure(6, weight=1)
+
+            strip = tk.Frame(right)
+            strip.grid(row=0, column=0, columnspan=12,
+                       sticky="we", padx=10, pady=(10, 6))
+            tk.Label(strip, text="API Key (for non‑FedEx/Lightning):").grid(
+                row=0, column=2, padx=(6, 4), pady=6, sticky="e")
+            self.var_apikey = tk.StringVar()
+            tk.Entry(strip, textvariable=self.var_apikey, show="•", width=40).grid(
+                row=0, column=3, padx=(0, 8), pady=6, sticky="w")
+            tk.Label(strip, text="API Ver:").grid(
+                row=0, column=4, padx=(6, 4), pady=6, sticky="e")
+            tk.Label(strip, text="File/Folder:").grid(row=1,
+                                                      column=0, padx=(6, 4), pady=6, sticky="e")
+            self.var_path = tk.StringVar()
+            tk.Entry(strip, textvariable=self.var_path, width=80).grid(
+                row=1, column=1, columnspan=3, padx=(0, 8), pady=6, sticky="we")
+            tk.Button(strip, text="Browse File", width=12, command=self._browse_file).grid(
+                row=1, column=4, padx=(0, 6), pady=6, sticky="e")
+            tk.Button(strip, text="Browse Folder", width=12, command=self._browse_folder).grid(
+                row=1, column=5, padx=(0, 6), pady=6, sticky="e")
+            tk.Button(strip, text="Analyze", width=12, command=self._analyze).grid(
+                row=1, column=6, padx=(0, 8), pady=6, sticky="e")
+
+            # Client Code Map (CSV)
+            map_row = tk.Frame(right)
+            map_row.grid(row=1, column=0, columnspan=12,
+                         sticky="we", padx=10, pady=(0, 4))
+            map_row.grid_columnconfigure(1, weight=1)
+            tk.Label(map_row, text="Client Code Map (CSV):").grid(
+                row=0, column=0, padx=(6, 4), pady=6, sticky="e")
+            self.var_csv = tk.StringVar()
+            tk.Entry(map_row, textvariable=self.var_csv, width=80).grid(
+                row=0, column=1, padx=(0, 8), pady=6, sticky="we")
+            tk.Button(map_row, text="Browse CSV", width=12, command=self._browse_csv).grid(
+                row=0, column=2, padx=(0, 6), pady=6, sticky="e")
+            tk.Button(map_row, text="Load Map", width=12, command=self._load_map).grid(
+                row=0, column=3, padx=(0, 6), pady=6, sticky="e")
+            self.var_fuzzy = tk.BooleanVar(value=self.fuzzy_match)
+            tk.Checkbutton(map_row, text="Fuzzy match", variable=self.var_fuzzy,
+                           command=self._toggle_fuzzy).grid(
+                row=0, column=4, padx=(0, 6), pady=6, sticky="e")
+
+            status = tk.Frame(right)
+            status.grid(row=2, column=0, columnspan=12,
+                        sticky="we", padx=10, pady=(4, 8))
+            status.grid_columnconfigure(0, weight=1)
+            self.lbl_status = tk.Label(status, text="Ready.")
+            self.lbl_status.grid(row=0, column=0, padx=10, pady=6, sticky="w")
+
+            # Graphical progress bar (ttk)
+            self.pbar = ttk.Progressbar(
+                status, mode="determinate", length=360, maximum=100)
+            self.pbar["value"] = 0
+            self.pbar.grid(row=1, column=0, columnspan=2,
+                           padx=10, pady=(0, 8), sticky="w")
+
+            tk.Button(status, text="Export Excel", width=14, command=self._export_xlsx).grid(
+                row=0, column=1, padx=6, pady=6, sticky="e")
+            tk.Button(status, text="Export CSV", width=12, command=self._export_csv).grid(
+                row=0, column=2, padx=(0, 6), pady=6, sticky="e")
+            tk.Button(status, text="Export Changes", width=14, command=self._export_delta).grid(
+                row=0, column=3, padx=(0, 10), pady=6, sticky="e")
+            self.var_stream = tk.BooleanVar(value=False)
+            tk.Checkbutton(status, text="Stream to CSV while analyzing",
+                           variable=self.var_stream).grid(
+                row=1, column=2, columnspan=2, padx=(0, 10), pady=(0, 8), sticky="e")
+
+            # Filter / search
+            query_row = tk.Frame(right)
+            query_row.grid(row=3, column=0, columnspan=12,
+                           sticky="we", padx=10, pady=(0, 4))
+            query_row.grid_columnconfigure(1, weight=1)
+            tk.Label(query_row, text="Filter / Search:").grid(
+                row=0, column=0, padx=(6, 4), pady=6, sticky="e")
+            self.var_query = tk.StringVar()
+            ent_query = tk.Entry(query_row, textvariable=self.var_query, width=80)
+            ent_query.grid(row=0, column=1, padx=(0, 8), pady=6, sticky="we")
+            ent_query.bind("<KeyRelease>",
+                           lambda e: self.schedule_query(self.var_query.get()))
+            tk.Button(query_row, text="Clear", width=12, command=self._clear_query).grid(
+                row=0, column=2, padx=(0, 6), pady=6, sticky="e")
+
+            self.tbl_frame = tk.Frame(right)
+            self.tbl_frame.grid(row=6, column=0, columnspan=12,
+                                sticky="nsew", padx=10, pady=(0, 10))
+            self.tbl_frame.grid_rowconfigure(0, weight=1)
+            self.tbl_frame.grid_columnconfigure(0, weight=1)
+            self.tree = None
+            self.table = None
+            self.rebuild_tree()
+
+        # ---- Bridges (inside class) ----
+        def set_status(self, msg: str):
+            self.lbl_status.config(text=msg)
+
+        def set_progress(self, done: int, total: int):
+            try:
+                pct = 0 if total <= 0 else int(
+                    max(0, min(100, round(100 * done / total))))
+                self.pbar["value"] = pct
+                self.update_idletasks()
+            except Exception:
+                pass
+
+        def rebuild_tree(self):
+            if getattr(self, "table", None) is not None:
+                self.table.destroy()
+            self.table = VirtualTable(self.tbl_frame, COLUMNS_UNIFIED,
+                                      self.visible_rows, col_width=default_column_width,
+                                      on_heading=self.sort_by)
+            self.tree = self.table.tree
+
+        def clear_table(self):
+            self.table.clear()
+
+        def add_row(self, values: List):
+            # the table reads from self.rows; just schedule a repaint
+            self.table.notify()
+
+        def rows_appended(self, rows: List[Dict]):
+            self.table.notify()
+
+        def refresh_table(self, reset: bool = False):
+            self.table.set_sort_indicator(self.sort_col, self.sort_desc)
+            if reset:
+                self.table.offset = 0
+            self.table.refresh()
+
+        def get_tree_column_width(self, name):
+            return self.tree.column(name, option="width")
+
+        def set_tree_rowheight(self, px):
+            ttk.Style(self.tree).configure("Treeview", rowheight=int(px))
+
+        def after_call(self, ms, func):
+            self.after(ms, func)
+
+        # ----- overlays -----
+        def show_status_bubble(self, msg: str):
+            if self._status_bubble is not None:
+                try:
+                    self._status_bubble.destroy()
+                except Exception:
+                    pass
+            self._status_bubble = tk.Toplevel(self)
+            try:
+                self._status_bubble.iconbitmap(
+                    r"C:\Users\rscottdeperto\Desktop\Invoice Testing\Coding\assets\icon64 (1).ico")
+            except Exception:
+                pass
+            self._status_bubble.overrideredirect(True)
+            self._status_bubble.attributes("-topmost", True)
+            frm = tk.Frame(self._status_bubble, bd=1, relief="ridge")
+            frm.pack(fill="both", expand=True)
+            tk.Label(frm, text=msg, font=(
+                "Segoe UI", 11, "bold"), padx=14, pady=8).pack()
+            pb = ttk.Progressbar(frm, mode="indeterminate",
+                                 length=220, maximum=100)
+            pb.pack(padx=10, pady=(0, 10))
+            pb.start(12)
+            self.update_idletasks()
+            x = self.winfo_x() + (self.winfo_width() // 2) - 140
+            y = self.winfo_y() + 120
+            self._status_bubble.geometry(f"+{x}+{y}")
+
+        def hide_status_bubble(self):
+            if self._status_bubble is not None:
+                try:
+                    self._status_bubble.destroy()
+                except Exception:
+                    pass
+                self._status_bubble = None
+
+        def show_launch_splash(self):
+            if self._splash is not None:
+                return
+            self._splash = tk.Toplevel(self)
+            try:
+                self._splash.iconbitmap(
+                    r"C:\Users\rscottdeperto\Desktop\Invoice Testing\Coding\assets\icon64 (1).ico")
+            except Exception:
+                pass
+            self._splash.overrideredirect(True)
+            self._splash.attributes("-topmost", True)
+            frm = tk.Frame(self._splash, bd=1, relief="ridge")
+            frm.pack(fill="both", expand=True, padx=6, pady=6)
+            lbl = tk.Label(frm, text="Loading…", font=(
+                "Segoe UI", 14, "bold"))
+            lbl.pack(padx=16, pady=16)
+
+            def show_image(img):
+                imgtk = ImageTk.PhotoImage(img)
+                lbl.configure(image=imgtk, text="")
+                lbl.image = imgtk
+            self.load_splash_image_async(show_image)
+            self.update_idletasks()
+            sw, sh = self.winfo_screenwidth(), self.winfo_screenheight()
+            w, h = 640, 360
+            x, y = (sw - w)//2, (sh - h)//2
+            self._splash.geometry(f"{w}x{h}+{x}+{y}")
+
+        def hide_launch_splash(self):
+            if self._splash is not None:
+                try:
+                    self._splash.destroy()
+                except Exception:
+                    pass
+                self._splash = None
+
+        # ---- Actions (inside class) ----
+        def _browse_file(self):
+            p = filedialog.askopenfilename(
+                filetypes=[("PDF", "*.pdf"), ("All", "*.*")]
+            )
+            if p:
+                self.var_path.set(p)
+
+        def _browse_folder(self):
+            p = filedialog.askdirectory()
+            if p:
+                self.var_path.set(p)
+
+        def _browse_csv(self):
+            p = filedialog.askopenfilename(
+                filetypes=[("CSV", "*.csv"), ("All", "*.*")]
+            )
+            if p:
+                self.var_csv.set(p)
+
+        def _load_map(self):
+            p = Path(self.var_csv.get().strip()
+                     ) if self.var_csv.get().strip() else None
+            if not p or not p.exists():
+                messagebox.showerror("CSV", "Select a valid CSV first.")
+                return
+            try:
+                read, mapped = self.load_client_map_csv(p)
+                self.set_status(f"Loaded map: rows={read}, mapped={mapped}")
+                messagebox.showinfo("Load Map", "Load Complete")
+            except Exception as ex:
+                messagebox.showerror("CSV", f"Failed to load: {ex}")
+
+        def _toggle_fuzzy(self):
+            self.fuzzy_match = bool(self.var_fuzzy.get())
+
+        def _clear_query(self):
+            self.var_query.set("")
+            self.apply_query("")
+
+        def _export_xlsx(self):
+            path = filedialog.asksaveasfilename(defaultextension=".xlsx",
+                                                filetypes=[
+                                                    ("Excel Workbook", "*.xlsx")],
+                                                initialfile="invoice_rows.xlsx")
+            if not path:
+                return
+            self.export_xlsx(Path(path))
+
+        def _export_csv(self):
+            path = filedialog.asksaveasfilename(defaultextension=".csv",
+                                                filetypes=[("CSV", "*.csv")],
+                                                initialfile="invoice_rows.csv")
+            if not path:
+                return
+            self.export_csv(Path(path))
+
+        def _export_delta(self):
+            path = filedialog.asksaveasfilename(defaultextension=".csv",
+                                                filetypes=[("CSV", "*.csv")],
+                                                initialfile=f"invoice_changes_{datetime.now():%Y%m%d}.csv")
+            if not path:
+                return
+            self.export_delta(Path(path))
+
+        def _analyze(self):
+            stream = None
+            if self.var_stream.get():
+                stream = filedialog.asksaveasfilename(defaultextension=".csv",
+                                                      filetypes=[("CSV", "*.csv")],
+                                                      initialfile="invoice_rows.csv")
+                if not stream:
+                    return
+            self.set_status("Analyzing…")
+            if self.run_analyze(self.var_path.get().strip(),
+                                stream_csv=Path(stream) if stream else None):
+                self.show_status_bubble("Analyzing… Please wait")
+
+
+# ======================================
+# Row sinks (streaming export)
+# ======================================
+class RowSink:
+    """
+    Receives each file's rows as soon as the file is analyzed, so exports
+    do not need the whole run in memory. Use as a context manager.
+    """
+    rows_written = 0
+
+    def write_result(self, res: FileResult):
+        self.write_rows(res.rows)
+
+    def write_rows(self, rows: List[Dict]):
+        raise NotImplementedError
+
+    def file_failed(self, file_name: str):
+        """Called for a file that could not be analyzed (no rows this run)."""
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class CsvRowSink(RowSink):
+    """
+    Appends rows to a CSV as each file finishes (display_label header).
+    Every file's rows go out in one write followed by flush + fsync, so a
+    crash mid-batch leaves a valid CSV of every file completed so far.
+    append=True continues an existing file instead of truncating it.
+    """
+
+    def __init__(self, path, columns=COLUMNS_UNIFIED, append: bool = False,
+                 durable: bool = True):
+        self.columns = tuple(columns)
+        self.path = path
+        self.durable = durable
+        self.rows_written = 0
+        if path == "-":
+            self._f, self._own = sys.stdout, False
+            self.durable = False
+            new_file = True
+        else:
+            p = Path(path)
+            new_file = not (append and p.exists() and p.stat().st_size > 0)
+            self._f = p.open("w" if new_file else "a", newline="", encoding="utf-8")
+            self._own = True
+        if new_file:
+            self._emit([[display_label(c) for c in self.columns]])
+
+    def _emit(self, records: List[List]):
+        buf = StringIO()
+        csv.writer(buf, lineterminator="\r\n" if self._own else "\n").writerows(records)
+        self._f.write(buf.getvalue())
+        self._f.flush()
+        if self.durable:
+            os.fsync(self._f.fileno())
+
+    def write_rows(self, rows: List[Dict]):
+        if not rows:
+            return
+        cols = self.columns
+        self._emit([[r.get(c, "") for c in cols] for r in rows])
+        self.rows_written += len(rows)
+
+    def close(self):
+        if self._own and not self._f.closed:
+            self._f.close()
+
+
+class NdjsonSink(RowSink):
+    """
+    Newline-delimited JSON: one object per row keyed by the COLUMNS_UNIFIED
+    names, plus a "_file" object with the file's metadata (vendor detected,
+    OCR used, pages, elapsed ms). Each file's lines are written and flushed
+    together as soon as that file finishes, so a consumer reading the pipe
+    or tailing the file sees complete records only.
+    """
+
+    def __init__(self, path, columns=COLUMNS_UNIFIED, append: bool = False,
+                 durable: bool = True):
+        self.columns = tuple(columns)
+        self.path = path
+        self.rows_written = 0
+        if path == "-":
+            self._f, self._own, self.durable = sys.stdout, False, False
+        else:
+            self._f = Path(path).open("a" if append else "w", encoding="utf-8")
+            self._own, self.durable = True, durable
+
+    @staticmethod
+    def file_meta(res: FileResult) -> Dict:
+        return {
+            "file": res.file_name,
+            "vendor": res.vendor,
+            "ocr_used": res.ocr_used,
+            "pages": res.pages,
+            "text_cached": res.text_cached,
+            "elapsed_ms": round(sum(res.timings.values()) * 1000, 1),
+        }
+
+    def write_result(self, res: FileResult):
+        self._emit(res.rows, self.file_meta(res))
+
+    def write_rows(self, rows: List[Dict]):
+        self._emit(rows, None)
+
+    def _emit(self, rows: List[Dict], meta: Optional[Dict]):
+        if not rows:
+            return
+        cols = self.columns
+        lines = []
+        for r in rows:
+            obj = {c: r.get(c, "") for c in cols}
+            if meta is not None:
+                obj["_file"] = meta
+            lines.append(json.dumps(obj, ensure_ascii=False, separators=(",", ":")))
+        lines.append("")
+        self._f.write("\n".join(lines))
+        self._f.flush()
+        if self.durable:
+            os.fsync(self._f.fileno())
+        self.rows_written += len(rows)
+
+    def close(self):
+        if self._own and not self._f.closed:
+            self._f.close()
+
+
+class BufferedRowSink(RowSink):
+    """Collects rows and writes them with write_rows() on close (non-streaming formats)."""
+
+    def __init__(self, path, fmt: str, columns=COLUMNS_UNIFIED):
+        self.path, self.fmt = path, fmt
+        self.columns = tuple(columns)
+        self.rows: List[Dict] = []
+        self.rows_written = 0
+
+    def write_rows(self, rows: List[Dict]):
+        self.rows.extend(rows)
+        self.rows_written += len(rows)
+
+    def close(self):
+        rows, self.rows = self.rows, []
+        if rows or self.rows_written == 0:
+            write_rows(self.path, rows, self.fmt, self.columns)
+
+
+class XlsxSink(RowSink):
+    """
+    XLSX export on openpyxl write-only worksheets (no cell object graph).
+
+    Write-only sheets need column widths before the first row, so rows are
+    pickled to a temp spool as they arrive while per-sheet widths are
+    tracked incrementally; close() replays the spool once, appending each
+    row to "Invoice Rows" and (vendor_sheets=True) to its FedEx /
+    Lightning / Generic sheet, then adds a Totals sheet built from
+    running sums. Memory stays flat regardless of row count.
+    """
+
+    SHEET_ALL = "Invoice Rows"
+    VENDOR_SHEETS = (("FedEx", "FedEx"), ("Lightning Messenger Express", "Lightning"))
+    GENERIC_SHEET = "Generic"
+
+    def __init__(self, path, columns=COLUMNS_UNIFIED, vendor_sheets: bool = False):
+        from openpyxl import Workbook  # noqa: F401  (fail early if missing)
+        if path == "-":
+            raise ValueError("xlsx output needs a file path")
+        self.path = path
+        self.columns = tuple(columns)
+        self.vendor_sheets = vendor_sheets
+        self.rows_written = 0
+        self._spool = tempfile.TemporaryFile(prefix="sir_xlsx_")
+        header = [len(display_label(c)) for c in self.columns]
+        self._widths: Dict[str, List[int]] = {self.SHEET_ALL: list(header)}
+        if vendor_sheets:
+            for _, sheet in self.VENDOR_SHEETS:
+                self._widths[sheet] = list(header)
+            self._widths[self.GENERIC_SHEET] = list(header)
+        # (vendor, invoice id) -> [rows, amount]
+        self._totals: Dict[Tuple[str, str], List] = {}
+
+    def _sheet_for(self, vendor: str) -> str:
+        for v, sheet in self.VENDOR_SHEETS:
+            if vendor == v:
+                return sheet
+        return self.GENERIC_SHEET
+
+    def write_rows(self, rows: List[Dict]):
+        if not rows:
+            return
+        cols = self.columns
+        batch = [[r.get(c, "") for c in cols] for r in rows]
+        pickle.dump(batch, self._spool, protocol=pickle.HIGHEST_PROTOCOL)
+        vi = cols.index("Vendor") if "Vendor" in cols else None
+        for r, vals in zip(rows, batch):
+            lens = [len(str(v)) for v in vals]
+            targets = [self._widths[self.SHEET_ALL]]
+            if self.vendor_sheets:
+                targets.append(self._widths[self._sheet_for(vals[vi] if vi is not None else "")])
+            for w in targets:
+                for i, n in enumerate(lens):
+                    if n > w[i]:
+                        w[i] = n
+            amt = r.get("Amount")
+            a = amt if isinstance(amt, (int, float)) else amount_to_float(amt)
+            t = self._totals.setdefault((r.get("Vendor", ""), r.get("InvoiceID", "")), [0, 0.0])
+            t[0] += 1
+            t[1] += a or 0.0
+        self.rows_written += len(rows)
+
+    def _replay(self):
+        self._spool.seek(0)
+        while True:
+            try:
+                yield from pickle.load(self._spool)
+            except EOFError:
+                return
+
+    def close(self):
+        if self._spool is None:
+            return
+        from openpyxl import Workbook
+        from openpyxl.utils import get_column_letter
         try:
-            # If the path is a local file, open directly
-            if url.lower().endswith('.png') or url.lower().endswith('.jpg') or url.lower().endswith('.jpeg'):
-                img = Image.open(url).convert("RGBA")
-                img.thumbnail(max_size, Image.LANCZOS)
-                return img
-            # Otherwise, treat as URL
-            r = requests.get(url, timeout=8)
-            r.raise_for_status()
-            img = Image.open(BytesIO(r.content)).convert("RGBA")
-            img.thumbnail(max_size, Image.LANCZOS)
-            return img
-        except Exception:
-            return None
+            wb = Workbook(write_only=True)
+            sheets = {}
+            for name, widths in self._widths.items():
+                ws = wb.create_sheet(name)
+                for i, n in enumerate(widths, 1):
+                    ws.column_dimensions[get_column_letter(i)].width = min(max(12, n + 2), 60)
+                # header with display labels
+                ws.append([display_label(c) for c in self.columns])
+                sheets[name] = ws
+            vi = self.columns.index("Vendor") if "Vendor" in self.columns else None
+            all_ws = sheets[self.SHEET_ALL]
+            for vals in self._replay():
+                # None (not "") lets write-only sheets skip the empty cell entirely
+                vals = [None if v == "" else v for v in vals]
+                all_ws.append(vals)
+                if self.vendor_sheets:
+                    sheets[self._sheet_for(vals[vi] if vi is not None else "")].append(vals)
+            self._write_totals(wb.create_sheet("Totals"), get_column_letter)
+            wb.save(self.path)
+        finally:
+            self._spool.close()
+            self._spool = None
+
+    def _write_totals(self, ws, get_column_letter):
+        for i, w in enumerate((30, 22, 10, 16), 1):
+            ws.column_dimensions[get_column_letter(i)].width = w
+        ws.append(["Vendor", "InvoiceID", "Rows", "Amount"])
+        by_vendor: Dict[str, List] = {}
+        for (vendor, inv), (n, amt) in sorted(self._totals.items()):
+            ws.append([vendor, inv, n, round(amt, 2)])
+            v = by_vendor.setdefault(vendor, [0, 0.0])
+            v[0] += n
+            v[1] += amt
+        ws.append([])
+        for vendor, (n, amt) in sorted(by_vendor.items()):
+            ws.append([f"{vendor} total", "", n, round(amt, 2)])
+        ws.append(["Grand total", "", sum(v[0] for v in by_vendor.values()),
+                   round(sum(v[1] for v in by_vendor.values()), 2)])
+
+
+# Typed columnar schema for the unified rows (Parquet / Arrow IPC)
+ARROW_DECIMAL_COLUMNS = {"Amount": 2, "UnitPrice": 4}   # column -> scale
+ARROW_DATE_COLUMNS = ("InvoiceDate", "DueDate")
+ARROW_DICT_COLUMNS = ("InvoiceFileName", "Vendor", "InvoiceID", "Description",
+                      "Currency", "PrimaryClientCode")
+ARROW_FLOAT_COLUMNS = ("Quantity", "ClientMatchScore")
+ARROW_ROW_GROUP_ROWS = 65536
+
+
+def _to_decimal(v, scale: int):
+    if v is None or v == "":
+        return None
+    try:
+        return Decimal(str(v).replace(",", "").replace("$", "").strip()).quantize(
+            Decimal(1).scaleb(-scale))
+    except (InvalidOperation, ValueError):
+        return None
+
+
+def _to_date(v):
+    s = str(v or "").strip()
+    if not s:
+        return None
+    try:
+        return datetime.strptime(normalize_date(s), "%Y-%m-%d").date()
+    except ValueError:
+        return None
+
+
+class ArrowSink(RowSink):
+    """
+    Columnar export of COLUMNS_UNIFIED via pyarrow (optional dependency):
+    dates as date32, Amount/UnitPrice as decimal128, low-cardinality text
+    (vendor, client code, invoice id, …) dictionary-encoded, numbers as
+    floats. Rows are converted once and written in row groups of
+    ARROW_ROW_GROUP_ROWS, so readers never re-parse strings.
+
+    fmt="parquet" writes a Parquet file; fmt="arrow" an Arrow IPC (Feather
+    v2) file. Dictionaries only ever grow, so every batch is a valid delta.
+    Unparsable dates/amounts are written as nulls.
+    """
 
-    def show_launch_splash(self):
-        if self._splash is not None:
+    def __init__(self, path, fmt: str = "parquet", columns=COLUMNS_UNIFIED,
+                 row_group_rows: int = ARROW_ROW_GROUP_ROWS):
+        if not PYARROW_OK:
+            raise ImportError("pyarrow not installed (pip install pyarrow)")
+        if path == "-":
+            raise ValueError(f"{fmt} output needs a file path")
+        import pyarrow as pa
+        self._pa = pa
+        self.path, self.fmt = path, fmt
+        self.columns = tuple(columns)
+        self.row_group_rows = max(1, int(row_group_rows))
+        self.rows_written = 0
+        fields = []
+        for c in self.columns:
+            if c in ARROW_DECIMAL_COLUMNS:
+                t = pa.decimal128(18, ARROW_DECIMAL_COLUMNS[c])
+            elif c in ARROW_DATE_COLUMNS:
+                t = pa.date32()
+            elif c in ARROW_FLOAT_COLUMNS:
+                t = pa.float64()
+            elif c in ARROW_DICT_COLUMNS:
+                t = pa.dictionary(pa.int32(), pa.string())
+            else:
+                t = pa.string()
+            fields.append(pa.field(c, t))
+        self.schema = pa.schema(fields, metadata={"app": APP_VERSION})
+        # dictionary columns: value -> code, values in code order
+        self._codes: Dict[str, Dict[str, int]] = {c: {} for c in self.columns
+                                                   if c in ARROW_DICT_COLUMNS}
+        self._values: Dict[str, List[str]] = {c: [] for c in self._codes}
+        self._buf: Dict[str, List] = {c: [] for c in self.columns}
+        self._buffered = 0
+        if fmt == "parquet":
+            import pyarrow.parquet as pq
+            self._writer = pq.ParquetWriter(str(path), self.schema, compression="zstd")
+        else:
+            import pyarrow.ipc as ipc
+            self._writer = ipc.new_file(str(path), self.schema,
+                                        options=ipc.IpcWriteOptions(emit_dictionary_deltas=True))
+
+    def _convert(self, c: str, v):
+        if c in self._codes:
+            if v is None or v == "":
+                return None
+            v = str(v)
+            code = self._codes[c].get(v)
+            if code is None:
+                code = self._codes[c][v] = len(self._values[c])
+                self._values[c].append(v)
+            return code
+        if c in ARROW_DECIMAL_COLUMNS:
+            return _to_decimal(v, ARROW_DECIMAL_COLUMNS[c])
+        if c in ARROW_DATE_COLUMNS:
+            return _to_date(v)
+        if c in ARROW_FLOAT_COLUMNS:
+            f = v if isinstance(v, (int, float)) else amount_to_float(v)
+            return float(f) if f is not None else None
+        return "" if v is None else str(v)
+
+    def write_rows(self, rows: List[Dict]):
+        buf, conv = self._buf, self._convert
+        for r in rows:
+            for c in self.columns:
+                buf[c].append(conv(c, r.get(c, "")))
+        self._buffered += len(rows)
+        self.rows_written += len(rows)
+        if self._buffered >= self.row_group_rows:
+            self._flush()
+
+    def _flush(self):
+        if not self._buffered:
+            return
+        pa = self._pa
+        arrays = []
+        for f in self.schema:
+            vals = self._buf[f.name]
+            if f.name in self._codes:
+                arrays.append(pa.DictionaryArray.from_arrays(
+                    pa.array(vals, type=pa.int32()),
+                    pa.array(self._values[f.name], type=pa.string())))
+            else:
+                arrays.append(pa.array(vals, type=f.type))
+            vals.clear()
+        batch = pa.record_batch(arrays, schema=self.schema)
+        if self.fmt == "parquet":
+            self._writer.write_batch(batch, row_group_size=batch.num_rows)
+        else:
+            self._writer.write_batch(batch)
+        self._buffered = 0
+
+    def close(self):
+        if self._writer is None:
+            return
+        try:
+            self._flush()
+        finally:
+            self._writer.close()
+            self._writer = None
+
+
+class RollingRowSink(RowSink):
+    """
+    Appends to the file named by datetime.now().strftime(pattern), so
+    "invoices-%Y%m%d.csv" starts a new file each day. Only appendable
+    formats (csv / ndjson); the current file is kept open between writes.
+    """
+
+    def __init__(self, pattern: str, fmt: str):
+        if fmt not in ("csv", "ndjson"):
+            raise ValueError(f"rolling output must be csv or ndjson, not {fmt}")
+        self.pattern, self.fmt = pattern, fmt
+        self.path = ""
+        self.rows_written = 0
+        self._sink: Optional[RowSink] = None
+
+    def _current(self) -> RowSink:
+        path = self.pattern if self.pattern == "-" else datetime.now().strftime(self.pattern)
+        if self._sink is None or path != self.path:
+            self.close()
+            if path != "-":
+                Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._sink = open_row_sink(path, self.fmt, append=True)
+            self.path = path
+        return self._sink
+
+    def write_result(self, res: FileResult):
+        self._current().write_result(res)
+        self.rows_written += len(res.rows)
+
+    def write_rows(self, rows: List[Dict]):
+        self._current().write_rows(rows)
+        self.rows_written += len(rows)
+
+    def close(self):
+        if self._sink is not None:
+            sink, self._sink = self._sink, None
+            sink.close()
+
+
+def open_row_sink(path, fmt: str, append: bool = False,
+                  vendor_sheets: bool = XLSX_VENDOR_SHEETS,
+                  columns=COLUMNS_UNIFIED) -> RowSink:
+    if fmt == "csv":
+        return CsvRowSink(path, columns, append=append)
+    if fmt == "xlsx":
+        return XlsxSink(path, columns, vendor_sheets=vendor_sheets)
+    if fmt == "ndjson":
+        return NdjsonSink(path, columns, append=append)
+    if fmt in ("parquet", "arrow"):
+        return ArrowSink(path, fmt, columns)
+    return BufferedRowSink(path, fmt, columns)
+
+
+def write_rows(path: str, rows: List[Dict], fmt: str, columns=COLUMNS_UNIFIED):
+    """Writes rows in fmt to path ("-" = stdout for csv/json)."""
+    if fmt == "json":
+        data = json.dumps([{c: r.get(c, "") for c in columns} for r in rows],
+                          ensure_ascii=False, indent=1)
+        if path == "-":
+            sys.stdout.write(data + "\n")
+        else:
+            Path(path).write_text(data, encoding="utf-8")
+    elif fmt == "xlsx":
+        if path == "-":
+            raise ValueError("xlsx output needs a file path")
+        write_rows_xlsx(Path(path), rows, columns)   # CLI normally streams via XlsxSink
+    elif path == "-":
+        w = csv.writer(sys.stdout, lineterminator="\n")
+        w.writerow([display_label(c) for c in columns])
+        for r in rows:
+            w.writerow([r.get(c, "") for c in columns])
+    else:
+        write_rows_csv(Path(path), rows, columns)
+
+
+# ======================================
+# Delta export (changes since the last submission)
+# ======================================
+DELTA_KEY_COLUMNS = ("InvoiceID", "Vendor", "FedEx_CustRef", "Amount")
+DELTA_COLUMNS = COLUMNS_UNIFIED + ("ChangeType",)
+
+
+def _digest(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class DeltaTracker:
+    """
+    Diffs a run's rows against the baseline saved by the previous delta
+    export. A row's key is its DELTA_KEY_COLUMNS plus the source file's hash,
+    numbered by occurrence so identical lines on one invoice stay distinct;
+    its content digest covers every column. Both are stored as digests, so
+    the comparison is one dict probe per row.
+
+    add() returns the rows that are new ("added") or whose content changed
+    ("modified"); removed() returns baseline rows the run no longer has.
+    Rows of files marked with keep_file() (failed this run) are carried over
+    instead of being reported as removed. save() makes this run the baseline.
+    """
+    VERSION = 1
+
+    def __init__(self, baseline_path: Path, columns=COLUMNS_UNIFIED):
+        self.path = Path(baseline_path)
+        self.columns = list(columns)
+        self.base: Dict[str, List] = {}      # key digest -> [content digest, values]
+        self.current: Dict[str, List] = {}
+        self.counts = {"added": 0, "modified": 0, "removed": 0, "unchanged": 0}
+        self._occurrences: Dict[str, int] = {}
+        self._kept_files: set = set()
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return   # first delta export: every row is "added"
+        except ValueError as ex:
+            # refuse rather than re-send everything as new
+            raise ValueError(f"unreadable delta baseline {self.path}: {ex}")
+        if data.get("version") != self.VERSION or data.get("columns") != self.columns:
+            raise ValueError(f"delta baseline {self.path} was written by another version")
+        self.base = data.get("rows", {})
+
+    def add(self, rows: List[Dict], file_hash: str = "") -> List[Dict]:
+        cols = self.columns
+        out: List[Dict] = []
+        for r in rows:
+            ident = "\x1f".join([str(r.get(c, "")) for c in DELTA_KEY_COLUMNS] + [file_hash])
+            n = self._occurrences.get(ident, 0)
+            self._occurrences[ident] = n + 1
+            key = _digest(f"{ident}\x1f{n}")
+            vals = [r.get(c, "") for c in cols]
+            content = _digest("\x1f".join(map(str, vals)))
+            self.current[key] = [content, vals]
+            old = self.base.get(key)
+            if old is None:
+                change = "added"
+            elif old[0] != content:
+                change = "modified"
+            else:
+                self.counts["unchanged"] += 1
+                continue
+            self.counts[change] += 1
+            row = dict(zip(cols, vals))
+            row["ChangeType"] = change
+            out.append(row)
+        return out
+
+    def keep_file(self, file_name: str):
+        self._kept_files.add(file_name)
+
+    def removed(self) -> List[Dict]:
+        cols = self.columns
+        fi = cols.index("InvoiceFileName")
+        out: List[Dict] = []
+        for key, entry in self.base.items():
+            if key in self.current:
+                continue
+            if entry[1][fi] in self._kept_files:
+                self.current[key] = entry
+                continue
+            row = dict(zip(cols, entry[1]))
+            row["ChangeType"] = "removed"
+            out.append(row)
+        self.counts["removed"] = len(out)
+        return out
+
+    def save(self):
+        data = json.dumps({"version": self.VERSION, "app": APP_VERSION, "columns": self.columns,
+                           "saved": datetime.now().isoformat(timespec="seconds"),
+                           "rows": self.current}, ensure_ascii=False, separators=(",", ":"))
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        tmp.write_text(data, encoding="utf-8")
+        os.replace(tmp, self.path)
+
+
+class DeltaSink(RowSink):
+    """
+    Streams only added / modified rows (DELTA_COLUMNS) to inner as files
+    finish; close() appends the removed rows and, if every write succeeded,
+    saves the run as the new baseline.
+    """
+
+    def __init__(self, inner: RowSink, tracker: DeltaTracker):
+        self.inner, self.tracker = inner, tracker
+        self.path = inner.path
+        self.rows_written = 0
+        self._failed = False
+        self._closed = False
+
+    def _emit(self, rows: List[Dict]):
+        if not rows:
             return
-        self._splash = tk.Toplevel(self)
         try:
-            self._splash.iconbitmap(
-                r"C:\Users\rscottdeperto\Desktop\Invoice Testing\Coding\assets\icon64 (1).ico")
+            self.inner.write_rows(rows)
         except Exception:
-            pass
-        self._splash.overrideredirect(True)
-        self._splash.attributes("-topmost", True)
-        frm = tk.Frame(self._splash, bd=1, relief="ridge")
-        frm.pack(fill="both", expand=True, padx=6, pady=6)
-        img = self._load_image_from_url(SPLASH_IMAGE_URL)
-        if img is not None:
-            imgtk = ImageTk.PhotoImage(img)
-            lbl = tk.Label(frm, image=imgtk)
-            lbl.image = imgtk
-            lbl.pack(padx=10, pady=10)
+            self._failed = True
+            raise
+        self.rows_written += len(rows)
+
+    def write_result(self, res: FileResult):
+        self._emit(self.tracker.add(res.rows, res.file_hash))
+
+    def write_rows(self, rows: List[Dict]):
+        self._emit(self.tracker.add(rows))
+
+    def file_failed(self, file_name: str):
+        self.tracker.keep_file(file_name)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            if not self._failed:
+                self._emit(self.tracker.removed())
+        finally:
+            self.inner.close()
+        if not self._failed:
+            self.tracker.save()
+
+
+# ======================================
+# Headless CLI (process / batch)
+# ======================================
+EXIT_OK = 0        # every file processed
+EXIT_PARTIAL = 1   # some files failed; output holds the rest
+EXIT_USAGE = 2     # bad arguments (argparse also uses 2)
+EXIT_FAILED = 3    # nothing usable: no inputs, every file failed, or output not written
+
+OUTPUT_FORMATS = ("csv", "xlsx", "json", "ndjson", "parquet", "arrow")
+OUTPUT_SUFFIXES = {".feather": "arrow", ".ipc": "arrow", ".jsonl": "ndjson"}
+
+# startup-check: cold import of this script in a fresh interpreter
+STARTUP_BUDGET_MS = 300
+# ... and, with --gui, cold launch until the main window has been drawn
+STARTUP_GUI_BUDGET_MS = 1500
+STARTUP_HEAVY_MODULES = ("fitz", "pymupdf", "PIL.Image", "pytesseract", "tesserocr",
+                         "requests", "openpyxl", "tkinter", "customtkinter")
+# expected in a GUI launch: the toolkit, plus PIL for the window's logo
+STARTUP_GUI_MODULES = ("tkinter", "customtkinter", "PIL.Image")
+_STARTUP_PROBE = (
+    "import sys, time, json, importlib.util as u\n"
+    "t = time.perf_counter()\n"
+    "spec = u.spec_from_file_location('smart_invoice_runner_probe', sys.argv[1])\n"
+    "spec.loader.exec_module(u.module_from_spec(spec))\n"
+    "ms = (time.perf_counter() - t) * 1000\n"
+    "print(json.dumps({'ms': ms, 'loaded': [m for m in sys.argv[2].split(',') if m in sys.modules]}))\n"
+)
+# Runs the script as the desktop app; mainloop is replaced by one update()
+# (window built, splash handled, first paint done) and the window closed.
+_STARTUP_GUI_PROBE = (
+    "import sys, time, json, runpy\n"
+    "t = time.perf_counter()\n"
+    "import tkinter\n"
+    "def first_paint(self, n=0):\n"
+    "    self.update()\n"
+    "    ms = (time.perf_counter() - t) * 1000\n"
+    "    print(json.dumps({'ms': ms, 'loaded': [m for m in sys.argv[2].split(',') if m in sys.modules]}), flush=True)\n"
+    "    self.destroy()\n"
+    "tkinter.Misc.mainloop = first_paint\n"
+    "sys.argv = sys.argv[1:2]\n"
+    "runpy.run_path(sys.argv[0], run_name='__main__')\n"
+)
+
+
+def collect_pdfs(inputs: List[str], recursive: bool = False) -> Tuple[List[Path], List[str]]:
+    """Expands files/folders into PDF paths. Returns (files, missing inputs)."""
+    files: List[Path] = []
+    missing: List[str] = []
+    for raw in inputs:
+        p = Path(raw)
+        if p.is_file():
+            files.append(p)
+        elif p.is_dir():
+            it = p.rglob("*") if recursive else p.iterdir()
+            files.extend(sorted(f for f in it if f.is_file()
+                                and f.suffix.lower() == ".pdf"))
         else:
-            tk.Label(frm, text="Loading…", font=(
-                "Segoe UI", 14, "bold")).pack(padx=16, pady=16)
-        self.update_idletasks()
-        sw, sh = self.winfo_screenwidth(), self.winfo_screenheight()
-        w, h = 640, 360
-        x, y = (sw - w)//2, (sh - h)//2
-        self._splash.geometry(f"{w}x{h}+{x}+{y}")
-
-    def hide_launch_splash(self):
-        if self._splash is not None:
+            missing.append(raw)
+    return files, missing
+
+
+def build_cli_parser():
+    import argparse
+    ap = argparse.ArgumentParser(
+        prog=Path(sys.argv[0]).name,
+        description=f"{APP_VERSION} headless mode. Run without arguments for the GUI.")
+    sub = ap.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("process", aliases=["batch"],
+                       help="analyze PDFs and write the unified rows")
+    p.add_argument("inputs", nargs="+", help="PDF files and/or folders")
+    p.add_argument("-m", "--client-map", help="Client Code Map CSV (CustRef -> PrimaryClientCode)")
+    p.add_argument("--fuzzy", action="store_true",
+                   help="also map OCR-noisy references (adds ClientMatchScore < 1)")
+    p.add_argument("-o", "--output", help='rows output path ("-" = stdout); omit for summary only')
+    p.add_argument("-f", "--format", choices=OUTPUT_FORMATS,
+                   help="output format (default: from --output suffix, else csv)")
+    p.add_argument("-w", "--workers", type=int, default=ANALYZE_WORKERS,
+                   help=f"worker processes (default {ANALYZE_WORKERS})")
+    p.add_argument("-r", "--recursive", action="store_true", help="descend into sub-folders")
+    p.add_argument("--append", action="store_true",
+                   help="csv/ndjson: append to an existing output instead of replacing it")
+    p.add_argument("--vendor-sheets", action=argparse.BooleanOptionalAction,
+                   default=XLSX_VENDOR_SHEETS,
+                   help="xlsx: add FedEx / Lightning / Generic sheets")
+    p.add_argument("--delta", metavar="BASELINE",
+                   help="write only rows added / modified / removed since BASELINE (ChangeType "
+                        "column); BASELINE is created on first use and replaced after each export")
+    p.add_argument("--manifest", action=argparse.BooleanOptionalAction, default=MANIFEST_ENABLED,
+                   help=f"reuse rows of unchanged files from each folder's {MANIFEST_NAME}")
+    p.add_argument("--summary", help="write the JSON summary here instead of stdout")
+    p.add_argument("--progress", action="store_true", help="per-file progress on stderr")
+
+    w = sub.add_parser("watch",
+                       help="process PDFs as they arrive in one or more folders")
+    w.add_argument("folders", nargs="+", help="folders to watch")
+    w.add_argument("-o", "--output", required=True,
+                   help='rows output, appended; strftime codes roll it (e.g. "ap-%%Y%%m%%d.csv", "-" = stdout)')
+    w.add_argument("-f", "--format", choices=("csv", "ndjson"),
+                   help="output format (default: from --output suffix, else csv)")
+    w.add_argument("-m", "--client-map", help="Client Code Map CSV (CustRef -> PrimaryClientCode)")
+    w.add_argument("--fuzzy", action="store_true",
+                   help="also map OCR-noisy references (adds ClientMatchScore < 1)")
+    w.add_argument("-w", "--workers", type=int, default=ANALYZE_WORKERS,
+                   help=f"worker processes (default {ANALYZE_WORKERS})")
+    w.add_argument("-r", "--recursive", action="store_true", help="also watch sub-folders")
+    w.add_argument("--poll", type=float, default=WATCH_POLL_S,
+                   help=f"seconds between scans (default {WATCH_POLL_S})")
+    w.add_argument("--settle", type=float, default=WATCH_SETTLE_S,
+                   help=f"seconds a file must stay unchanged (default {WATCH_SETTLE_S})")
+    w.add_argument("--existing", action="store_true",
+                   help="also process PDFs already in the folders at start (those a previous "
+                        "watch already handled are still skipped)")
+    w.add_argument("--once", action="store_true",
+                   help="process the PDFs present now (implies --existing), then exit")
+    w.add_argument("--manifest", action=argparse.BooleanOptionalAction, default=MANIFEST_ENABLED,
+                   help=f"remember handled files in each folder's {MANIFEST_NAME}, so a restart "
+                        "processes what arrived while stopped and nothing twice")
+    w.add_argument("--summary", help="write the JSON summary here on exit instead of stdout")
+    w.add_argument("-q", "--quiet", action="store_true", help="no per-file log lines on stderr")
+
+    c = sub.add_parser("startup-check",
+                       help="fail if importing the app exceeds the startup budget "
+                            "or pulls in heavy modules eagerly")
+    c.add_argument("--budget-ms", type=float, default=STARTUP_BUDGET_MS,
+                   help=f"import-time budget in ms (default {STARTUP_BUDGET_MS})")
+    c.add_argument("--runs", type=int, default=3, help="fresh interpreters to time (best wins)")
+    c.add_argument("--gui", action="store_true",
+                   help="also time a cold GUI launch until the main window is drawn (needs a display)")
+    c.add_argument("--gui-budget-ms", type=float, default=STARTUP_GUI_BUDGET_MS,
+                   help=f"GUI launch budget in ms (default {STARTUP_GUI_BUDGET_MS})")
+    c.add_argument("--summary", help="write the JSON summary here instead of stdout")
+    return ap
+
+
+def _cli_format(args) -> str:
+    fmt = args.format
+    if not fmt and args.output and args.output != "-":
+        suffix = Path(args.output).suffix.lower()
+        fmt = OUTPUT_SUFFIXES.get(suffix, suffix.lstrip("."))
+        fmt = fmt if fmt in OUTPUT_FORMATS else None
+    return fmt or "csv"
+
+
+def _cli_client_map(args, summary: Dict):
+    """Loads --client-map into summary; returns the map argument for the workers (raises on error)."""
+    client_map = {}
+    if args.client_map:
+        client_map, read, mapped = load_client_map_csv(Path(args.client_map))
+        summary["client_map"] = {"path": args.client_map, "rows": read, "mapped": mapped}
+    return ClientMapIndex(client_map, fuzzy=True) if args.fuzzy and client_map else client_map
+
+
+def cli_process(args) -> int:
+    t0 = time.perf_counter()
+    summary = {"app": APP_VERSION, "command": args.command, "ok": False}
+    fmt = _cli_format(args)
+
+    try:
+        map_arg = _cli_client_map(args, summary)
+    except Exception as ex:
+        summary["error"] = f"client map: {ex}"
+        return _cli_finish(summary, args, EXIT_USAGE, t0)
+
+    files, missing = collect_pdfs(args.inputs, args.recursive)
+    summary["missing_inputs"] = missing
+    if not files:
+        summary["error"] = "no PDF files found"
+        return _cli_finish(summary, args, EXIT_FAILED, t0)
+
+    if args.delta and not args.output:
+        summary["error"] = "--delta needs --output"
+        return _cli_finish(summary, args, EXIT_USAGE, t0)
+    sink = None
+    if args.output:
+        try:
+            if args.delta:
+                tracker = DeltaTracker(Path(args.delta))
+                sink = DeltaSink(open_row_sink(args.output, fmt, append=args.append,
+                                               vendor_sheets=args.vendor_sheets,
+                                               columns=DELTA_COLUMNS), tracker)
+            else:
+                sink = open_row_sink(args.output, fmt, append=args.append,
+                                     vendor_sheets=args.vendor_sheets)
+        except Exception as ex:
+            summary["error"] = f"output: {ex}"
+            return _cli_finish(summary, args, EXIT_FAILED, t0)
+        summary["output"] = {"path": args.output, "format": fmt}
+
+    # rows go straight to the sink; nothing is kept per run
+    run = AnalyzeRun(total_files=len(files), keep_rows=False)
+    analyze = iter_analyze_incremental if args.manifest else iter_analyze
+    gen = analyze(files, client_map=map_arg, workers=max(1, args.workers))
+    try:
+        for f, res, err in gen:
+            run.add(f, res, err)
+            if sink is not None:
+                if err:
+                    sink.file_failed(f.name)
+                elif res.rows:
+                    sink.write_result(res)
+            if args.progress:
+                state = "error" if err else ("skipped" if res.skipped else f"{len(res.rows)} rows"
+                                             + (" (unchanged)" if res.reused else "")
+                                             + (" (streamed)" if res.streamed else ""))
+                print(f"[{run.done}/{run.total_files}] {f.name}: {state}", file=sys.stderr)
+        if sink is not None:
+            sink.close()
+    except Exception as ex:
+        gen.close()
+        if sink is not None:
             try:
-                self._splash.destroy()
+                sink.close()
             except Exception:
                 pass
-            self._splash = None
-
-    # ---- Actions (inside class) ----
-    def _browse_file(self):
-        p = filedialog.askopenfilename(
-            filetypes=[("PDF", "*.pdf"), ("All", "*.*")]
-        )
-        if p:
-            self.var_path.set(p)
-
-    def _browse_folder(self):
-        p = filedialog.askdirectory()
-        if p:
-            self.var_path.set(p)
-
-    def _browse_csv(self):
-        p = filedialog.askopenfilename(
-            filetypes=[("CSV", "*.csv"), ("All", "*.*")]
-        )
-        if p:
-            self.var_csv.set(p)
-
-    def _load_map(self):
-        p = Path(self.var_csv.get().strip()
-                 ) if self.var_csv.get().strip() else None
-        if not p or not p.exists():
-            messagebox.showerror("CSV", "Select a valid CSV first.")
-            return
+        summary["error"] = f"output: {ex}"
+        summary["files_done"] = run.done
+        return _cli_finish(summary, args, EXIT_FAILED, t0)
+
+    summary.update({
+        "files": run.total_files,
+        "failed": len(run.errors),
+        "skipped": run.skipped_count,
+        "streamed": run.streamed_count,
+        "rows": run.total_rows,
+        "vendors": {"fedex": run.fedex_count, "lightning": run.lightning_count,
+                    "other": run.generic_count},
+        "reused": run.reused_count,
+        "cached": run.cached_count,
+        "ocr_page_cache": {"hits": run.ocr_hits, "misses": run.ocr_misses},
+        "errors": run.errors,
+    })
+    if args.delta:
+        summary["delta"] = dict(sink.tracker.counts, baseline=args.delta)
+    if run.errors and len(run.errors) >= run.total_files:
+        code = EXIT_FAILED
+    elif run.errors or missing:
+        code = EXIT_PARTIAL
+    else:
+        code = EXIT_OK
+    return _cli_finish(summary, args, code, t0)
+
+
+def _cli_finish(summary: Dict, args, code: int, t0: float) -> int:
+    summary["ok"] = code == EXIT_OK
+    summary["exit_code"] = code
+    summary["elapsed_s"] = round(time.perf_counter() - t0, 3)
+    text = json.dumps(summary, indent=1)
+    if getattr(args, "summary", None):
+        Path(args.summary).write_text(text, encoding="utf-8")
+    elif getattr(args, "output", None) == "-":
+        print(text, file=sys.stderr)   # stdout carries the rows
+    else:
+        print(text)
+    return code
+
+
+def _run_startup_probe(probe: str, runs: int) -> Tuple[List[float], set, str]:
+    """Runs a timing probe in fresh interpreters: (ms per run, heavy modules seen, error)."""
+    import subprocess
+    timings: List[float] = []
+    loaded = set()
+    for _ in range(max(1, runs)):
         try:
-            read, mapped = self.load_client_map_csv(p)
-            self.set_status(f"Loaded map: rows={read}, mapped={mapped}")
-            messagebox.showinfo("Load Map", "Load Complete")
-        except Exception as ex:
-            messagebox.showerror("CSV", f"Failed to load: {ex}")
-
-    def _export_xlsx(self):
-        path = filedialog.asksaveasfilename(defaultextension=".xlsx",
-                                            filetypes=[
-                                                ("Excel Workbook", "*.xlsx")],
-                                            initialfile="invoice_rows.xlsx")
-        if not path:
-            return
-        self.export_xlsx(Path(path))
+            proc = subprocess.run(
+                [sys.executable, "-c", probe, str(Path(__file__).resolve()),
+                 ",".join(STARTUP_HEAVY_MODULES)],
+                capture_output=True, text=True, timeout=120)
+        except subprocess.TimeoutExpired:
+            return timings, loaded, "probe timed out"
+        lines = (proc.stdout or "").strip().splitlines()
+        if proc.returncode != 0 or not lines:
+            err = (proc.stderr or "").strip().splitlines()[-1:]
+            return timings, loaded, err[0] if err else "probe failed"
+        result = json.loads(lines[-1])
+        timings.append(round(result["ms"], 1))
+        loaded.update(result["loaded"])
+    return timings, loaded, ""
+
+
+def cli_startup_check(args) -> int:
+    """
+    Times a cold headless import in fresh interpreters and checks lazy imports.
+    --gui also times a cold desktop launch up to the first drawn main window
+    (heavy modules outside STARTUP_GUI_MODULES must stay unloaded there too).
+    """
+    t0 = time.perf_counter()
+    summary = {"app": APP_VERSION, "command": args.command, "ok": False,
+               "budget_ms": args.budget_ms}
+    timings, loaded, err = _run_startup_probe(_STARTUP_PROBE, args.runs)
+    if err:
+        summary["error"] = err
+        return _cli_finish(summary, args, EXIT_FAILED, t0)
+    summary["import_ms"] = min(timings)
+    summary["runs_ms"] = timings
+    summary["heavy_modules_loaded"] = sorted(loaded)
+    ok = summary["import_ms"] <= args.budget_ms and not loaded
+
+    if args.gui:
+        summary["gui_budget_ms"] = args.gui_budget_ms
+        timings, loaded, err = _run_startup_probe(_STARTUP_GUI_PROBE, args.runs)
+        if err:
+            summary["error"] = f"gui: {err}"
+            return _cli_finish(summary, args, EXIT_FAILED, t0)
+        loaded -= set(STARTUP_GUI_MODULES)
+        summary["gui_ms"] = min(timings)
+        summary["gui_runs_ms"] = timings
+        summary["gui_heavy_modules_loaded"] = sorted(loaded)
+        ok = ok and summary["gui_ms"] <= args.gui_budget_ms and not loaded
+    return _cli_finish(summary, args, EXIT_OK if ok else EXIT_FAILED, t0)
+
+
+# ======================================
+# Watch mode (continuous folder intake)
+# ======================================
+class FolderWatcher:
+    """
+    Polls folders for PDFs and reports each new or changed one once its
+    (size, mtime) has stayed the same for settle_s seconds, i.e. the
+    writer (scanner, mail rule, copy) is done with it. One scandir per
+    folder per poll; nothing is read until a file is ready. A settled file
+    that stays empty or cannot be opened for give_up_s is handed back
+    through take_failed() instead of being waited on forever.
+
+    With state=True, what has been handled is kept in each folder's
+    manifest (FolderManifest.mark_watched, rows via record), so a restart
+    picks up files that arrived while the watcher was stopped and does not
+    repeat the ones already written.
+    """
 
-    def _export_csv(self):
-        path = filedialog.asksaveasfilename(defaultextension=".csv",
-                                            filetypes=[("CSV", "*.csv")],
-                                            initialfile="invoice_rows.csv")
-        if not path:
+    def __init__(self, folders: List[Path], recursive: bool = False, settle_s: float = WATCH_SETTLE_S,
+                 give_up_s: float = WATCH_GIVE_UP_S, state: bool = False):
+        self.folders = folders
+        self.recursive = recursive
+        self.settle_s = settle_s
+        self.give_up_s = give_up_s
+        self.state = state
+        self.signature = parser_signature()
+        self.map_fp = ""
+        self._pending: Dict[str, Tuple[Tuple[int, int], float]] = {}   # path -> (sig, since)
+        self._done: Dict[str, Tuple[int, int]] = {}                    # path -> sig processed
+        self._busy: set = set()
+        self._blocked: set = set()   # settled but empty / unopenable
+        self._failed: List[Tuple[Path, Tuple[int, int], str]] = []
+        self._manifests: Dict[Path, FolderManifest] = {}
+
+    def _scan_dir(self, folder: str, out: Dict[str, Tuple[int, int]]):
+        try:
+            with os.scandir(folder) as it:
+                for e in it:
+                    if e.name.startswith((".", "~$")):
+                        continue
+                    try:
+                        if e.is_dir():
+                            if self.recursive:
+                                self._scan_dir(e.path, out)
+                        elif e.name.lower().endswith(".pdf"):
+                            st = e.stat()
+                            out[e.path] = (st.st_size, st.st_mtime_ns)
+                    except OSError:
+                        continue   # vanished between listing and stat
+        except OSError:
+            pass   # folder offline (network share); retried next poll
+
+    def snapshot(self) -> Dict[str, Tuple[int, int]]:
+        found: Dict[str, Tuple[int, int]] = {}
+        for folder in self.folders:
+            self._scan_dir(str(folder), found)
+        return found
+
+    def _manifest(self, path: str, folder: Optional[Path] = None) -> FolderManifest:
+        """Manifest of the folder holding path (or of folder itself)."""
+        folder = folder or Path(path).parent
+        m = self._manifests.get(folder)
+        if m is None:
+            m = self._manifests[folder] = FolderManifest(folder)
+        return m
+
+    def restore(self, existing: bool = False):
+        """
+        Start-up state. Files the manifests record as handled are done. In a
+        folder never watched before, everything present counts as done too
+        unless existing is set: the first run starts from now, later runs
+        also pick up what arrived in between.
+        """
+        for folder in self.folders:
+            found: Dict[str, Tuple[int, int]] = {}
+            self._scan_dir(str(folder), found)
+            history = False
+            if self.state:
+                root = self._manifest("", folder)
+                history = root.watched_folder
+                if not history:
+                    root.watched_folder = root.dirty = True
+                for path in found:
+                    sig = self._manifest(path).watched(os.path.basename(path))
+                    if sig is not None:
+                        self._done[path] = sig
+            if existing or history:
+                continue
+            for path, sig in found.items():
+                self._done[path] = sig
+                if self.state:
+                    self._manifest(path).mark_watched(os.path.basename(path), sig)
+        self.save()
+
+    def poll(self, now: float) -> List[Tuple[Path, Tuple[int, int]]]:
+        """Returns (path, sig) for files that are ready to process."""
+        found = self.snapshot()
+        for gone in [p for p in self._done if p not in found]:
+            del self._done[gone]   # deleted: a re-drop of the same name is new again
+        for gone in [p for p in self._pending if p not in found]:
+            del self._pending[gone]
+            self._blocked.discard(gone)
+        ready = []
+        for path, sig in found.items():
+            if path in self._busy or self._done.get(path) == sig:
+                continue
+            prev = self._pending.get(path)
+            if prev is None or prev[0] != sig:
+                self._pending[path] = (sig, now)   # new or still growing
+                self._blocked.discard(path)
+                continue
+            if now - prev[1] < self.settle_s:
+                continue
+            reason = "empty file" if sig[0] == 0 else ""
+            if not reason:
+                try:
+                    with open(path, "rb"):
+                        pass   # still locked by the writer (Windows) -> try again later
+                except OSError as ex:
+                    reason = f"cannot open: {ex.strerror or ex}"
+            if reason:
+                self._blocked.add(path)
+                if now - prev[1] >= self.settle_s + self.give_up_s:
+                    self._give_up(path, reason)
+                continue
+            del self._pending[path]
+            self._blocked.discard(path)
+            self._busy.add(path)
+            ready.append((Path(path), sig))
+        return ready
+
+    def _give_up(self, path: str, reason: str):
+        sig, _ = self._pending.pop(path)
+        self._blocked.discard(path)
+        self._busy.add(path)
+        self._failed.append((Path(path), sig, reason))
+
+    def give_up_blocked(self):
+        """Reports every file still stuck empty / unopenable as failed now (--once)."""
+        for path in list(self._blocked):
+            self._give_up(path, "empty file" if self._pending[path][0][0] == 0 else "cannot open")
+
+    def take_failed(self) -> List[Tuple[Path, Tuple[int, int], str]]:
+        """(path, sig, reason) for files given up on; pass each to finished() once reported."""
+        failed, self._failed = self._failed, []
+        return failed
+
+    def finished(self, path: Path, sig: Tuple[int, int], res: Optional[FileResult] = None):
+        """Done with this version of the file; res (if it was parsed) goes to the manifest."""
+        self._busy.discard(str(path))
+        self._done[str(path)] = sig
+        if self.state:
+            m = self._manifest(str(path))
+            if res is not None and not res.ocr_failed:
+                m.record(path, sig, res, self.signature, self.map_fp)
+            m.mark_watched(path.name, sig)
+
+    def save(self):
+        for m in self._manifests.values():
+            m.save()
+
+    @property
+    def waiting(self) -> int:
+        """Files still changing or settling (stuck empty / unopenable ones excluded)."""
+        return len(self._pending) - len(self._blocked)
+
+
+def cli_watch(args) -> int:
+    """Long-running intake: poll, wait for files to settle, fan out to a process pool, append rows."""
+    import signal
+    from concurrent.futures.process import BrokenProcessPool
+    t0 = time.perf_counter()
+    summary = {"app": APP_VERSION, "command": args.command, "ok": False}
+    fmt = _cli_format(args)
+
+    folders = [Path(f) for f in args.folders]
+    missing = [str(f) for f in folders if not f.is_dir()]
+    summary["folders"] = [str(f) for f in folders]
+    if missing:
+        summary["error"] = f"not a folder: {', '.join(missing)}"
+        return _cli_finish(summary, args, EXIT_USAGE, t0)
+    try:
+        map_arg = _cli_client_map(args, summary)
+    except Exception as ex:
+        summary["error"] = f"client map: {ex}"
+        return _cli_finish(summary, args, EXIT_USAGE, t0)
+    try:
+        sink = RollingRowSink(args.output, fmt)
+    except ValueError as ex:
+        summary["error"] = f"output: {ex}"
+        return _cli_finish(summary, args, EXIT_USAGE, t0)
+
+    stop = threading.Event()
+
+    def _stop(*_):
+        stop.set()
+    for sig_name in ("SIGINT", "SIGTERM"):
+        if hasattr(signal, sig_name):
+            signal.signal(getattr(signal, sig_name), _stop)
+
+    def log(msg: str):
+        if not args.quiet:
+            print(f"{datetime.now():%Y-%m-%d %H:%M:%S} {msg}", file=sys.stderr, flush=True)
+
+    watcher = FolderWatcher(folders, args.recursive, max(0.0, args.settle), state=args.manifest)
+    watcher.map_fp = client_map_fingerprint(map_arg)
+    watcher.restore(existing=args.existing or args.once)
+    workers = max(1, args.workers)
+
+    def new_pool():
+        return ProcessPoolExecutor(max_workers=workers, initializer=_init_analyze_worker,
+                                   initargs=(map_arg,))
+    pool = new_pool()
+    futures: Dict = {}   # future -> (path, sig, submitted at)
+    run = AnalyzeRun(total_files=0, keep_rows=False)
+    fatal = ""
+    log(f"watching {', '.join(summary['folders'])} -> {args.output} ({fmt}, {workers} workers)")
+
+    def collect(fut):
+        nonlocal pool
+        f, sig, started = futures.pop(fut)
+        try:
+            res, err = fut.result()
+        except BrokenProcessPool as e:
+            res, err = None, f"{f.name}: {e}"
+            pool.shutdown(wait=False, cancel_futures=True)
+            pool = new_pool()
+        except Exception as e:
+            res, err = None, f"{f.name}: {e}"
+        run.total_files += 1
+        run.add(f, res, err)
+        watcher.finished(f, sig, res)   # failed files are retried only when they change
+        if err:
+            log(f"{f.name}: error: {err}")
             return
-        self.export_csv(Path(path))
+        if res.rows:
+            sink.write_result(res)
+        state = "skipped (too large)" if res.skipped else f"{len(res.rows)} rows, {res.vendor}"
+        if res.streamed:
+            state += " (streamed)"
+        log(f"{f.name}: {state} in {time.monotonic() - started:.1f}s")
+
+    def report_failed():
+        for f, sig, reason in watcher.take_failed():
+            run.total_files += 1
+            run.add(f, None, f"{f.name}: {reason}")
+            watcher.finished(f, sig)
+            log(f"{f.name}: error: {reason}")
 
-    def _analyze(self):
-        self.set_status("Analyzing…")
-        self.show_status_bubble("Analyzing… Please wait")
-        self.update_idletasks()
+    try:
+        while not stop.is_set():
+            now = time.monotonic()
+            for f, sig in watcher.poll(now):
+                futures[pool.submit(_analyze_worker, f)] = (f, sig, now)
+            report_failed()
+            if args.once and not futures and not watcher.waiting:
+                watcher.give_up_blocked()
+                report_failed()
+                break
+            if futures:
+                done, _ = wait(list(futures), timeout=args.poll, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    collect(fut)
+                watcher.save()
+            else:
+                stop.wait(args.poll)
+        # graceful stop: finish what is running, drop what has not started
+        for fut in list(futures):
+            if fut.cancel():
+                futures.pop(fut)
+        for fut in list(futures):
+            collect(fut)
+    except Exception as ex:
+        fatal = f"output: {ex}"
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+        watcher.save()
         try:
-            self.run_analyze(self.var_path.get().strip())
-        finally:
-            self.hide_status_bubble()
+            sink.close()
+        except Exception as ex:
+            fatal = fatal or f"output: {ex}"
+
+    summary.update({
+        "output": {"path": sink.path or args.output, "format": fmt},
+        "files": run.total_files,
+        "failed": len(run.errors),
+        "skipped": run.skipped_count,
+        "streamed": run.streamed_count,
+        "rows": run.total_rows,
+        "vendors": {"fedex": run.fedex_count, "lightning": run.lightning_count,
+                    "other": run.generic_count},
+        "errors": run.errors,
+    })
+    if fatal:
+        summary["error"] = fatal
+        code = EXIT_FAILED
+    else:
+        code = EXIT_PARTIAL if run.errors else EXIT_OK
+    log(f"stopped: {run.total_files} files, {run.total_rows} rows, {len(run.errors)} errors")
+    return _cli_finish(summary, args, code, t0)
+
+
+def cli_main(argv: Optional[List[str]] = None) -> int:
+    args = build_cli_parser().parse_args(argv)
+    if args.command in ("process", "batch"):
+        return cli_process(args)
+    if args.command == "watch":
+        return cli_watch(args)
+    if args.command == "startup-check":
+        return cli_startup_check(args)
+    return EXIT_USAGE
 
 
 # ======================================
@@ -1780,4 +5139,8 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    multiprocessing.freeze_support()  # required for the pool in frozen builds
+    if GUI_ENABLED:
+        main()
+    else:
+        sys.exit(cli_main(sys.argv[1:]))
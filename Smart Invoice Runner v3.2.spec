@@ -6,7 +6,8 @@ a = Analysis(
     pathex=[],
     binaries=[],
     datas=[],
-    hiddenimports=[],
+    # imported lazily by the script, so PyInstaller cannot see them
+    hiddenimports=["fitz", "pymupdf", "PIL.Image", "PIL.ImageTk", "pytesseract", "tesserocr"],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
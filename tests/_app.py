@@ -0,0 +1,23 @@
+"""
+Loads Invoice_Runner_v3.2.py as the module `invoice_runner` (the file name
+is not importable). Imported this way, __name__ is not "__main__", so the
+GUI stays off and nothing runs on import.
+"""
+import importlib.util
+import sys
+from pathlib import Path
+
+SCRIPT = Path(__file__).resolve().parent.parent / "Invoice_Runner_v3.2.py"
+NAME = "invoice_runner"
+
+
+def load_app():
+    if NAME not in sys.modules:
+        spec = importlib.util.spec_from_file_location(NAME, SCRIPT)
+        mod = importlib.util.module_from_spec(spec)
+        sys.modules[NAME] = mod
+        spec.loader.exec_module(mod)
+    return sys.modules[NAME]
+
+
+app = load_app()
@@ -0,0 +1,97 @@
+"""
+The straightforward implementations the optimized paths in the app
+replaced, plus the synthetic inputs they are compared on. Kept only to
+check those paths against and to time them; nothing here ships.
+"""
+import re
+from typing import Dict, Optional, Tuple
+
+from _app import app
+
+
+# ======================================
+# Client map
+# ======================================
+def map_lookup(ref: str, client_map: Dict[str, str]) -> str:
+    """The original linear scans that ClientMapIndex.lookup replaced."""
+    if ref in client_map:
+        return client_map[ref]
+    for k, v in client_map.items():
+        if ref.lower() == k.lower():
+            return v
+    for k, v in client_map.items():
+        if k and k.lower() in ref.lower():
+            return v
+    return ""
+
+
+def fuzzy_lookup(ref: str, fz) -> Tuple[str, Optional[float]]:
+    """FuzzyClientIndex.lookup by brute force: every query against every key."""
+    d = fz.max_edits
+    best = None
+    for q in fz._queries(ref):
+        for kid, key in enumerate(fz.keys):
+            dist = app.bounded_edit_distance(q, key, d)
+            if dist <= d and (best is None or (dist, kid) < best[:2]):
+                best = (dist, kid, len(q))
+    if best is None:
+        return "", None
+    dist, kid, nq = best
+    return fz.values[kid], round(1.0 - dist / max(len(fz.keys[kid]), nq), 3)
+
+
+# ======================================
+# FedEx shipments
+# ======================================
+# Per-block regex fan-out that FedExParser.iter_shipments replaced.
+_SENDER_RX = re.compile(r"^\s*Sender\s+(.+)$", re.I | re.M)
+
+
+def _sender_name(sender_line: str) -> str:
+    s = re.sub(r"^\s*Sender\s+", "", sender_line, flags=re.I).strip()
+    cut = re.split(r"\bGelfand\b", s, flags=re.I)[0].strip()
+    if cut:
+        cut = re.sub(r"\s+Gelfand.*$", "", cut, flags=re.I).strip()
+        return cut[:80]
+    tokens = s.split()
+    return (" ".join(tokens[:3]))[:80] if tokens else s[:80]
+
+
+def fedex_shipments(text: str):
+    """Same tuples as FedExParser.iter_shipments, one substring and five searches per block."""
+    P = app.FedExParser
+    starts = [m.start() for m in re.finditer(re.escape("Ship Date:"), text)]
+    starts.append(len(text))
+    for a, b in zip(starts, starts[1:]):
+        blk = text[a:b]
+        mref = P.CUST_REF_RX.search(blk)
+        msend = _SENDER_RX.search(blk)
+        totals = list(P.TOTAL_RX.finditer(blk))
+        mtrk = P.TRACK_RX.search(blk)
+        yield (mref.group(1).strip() if mref else None,
+               _sender_name(msend.group(0)) if msend else None,
+               app.amount_to_float(totals[-1].group(1)) if totals else None,
+               mtrk.group(1).strip() if mtrk else None,
+               bool(P.CONT_RX.search(blk)))
+
+
+def fedex_invoice_text(shipments: int) -> str:
+    """Synthetic FedEx invoice text: every ninth shipment is split by a page break."""
+    lines = ["FedEx", "Invoice Number 9-100-12345", "Invoice Date Oct 12, 2025", "Invoice Summary"]
+    for i in range(shipments):
+        trk = str(770000000000 + i)
+        blk = ["Ship Date: Oct 01, 2025   Service Type FedEx Priority Overnight   Zone 02",
+               f"Tracking ID: {trk}   Package Type FedEx Envelope",
+               "Dim Factor 139   Actual Weight 1.0 lbs   Rated Weight 1.0 lbs",
+               f"Sender   John Doe{i} Gelfand Rennert & Feldman LLP   Recipient  Acme Corp",
+               "1880 Century Park East   ANY CITY CA 90067 US",
+               f"Cust. Ref.: {3119952000 + i % 4000} matter 00{i}",
+               "Transportation Charge 10.00", "Fuel Surcharge 1.25", "Delivery Area Surcharge 3.10",
+               f"Total Charge USD ${10 + i % 7}.{i % 100:02d}"]
+        if i % 9 == 4:
+            lines += blk[:6] + ["continued on next page", f"Tracking ID: {trk} continued",
+                                "Ship Date: Oct 01, 2025", f"Tracking ID: {trk}", blk[-1]]
+        else:
+            lines += blk
+    lines.append("Other Charges USD $12.50")
+    return "\n".join(lines)
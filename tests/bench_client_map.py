@@ -0,0 +1,93 @@
+"""
+Times client-code lookups as the client map grows. Indexed time per row
+should stay flat; the linear reference scans are timed on a sample and
+scaled up to the row count.
+
+    python tests/bench_client_map.py [--map-sizes 1000,10000,80000] [--rows 20000]
+"""
+import argparse
+import json
+import random
+import time
+
+from _app import app
+import _reference as ref
+
+
+def best_ms(fn, runs):
+    best = None
+    for _ in range(max(1, runs)):
+        t = time.perf_counter()
+        fn()
+        dt = time.perf_counter() - t
+        best = dt if best is None else min(best, dt)
+    return round(best * 1000, 1)
+
+
+def bench_map(rnd, size):
+    """CustRef-like keys: mostly 10-digit numbers, some short codes and names."""
+    out = {}
+    while len(out) < size:
+        r = rnd.random()
+        if r < 0.85:
+            k = str(rnd.randrange(10 ** 9, 10 ** 10))
+        elif r < 0.95:
+            k = "".join(rnd.choice("ABCDEFGHJKLMNPQRSTUVWXYZ0123456789") for _ in range(rnd.randint(4, 8)))
+        else:
+            k = rnd.choice(("Matter", "Acme", "Smith", "Doe")) + str(rnd.randrange(1000))
+        out[k] = f"C{len(out)}"
+    return out
+
+
+def bench_refs(rnd, keys, n):
+    """Shipment references: exact, other case, embedded in text, OCR-noisy, unknown."""
+    refs = []
+    for _ in range(n):
+        k = rnd.choice(keys)
+        r = rnd.random()
+        if r < 0.3:
+            refs.append(k)
+        elif r < 0.4:
+            refs.append(k.swapcase())
+        elif r < 0.7:
+            refs.append(f"{k} matter {rnd.randrange(10000)}")
+        elif r < 0.85:
+            i = rnd.randrange(len(k))
+            refs.append(k[:i] + rnd.choice("0123456789OIlS") + k[i + 1:])
+        else:
+            refs.append(f"REF {rnd.randrange(10 ** 11)}")
+    return refs
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--map-sizes", default="1000,10000,80000")
+    ap.add_argument("--rows", type=int, default=20000)
+    ap.add_argument("--runs", type=int, default=3)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    rnd = random.Random(args.seed)
+    rows = args.rows
+    sample = max(1, min(rows, 200))
+    timings = []
+    for size in (int(x) for x in args.map_sizes.split(",") if x.strip()):
+        cmap = bench_map(rnd, size)
+        refs = bench_refs(rnd, list(cmap), rows)
+        t = time.perf_counter()
+        idx = app.ClientMapIndex(cmap, fuzzy=True)
+        build_ms = round((time.perf_counter() - t) * 1000, 1)
+        exact_ms = best_ms(lambda: [idx.lookup(r) for r in refs], args.runs)
+        scored_ms = best_ms(lambda: [idx.lookup_scored(r) for r in refs], args.runs)
+        linear_ms = best_ms(lambda: [ref.map_lookup(r, cmap) for r in refs[:sample]], 1)
+        timings.append({
+            "map_size": size, "rows": rows, "build_ms": build_ms,
+            "indexed_ms": exact_ms, "indexed_us_per_row": round(exact_ms * 1000 / rows, 2),
+            "with_fuzzy_ms": scored_ms,
+            "linear_ms_est": round(linear_ms * rows / sample, 1),
+        })
+    print(json.dumps(timings, indent=2))
+
+
+if __name__ == "__main__":
+    main()
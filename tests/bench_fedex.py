@@ -0,0 +1,38 @@
+"""
+Times FedEx shipment extraction on a synthetic invoice: the scanner
+(FedExParser.iter_shipments), the per-block regex parser it replaced, and
+a full parse. Exits 1 if the scanner and the reference disagree.
+
+    python tests/bench_fedex.py [--shipments 8000] [--runs 3]
+"""
+import argparse
+import json
+import sys
+
+from _app import app
+import _reference as ref
+from bench_client_map import best_ms
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--shipments", type=int, default=8000)
+    ap.add_argument("--runs", type=int, default=3)
+    args = ap.parse_args()
+
+    parser = app.FedExParser()
+    text = ref.fedex_invoice_text(args.shipments)
+    same = list(parser.iter_shipments(text)) == list(ref.fedex_shipments(text))
+    ref_ms = best_ms(lambda: list(ref.fedex_shipments(text)), args.runs)
+    scan_ms = best_ms(lambda: list(parser.iter_shipments(text)), args.runs)
+    print(json.dumps({
+        "shipments": args.shipments, "text_mb": round(len(text) / 1e6, 2), "same": same,
+        "reference_ms": ref_ms, "scanner_ms": scan_ms,
+        "speedup": round(ref_ms / scan_ms, 2) if scan_ms else None,
+        "parse_ms": best_ms(lambda: parser.parse(text, "bench.pdf"), args.runs),
+    }, indent=2))
+    return 0 if same else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
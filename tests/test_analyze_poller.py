@@ -0,0 +1,62 @@
+"""AppBase._drain_analysis without a window: the Tk side is stubbed out."""
+from _app import app
+
+
+class _Messages:
+    def __init__(self):
+        self.shown = []
+
+    def showwarning(self, *a):
+        self.shown.append(("warning",) + a)
+
+    def showerror(self, *a):
+        self.shown.append(("error",) + a)
+
+
+class _Headless(app.AppBase):
+    def __init__(self, fail_on_rows=False):
+        self._run = None
+        self._last_run = None
+        self._view = None
+        self.rows = []
+        self.fail_on_rows = fail_on_rows
+        self.scheduled = 0
+
+    def rows_appended(self, batch):
+        if self.fail_on_rows:
+            raise RuntimeError("table broke")
+
+    def after_call(self, ms, func):
+        self.scheduled += 1
+
+    def set_progress(self, *a):
+        pass
+
+    def set_status(self, msg):
+        self.status = msg
+
+    def hide_status_bubble(self):
+        pass
+
+
+def test_failing_tick_cancels_and_releases_the_run(monkeypatch):
+    msgs = _Messages()
+    monkeypatch.setattr(app, "messagebox", msgs, raising=False)
+    ui = _Headless(fail_on_rows=True)
+    run = ui._run = app.AnalyzeRun(total_files=2)
+    run.pending.append({"InvoiceID": "1", "Amount": 5.0})
+    ui._drain_analysis()
+    assert ui._run is None and run.cancel.is_set()
+    assert ui.scheduled == 0
+    assert msgs.shown and "table broke" in msgs.shown[0][2]
+
+
+def test_healthy_tick_reschedules_until_finished(monkeypatch):
+    monkeypatch.setattr(app, "messagebox", _Messages(), raising=False)
+    ui = _Headless()
+    run = ui._run = app.AnalyzeRun(total_files=0)
+    ui._drain_analysis()
+    assert ui._run is run and ui.scheduled == 1
+    run.queue.put(None)
+    ui._drain_analysis()
+    assert ui._run is None and ui._last_run is run and ui.scheduled == 1
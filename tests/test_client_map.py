@@ -0,0 +1,44 @@
+"""ClientMapIndex / FuzzyClientIndex against the linear reference scans."""
+import random
+
+import pytest
+
+from _app import app
+import _reference as ref
+
+ALPHABET = "aAbB1Il0O ."
+
+
+def _random_map(rnd):
+    cmap = {}
+    for _ in range(rnd.randint(1, 30)):
+        cmap["".join(rnd.choice(ALPHABET) for _ in range(rnd.randint(0, 8)))] = f"V{len(cmap)}"
+    return cmap
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_matches_reference_on_adversarial_maps(seed):
+    rnd = random.Random(seed)
+    for _ in range(60):
+        cmap = _random_map(rnd)
+        idx = app.ClientMapIndex(cmap, fuzzy=True)
+        for _ in range(20):
+            r = "".join(rnd.choice(ALPHABET) for _ in range(rnd.randint(1, 14)))
+            assert idx.lookup(r) == ref.map_lookup(r, cmap), (cmap, r)
+            assert idx.fuzzy.lookup(r) == ref.fuzzy_lookup(r, idx.fuzzy), (cmap, r)
+
+
+def test_exact_beats_casefold_beats_substring():
+    cmap = {"acme": "SUB", "ACME 42": "CASE", "Acme 42": "EXACT"}
+    idx = app.ClientMapIndex(cmap)
+    assert idx.lookup("Acme 42") == "EXACT"
+    assert idx.lookup("acme 42") == "CASE"
+    assert idx.lookup("order ACME 7") == "SUB"
+    assert idx.lookup("nothing") == ""
+
+
+def test_first_key_in_map_order_wins():
+    cmap = {"Doe": "FIRST", "doe": "SECOND", "oe": "THIRD"}
+    idx = app.ClientMapIndex(cmap)
+    assert idx.lookup("DOE") == "FIRST"
+    assert idx.lookup("John Doe") == ref.map_lookup("John Doe", cmap) == "FIRST"
@@ -0,0 +1,44 @@
+"""FedExParser.iter_shipments against the per-block regex parser it replaced."""
+import random
+
+import pytest
+
+from _app import app
+import _reference as ref
+
+# Field lines, near misses, keywords out of place and characters that fold
+# differently under lower() and re.I.
+FRAGMENTS = (
+    "Ship Date: Oct 01, 2025", "Ship Date:", "ship date: x", "SHIP DATE:", "Ship Date:Ship Date:",
+    "Tracking ID: 770000000123", "Tracking ID 12345678901234567890", "tracking id:123456789",
+    "Tracking ID: 123", "Tracking ID: 77 continued", "\u212aTracking",
+    "Sender   John Doe Gelfand Rennert", "  Sender Jane Roe", "\tSENDER   Bob  gelfand",
+    "Sender Gelfand X Y Z W", "Resender Bob", "xx Sender Mid Line", "Sender", "Sender ",
+    "Senders Bob", "Sender\nBob", "SenderGelfand", "Sender Ship Date: y", "\u017fender Bob",
+    "\u0130stanbul Sender X", "Cust. Ref.: 3119952003 matter", "cust.ref:3119952004", "Cust. Ref.:",
+    "CUST. REF. :  ABC  ", "Cust.", "Cust. Ref.:\nABC", "Cust. Ref.: Ship Date: x",
+    "Total Charge USD $10.01", "Total Charge USD 1,234.50", "Total Transportation Charges USD $ 99.99",
+    "total charge usd 5.5", "Total Charge USD $12.345", "TOTAL CHARGE USD 3.00", "Total",
+    "continued on next page", "Continued  on next page",
+    "continued on next page\nTracking ID: 770000000123 continued",
+    "Other Charges USD $12.50", "Late Fee 10/01/2025 5.00", "Gelfand", "USD", "",
+    "Transportation Charge 10.00", "Ship Date: \u00df",
+)
+SEPARATORS = ("\n", " ", "", "\n\n", "  \n  ", "\t")
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_matches_reference_on_random_text(seed):
+    rnd = random.Random(seed)
+    parser = app.FedExParser()
+    for _ in range(1000):
+        parts = [rnd.choice(FRAGMENTS) for _ in range(rnd.randint(1, 40))]
+        text = "".join(p + rnd.choice(SEPARATORS) for p in parts)
+        assert list(parser.iter_shipments(text)) == list(ref.fedex_shipments(text)), text
+
+
+def test_matches_reference_on_invoice_with_page_splits():
+    text = ref.fedex_invoice_text(200)
+    got = list(app.FedExParser().iter_shipments(text))
+    assert got == list(ref.fedex_shipments(text))
+    assert sum(1 for s in got if s[4]) == 200 // 9 + (200 % 9 > 4)